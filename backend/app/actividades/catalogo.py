@@ -0,0 +1,207 @@
+"""
+Catálogo de actividades en memoria del proceso.
+
+La tabla `actividad` es chica, se lee en todos lados (validar ids, resolver
+nombres que devuelve Prolog, expansión local) y casi no se escribe. El
+catálogo la carga completa al arrancar y arma índices:
+  - por_id:           id_actividad -> actividad
+  - por_nombre:       nombre normalizado -> id_actividad (el menor si se repite)
+  - por_area:         área normalizada -> [id_actividad]
+  - por_especialidad: especialidad normalizada -> [id_actividad]
+
+Se recarga cuando cambia la versión de la tabla `actividad` (app/versiones.py),
+cuando pasaron CATALOGO_ACTIVIDADES_TTL segundos (escrituras de otros
+workers) o cuando se pide un id o nombre que no está (a lo sumo una vez cada
+CATALOGO_RECARGA_MINIMA segundos). crear_actividad agrega la nueva
+actividad sin recargar todo.
+
+Las consultas de lectura (obtener, id_por_nombre, ...) no tocan la base:
+antes hay que llamar a al_dia() o, desde rutas async, a al_dia_async().
+"""
+import os
+import bisect
+import time
+import threading
+import unicodedata
+from sqlalchemy import text
+from app.database import SessionLocal, async_engine
+from app.versiones import version_tabla
+
+
+CATALOGO_ACTIVIDADES_TTL = float(os.getenv("CATALOGO_ACTIVIDADES_TTL", "300"))
+CATALOGO_RECARGA_MINIMA = float(os.getenv("CATALOGO_RECARGA_MINIMA", "1"))
+
+_SQL_ACTIVIDADES = text("""
+    SELECT id_actividad, nombre, area, especialidad, descripcion
+    FROM actividad
+    ORDER BY id_actividad
+""")
+
+
+def normalizar(palabra) -> str:
+    """Minúsculas y sin acentos (misma normalización que limpiar_y_formatear)"""
+    palabra = unicodedata.normalize("NFKD", str(palabra)).encode("ascii", "ignore").decode()
+    return " ".join(palabra.lower().split())
+
+
+def _como_dict(actividad):
+    return {
+        "id_actividad": actividad["id_actividad"],
+        "nombre": actividad["nombre"],
+        "area": actividad["area"],
+        "especialidad": actividad["especialidad"],
+        "descripcion": actividad["descripcion"],
+    }
+
+
+class CatalogoActividades:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._cargado_en = 0.0
+        self._ultima_recarga_por_falta = 0.0
+        self.por_id = {}
+        self.ids = []      # ids de por_id, ordenados (para listar con cursor)
+        self.por_nombre = {}
+        self.por_area = {}
+        self.por_especialidad = {}
+        self.recargas = 0
+        self.cambios = 0   # sube con cada recarga o alta: derivados del catálogo lo comparan
+
+    # -------------------------
+    # CARGA
+    # -------------------------
+    def _vigente(self) -> bool:
+        return (
+            self._version == version_tabla("actividad")
+            and time.monotonic() - self._cargado_en < CATALOGO_ACTIVIDADES_TTL
+        )
+
+    def _armar(self, filas, version):
+        por_id, por_nombre, por_area, por_especialidad = {}, {}, {}, {}
+        for fila in filas:
+            actividad = _como_dict(fila)
+            id_actividad = actividad["id_actividad"]
+            por_id[id_actividad] = actividad
+            por_nombre.setdefault(normalizar(actividad["nombre"]), id_actividad)
+            if actividad["area"]:
+                por_area.setdefault(normalizar(actividad["area"]), []).append(id_actividad)
+            if actividad["especialidad"]:
+                por_especialidad.setdefault(normalizar(actividad["especialidad"]), []).append(id_actividad)
+
+        # Se reemplazan los índices enteros: quien está leyendo ve el viejo o el nuevo
+        with self._lock:
+            self.por_id, self.ids, self.por_nombre = por_id, sorted(por_id), por_nombre
+            self.por_area, self.por_especialidad = por_area, por_especialidad
+            self._version = version
+            self._cargado_en = time.monotonic()
+            self.recargas += 1
+            self.cambios += 1
+
+    def cargar(self):
+        # La versión se lee antes de consultar: si hay escrituras durante la
+        # carga, el catálogo queda vencido y se vuelve a cargar
+        version = version_tabla("actividad")
+        db = SessionLocal()
+        try:
+            filas = db.execute(_SQL_ACTIVIDADES).mappings().all()
+        finally:
+            db.close()
+        self._armar(filas, version)
+        print(f"📚 Catálogo de actividades: {len(self.por_id)} actividades")
+
+    async def cargar_async(self):
+        version = version_tabla("actividad")
+        async with async_engine.connect() as conexion:
+            filas = (await conexion.execute(_SQL_ACTIVIDADES)).mappings().all()
+        self._armar(filas, version)
+
+    def al_dia(self):
+        if not self._vigente():
+            self.cargar()
+
+    async def al_dia_async(self):
+        if not self._vigente():
+            await self.cargar_async()
+
+    def _puede_recargar_por_falta(self) -> bool:
+        with self._lock:
+            ahora = time.monotonic()
+            if ahora - self._ultima_recarga_por_falta < CATALOGO_RECARGA_MINIMA:
+                return False
+            self._ultima_recarga_por_falta = ahora
+            return True
+
+    def agregar(self, actividad, version_previa: int):
+        """
+        Suma al catálogo una actividad recién confirmada. version_previa es
+        version_tabla("actividad") antes del commit: si desde entonces solo
+        se confirmó esta escritura, el catálogo sigue vigente sin recargar.
+        """
+        actividad = _como_dict(actividad.__dict__)
+        with self._lock:
+            if self._version != version_previa:
+                return
+            id_actividad = actividad["id_actividad"]
+            if id_actividad not in self.por_id:
+                ids = list(self.ids)
+                bisect.insort(ids, id_actividad)
+                self.ids = ids
+            self.por_id = {**self.por_id, id_actividad: actividad}
+            self.por_nombre = {**self.por_nombre}
+            self.por_nombre.setdefault(normalizar(actividad["nombre"]), id_actividad)
+            for indice, valor in (("por_area", actividad["area"]), ("por_especialidad", actividad["especialidad"])):
+                if valor:
+                    nuevo = {**getattr(self, indice)}
+                    nuevo[normalizar(valor)] = nuevo.get(normalizar(valor), []) + [id_actividad]
+                    setattr(self, indice, nuevo)
+            self.cambios += 1
+            if version_tabla("actividad") == version_previa + 1:
+                self._version = version_previa + 1
+
+    # -------------------------
+    # CONSULTAS (sin acceso a la base)
+    # -------------------------
+    def obtener(self, id_actividad):
+        return self.por_id.get(id_actividad)
+
+    def id_por_nombre(self, nombre):
+        return self.por_nombre.get(normalizar(nombre))
+
+    def ids_por_area(self, area):
+        return list(self.por_area.get(normalizar(area), []))
+
+    def ids_por_especialidad(self, especialidad):
+        return list(self.por_especialidad.get(normalizar(especialidad), []))
+
+    def listar(self, despues_de=None, limit: int = 100):
+        """Actividades en orden de id, a partir de la siguiente a `despues_de`"""
+        ids = self.ids
+        desde = bisect.bisect_right(ids, despues_de) if despues_de is not None else 0
+        return [self.por_id[i] for i in ids[desde:desde + limit]]
+
+    def nombres(self):
+        return [a["nombre"] for a in self.por_id.values()]
+
+    # -------------------------
+    # CONSULTAS QUE TOLERAN UN CATÁLOGO VIEJO (recargan si no encuentran)
+    # -------------------------
+    async def buscar_async(self, id_actividad):
+        """Actividad por id, recargando una vez si no está (creada en otro worker)"""
+        await self.al_dia_async()
+        actividad = self.obtener(id_actividad)
+        if actividad is None and self._puede_recargar_por_falta():
+            await self.cargar_async()
+            actividad = self.obtener(id_actividad)
+        return actividad
+
+    def estadisticas(self):
+        return {
+            "actividades": len(self.por_id),
+            "version": self._version,
+            "recargas": self.recargas,
+            "segundos_desde_carga": round(time.monotonic() - self._cargado_en, 1) if self._version is not None else None,
+        }
+
+
+catalogo_actividades = CatalogoActividades()
@@ -0,0 +1,86 @@
+"""
+Ofertas por habilidad para enriquecer las recomendaciones de Prolog.
+
+Los nombres se resuelven con el catálogo de actividades y las ofertas de
+todas las habilidades recomendadas se traen en una sola consulta
+(oferta_actividad JOIN oferta_empleo); quedan en caché por habilidad. La
+caché se vacía cuando cambia la versión de oferta_empleo, oferta_actividad o
+actividad (ver app/versiones.py).
+"""
+import threading
+from sqlalchemy import select
+from app.versiones import version_tabla
+from app.actividades.catalogo import catalogo_actividades
+from app.ofertas.models import OfertaEmpleo, OfertaActividad
+
+
+TABLAS = ("oferta_empleo", "oferta_actividad", "actividad")
+
+_lock = threading.Lock()
+_cache = {}        # habilidad -> [ofertas]
+_version = None
+_contadores = {"aciertos": 0, "consultadas": 0}
+
+
+def _consultar(db, habilidades):
+    """{habilidad: [ofertas]} de las habilidades pedidas, en una consulta"""
+    # Prolog devuelve los nombres sin acentos (limpiar_y_formatear): se
+    # resuelven contra el catálogo por nombre normalizado
+    catalogo_actividades.al_dia()
+    ids = {h: catalogo_actividades.id_por_nombre(h) for h in habilidades}
+    resultado = {habilidad: [] for habilidad in habilidades}
+    buscados = {i for i in ids.values() if i is not None}
+    if not buscados:
+        return resultado
+
+    filas = db.execute(
+        select(OfertaActividad.id_actividad,
+               OfertaEmpleo.id_oferta, OfertaEmpleo.titulo, OfertaEmpleo.descripcion)
+        .join(OfertaEmpleo, OfertaEmpleo.id_oferta == OfertaActividad.id_oferta)
+        .where(OfertaActividad.id_actividad.in_(buscados))
+        .order_by(OfertaEmpleo.id_oferta)
+    ).all()
+
+    ofertas_de = {}
+    for id_actividad, id_oferta, titulo, descripcion in filas:
+        ofertas_de.setdefault(id_actividad, []).append({
+            "id_oferta": id_oferta,
+            "titulo": titulo,
+            "descripcion": descripcion
+        })
+    for habilidad, id_actividad in ids.items():
+        resultado[habilidad] = ofertas_de.get(id_actividad, [])
+    return resultado
+
+
+def ofertas_por_habilidad(db, habilidades):
+    """
+    {habilidad: [{id_oferta, titulo, descripcion}]} para cada habilidad
+    (lista vacía si no hay actividad con ese nombre o no tiene ofertas).
+    """
+    global _version
+    version = tuple(version_tabla(t) for t in TABLAS)
+    with _lock:
+        if _version != version:
+            _cache.clear()
+            _version = version
+        resultado = {h: _cache[h] for h in habilidades if h in _cache}
+        _contadores["aciertos"] += len(resultado)
+
+    faltantes = [h for h in dict.fromkeys(habilidades) if h not in resultado]
+    if faltantes:
+        consultadas = _consultar(db, faltantes)
+        resultado.update(consultadas)
+        with _lock:
+            _contadores["consultadas"] += len(faltantes)
+            # Si hubo escrituras durante la consulta no se guarda lo leído:
+            # la versión se vuelve a leer acá (_version solo cambia en la
+            # próxima llamada y compararla con la leída al entrar no detecta nada)
+            if _version == version and tuple(version_tabla(t) for t in TABLAS) == version:
+                _cache.update(consultadas)
+    return resultado
+
+
+def estadisticas():
+    with _lock:
+        return {**_contadores, "habilidades_en_cache": len(_cache)}
@@ -1,18 +1,21 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-import requests
-from app.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+import httpx
+from app.database import get_db, get_async_db
 from .models import Actividad, PersonaActividad, EmpresaActividad
+from .ofertas_habilidad import ofertas_por_habilidad
+from .catalogo import catalogo_actividades
+from app.versiones import version_tabla
+from app.paginacion import Pagina, CURSOR, LIMITE, decodificar_cursor, pagina
 from app.personas.models import Persona
 from app.empresas.models import Empresa
 from pydantic import BaseModel
 from typing import List, Optional
-from app.ofertas.models import OfertaActividad ,OfertaEmpleo
-from app.prolog.motor import MotorProlog
-
-
-prolog = MotorProlog()
-
+from app.prolog.motor import motor_prolog as prolog, motor_prolog_async
+from app.matching.servicio import asegurar_hechos_actualizados, regenerar_hechos
+from starlette.concurrency import run_in_threadpool
 
 
 router = APIRouter(prefix="/actividades", tags=["actividades"])
@@ -81,34 +84,108 @@ class EmpresaActividadCreate(EmpresaActividadBase):
     pass
 
 
+class PersonasLote(BaseModel):
+    """
+    Esquema para pedir las actividades de varias personas en una sola consulta.
+    """
+    dnis: List[int]
+
+
+class EmpresasLote(BaseModel):
+    """
+    Esquema para pedir las actividades de varias empresas en una sola consulta.
+    """
+    empresas: List[int]
+
+
+# Máximo de personas o empresas por pedido en lote
+MAXIMO_LOTE = 1000
+
+
+async def _actividades_personas(db: AsyncSession, dnis):
+    """
+    {dni: [actividades]} de las personas que existen (lista vacía si no tienen
+    actividades), con un único SELECT persona LEFT JOIN persona_actividad LEFT JOIN actividad.
+    """
+    filas = (await db.execute(
+        select(Persona.dni, PersonaActividad, Actividad)
+        .outerjoin(PersonaActividad, PersonaActividad.dni == Persona.dni)
+        .outerjoin(Actividad, Actividad.id_actividad == PersonaActividad.id_actividad)
+        .where(Persona.dni.in_(dnis))
+        .order_by(Persona.dni, PersonaActividad.id_relacion)
+    )).all()
+
+    resultado = {}
+    for dni, relacion, actividad in filas:
+        actividades = resultado.setdefault(dni, [])
+        if relacion is not None:
+            actividades.append({
+                "id_actividad": relacion.id_actividad,
+                "nombre": actividad.nombre,
+                "area": actividad.area,
+                "especialidad": actividad.especialidad,
+                "nivel_experiencia": relacion.nivel_experiencia,
+                "años_experiencia": relacion.años_experiencia
+            })
+    return resultado
+
+
+async def _actividades_empresas(db: AsyncSession, ids_empresa):
+    """{id_empresa: [actividades]} de las empresas que existen, en un único SELECT"""
+    filas = (await db.execute(
+        select(Empresa.id_empresa, EmpresaActividad, Actividad)
+        .outerjoin(EmpresaActividad, EmpresaActividad.id_empresa == Empresa.id_empresa)
+        .outerjoin(Actividad, Actividad.id_actividad == EmpresaActividad.id_actividad)
+        .where(Empresa.id_empresa.in_(ids_empresa))
+        .order_by(Empresa.id_empresa, EmpresaActividad.id_actividad)
+    )).all()
+
+    resultado = {}
+    for id_empresa, relacion, actividad in filas:
+        actividades = resultado.setdefault(id_empresa, [])
+        if relacion is not None:
+            actividades.append({
+                "id_actividad": relacion.id_actividad,
+                "nombre": actividad.nombre,
+                "area": actividad.area,
+                "especialidad": actividad.especialidad,
+                "especializacion": relacion.especializacion
+            })
+    return resultado
+
+
 # Endpoints para CRUD de actividades
 
-@router.get("/", response_model=List[ActividadResponse])
+@router.get("/", response_model=Pagina[ActividadResponse])
 async def listar_actividades(
-    skip: int = 0, 
-    limit: int = 100, 
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = CURSOR,
+    limit: int = LIMITE
 ):
     """
-    Listar todas las actividades disponibles con paginación opcional.
+    Listar las actividades disponibles, paginadas por cursor (orden por id).
+    Se sirve desde el catálogo en memoria.
 
     Parámetros:
-    - skip (int): cantidad de registros a omitir para paginar.
+    - cursor (str): `siguiente` de la página anterior (vacío para la primera).
     - limit (int): cantidad máxima de registros a devolver.
-    - db: sesión de base de datos por dependencia.
 
     Retorna:
-    - Lista de actividades en formato detallado.
+    - {"resultados": [actividades], "siguiente": cursor | null, "limit": n}
+    - 400 si el cursor no es válido.
     """
     try:
-        actividades = db.query(Actividad).offset(skip).limit(limit).all()
-        return actividades
+        despues_de = decodificar_cursor(cursor, 1)[0] if cursor else None
+        await catalogo_actividades.al_dia_async()
+        actividades = catalogo_actividades.listar(despues_de, limit + 1)
+        return pagina(actividades, [Actividad.id_actividad], limit)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener actividades: {str(e)}")
 
 
 @router.post("/", response_model=ActividadResponse)
-async def crear_actividad(actividad: ActividadCreate, db: Session = Depends(get_db)):
+async def crear_actividad(actividad: ActividadCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Crear una nueva actividad si no existe previamente con el mismo nombre.
 
@@ -124,8 +201,10 @@ async def crear_actividad(actividad: ActividadCreate, db: Session = Depends(get_
     - 500 errores del servidor o base de datos.
     """
     try:
-        actividad_existente = db.query(Actividad).filter(Actividad.nombre == actividad.nombre).first()
-        if actividad_existente:
+        actividad_existente = (await db.execute(
+            select(Actividad.id_actividad).where(Actividad.nombre == actividad.nombre).limit(1)
+        )).scalar()
+        if actividad_existente is not None:
             raise HTTPException(status_code=400, detail="Ya existe una actividad con este nombre")
         
         nueva_actividad = Actividad(
@@ -134,23 +213,25 @@ async def crear_actividad(actividad: ActividadCreate, db: Session = Depends(get_
             especialidad=actividad.especialidad,
             descripcion=actividad.descripcion
         )
+        version_previa = version_tabla("actividad")
         db.add(nueva_actividad)
-        db.commit()
-        db.refresh(nueva_actividad)
+        await db.commit()
+        await db.refresh(nueva_actividad)
+        catalogo_actividades.agregar(nueva_actividad, version_previa)
         return nueva_actividad
         
     except HTTPException:
-        db.rollback()
+        await db.rollback()
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error al crear actividad: {str(e)}")
 
 
 # Endpoints para gestión de relación Persona - Actividad
 
 @router.post("/persona", response_model=dict)
-async def agregar_actividad_persona(relacion: PersonaActividadCreate, db: Session = Depends(get_db)):
+async def agregar_actividad_persona(relacion: PersonaActividadCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Asociar una actividad a una persona con nivel y años de experiencia.
 
@@ -168,18 +249,18 @@ async def agregar_actividad_persona(relacion: PersonaActividadCreate, db: Sessio
     - 500 errores internos.
     """
     try:
-        persona = db.query(Persona).filter(Persona.dni == relacion.dni).first()
+        persona = await db.get(Persona, relacion.dni)
         if not persona:
             raise HTTPException(status_code=404, detail="Persona no encontrada")
         
-        actividad = db.query(Actividad).filter(Actividad.id_actividad == relacion.id_actividad).first()
+        actividad = await catalogo_actividades.buscar_async(relacion.id_actividad)
         if not actividad:
             raise HTTPException(status_code=404, detail="Actividad no encontrada")
         
-        relacion_existente = db.query(PersonaActividad).filter(
+        relacion_existente = (await db.execute(select(PersonaActividad).where(
             PersonaActividad.dni == relacion.dni,
             PersonaActividad.id_actividad == relacion.id_actividad
-        ).first()
+        ))).scalars().first()
         if relacion_existente:
             raise HTTPException(status_code=400, detail="La persona ya tiene esta actividad")
         
@@ -195,20 +276,20 @@ async def agregar_actividad_persona(relacion: PersonaActividadCreate, db: Sessio
         )
         
         db.add(nueva_relacion)
-        db.commit()
+        await db.commit()
         
         return {"message": "Actividad agregada a la persona exitosamente"}
         
     except HTTPException:
-        db.rollback()
+        await db.rollback()
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error al agregar actividad: {str(e)}")
 
 
 @router.get("/persona/{dni}", response_model=List[dict])
-async def obtener_actividades_persona(dni: int, db: Session = Depends(get_db)):
+async def obtener_actividades_persona(dni: int, db: AsyncSession = Depends(get_async_db)):
     """
     Obtener las actividades asignadas a una persona.
 
@@ -222,32 +303,50 @@ async def obtener_actividades_persona(dni: int, db: Session = Depends(get_db)):
     - 500 en error interno.
     """
     try:
-        persona = db.query(Persona).filter(Persona.dni == dni).first()
-        if not persona:
+        # Persona, relaciones y actividades en una sola consulta
+        actividades = await _actividades_personas(db, [dni])
+        if dni not in actividades:
             raise HTTPException(status_code=404, detail="Persona no encontrada")
         
-        actividades = db.query(PersonaActividad).filter(PersonaActividad.dni == dni).all()
-        
-        resultado = []
-        for actividad_rel in actividades:
-            actividad_info = db.query(Actividad).filter(Actividad.id_actividad == actividad_rel.id_actividad).first()
-            resultado.append({
-                "id_actividad": actividad_rel.id_actividad,
-                "nombre": actividad_info.nombre,
-                "area": actividad_info.area,
-                "especialidad": actividad_info.especialidad,
-                "nivel_experiencia": actividad_rel.nivel_experiencia,
-                "años_experiencia": actividad_rel.años_experiencia
-            })
-        
-        return resultado
+        return actividades[dni]
         
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al obtener actividades: {str(e)}")
+
+
+@router.post("/personas/lote", response_model=dict)
+async def obtener_actividades_personas(lote: PersonasLote, db: AsyncSession = Depends(get_async_db)):
+    """
+    Obtener las actividades de varias personas en una sola consulta
+    (pantallas de empresa que listan candidatos).
+
+    Parámetros:
+    - lote: {"dnis": [...]} (hasta MAXIMO_LOTE).
+    - db: sesión de base de datos.
+
+    Retorna:
+    - {"actividades": {dni: [actividades]}, "no_encontrados": [dnis]}
+      con el mismo formato por persona que GET /actividades/persona/{dni}.
+    - 400 si el lote supera el máximo.
+    - 500 en error interno.
+    """
+    if len(lote.dnis) > MAXIMO_LOTE:
+        raise HTTPException(status_code=400, detail=f"Máximo {MAXIMO_LOTE} personas por pedido")
+    try:
+        dnis = list(dict.fromkeys(lote.dnis))
+        actividades = await _actividades_personas(db, dnis) if dnis else {}
+        return {
+            "actividades": actividades,
+            "no_encontrados": [dni for dni in dnis if dni not in actividades]
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener actividades: {str(e)}")
 
 
 @router.delete("/persona/{dni}/{id_actividad}", response_model=dict)
-async def eliminar_actividad_persona(dni: int, id_actividad: int, db: Session = Depends(get_db)):
+async def eliminar_actividad_persona(dni: int, id_actividad: int, db: AsyncSession = Depends(get_async_db)):
     """
     Eliminar una actividad asignada a una persona específica.
 
@@ -262,39 +361,39 @@ async def eliminar_actividad_persona(dni: int, id_actividad: int, db: Session =
     - 500 en error interno.
     """
     try:
-        persona = db.query(Persona).filter(Persona.dni == dni).first()
+        persona = await db.get(Persona, dni)
         if not persona:
             raise HTTPException(status_code=404, detail="Persona no encontrada")
         
-        actividad = db.query(Actividad).filter(Actividad.id_actividad == id_actividad).first()
+        actividad = await catalogo_actividades.buscar_async(id_actividad)
         if not actividad:
             raise HTTPException(status_code=404, detail="Actividad no encontrada")
         
-        relacion_existente = db.query(PersonaActividad).filter(
+        relacion_existente = (await db.execute(select(PersonaActividad).where(
             PersonaActividad.dni == dni,
             PersonaActividad.id_actividad == id_actividad
-        ).first()
+        ))).scalars().first()
         
         if not relacion_existente:
             raise HTTPException(status_code=404, detail="La persona no tiene esta actividad asignada")
         
-        db.delete(relacion_existente)
-        db.commit()
+        await db.delete(relacion_existente)
+        await db.commit()
         
         return {"message": "Actividad eliminada de la persona exitosamente"}
         
     except HTTPException:
-        db.rollback()
+        await db.rollback()
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error al eliminar actividad: {str(e)}")
 
 
 # Endpoints para Empresa-Actividad
 
 @router.post("/empresa", response_model=dict)
-async def agregar_actividad_empresa(relacion: EmpresaActividadCreate, db: Session = Depends(get_db)):
+async def agregar_actividad_empresa(relacion: EmpresaActividadCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Asociar una actividad a una empresa con una especialización opcional.
 
@@ -306,18 +405,18 @@ async def agregar_actividad_empresa(relacion: EmpresaActividadCreate, db: Sessio
     - Mensaje indicando éxito o error.
     """
     try:
-        empresa = db.query(Empresa).filter(Empresa.id_empresa == relacion.id_empresa).first()
+        empresa = await db.get(Empresa, relacion.id_empresa)
         if not empresa:
             raise HTTPException(status_code=404, detail="Empresa no encontrada")
         
-        actividad = db.query(Actividad).filter(Actividad.id_actividad == relacion.id_actividad).first()
+        actividad = await catalogo_actividades.buscar_async(relacion.id_actividad)
         if not actividad:
             raise HTTPException(status_code=404, detail="Actividad no encontrada")
         
-        relacion_existente = db.query(EmpresaActividad).filter(
+        relacion_existente = (await db.execute(select(EmpresaActividad).where(
             EmpresaActividad.id_empresa == relacion.id_empresa,
             EmpresaActividad.id_actividad == relacion.id_actividad
-        ).first()
+        ))).scalars().first()
         if relacion_existente:
             raise HTTPException(status_code=400, detail="La empresa ya tiene esta actividad")
         
@@ -328,20 +427,20 @@ async def agregar_actividad_empresa(relacion: EmpresaActividadCreate, db: Sessio
         )
         
         db.add(nueva_relacion)
-        db.commit()
+        await db.commit()
         
         return {"message": "Actividad agregada a la empresa exitosamente"}
         
     except HTTPException:
-        db.rollback()
+        await db.rollback()
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error al agregar actividad: {str(e)}")
 
 
 @router.get("/empresa/{id_empresa}", response_model=List[dict])
-async def obtener_actividades_empresa(id_empresa: int, db: Session = Depends(get_db)):
+async def obtener_actividades_empresa(id_empresa: int, db: AsyncSession = Depends(get_async_db)):
     """
     Obtener las actividades asignadas a una empresa.
 
@@ -355,31 +454,48 @@ async def obtener_actividades_empresa(id_empresa: int, db: Session = Depends(get
     - 500 en error interno.
     """
     try:
-        empresa = db.query(Empresa).filter(Empresa.id_empresa == id_empresa).first()
-        if not empresa:
+        actividades = await _actividades_empresas(db, [id_empresa])
+        if id_empresa not in actividades:
             raise HTTPException(status_code=404, detail="Empresa no encontrada")
         
-        actividades = db.query(EmpresaActividad).filter(EmpresaActividad.id_empresa == id_empresa).all()
-        
-        resultado = []
-        for actividad_rel in actividades:
-            actividad_info = db.query(Actividad).filter(Actividad.id_actividad == actividad_rel.id_actividad).first()
-            resultado.append({
-                "id_actividad": actividad_rel.id_actividad,
-                "nombre": actividad_info.nombre,
-                "area": actividad_info.area,
-                "especialidad": actividad_info.especialidad,
-                "especializacion": actividad_rel.especializacion
-            })
-        
-        return resultado
+        return actividades[id_empresa]
         
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al obtener actividades: {str(e)}")
+
+
+@router.post("/empresas/lote", response_model=dict)
+async def obtener_actividades_empresas(lote: EmpresasLote, db: AsyncSession = Depends(get_async_db)):
+    """
+    Obtener las actividades de varias empresas en una sola consulta.
+
+    Parámetros:
+    - lote: {"empresas": [...]} (hasta MAXIMO_LOTE).
+    - db: sesión de base de datos.
+
+    Retorna:
+    - {"actividades": {id_empresa: [actividades]}, "no_encontrados": [ids]}
+      con el mismo formato por empresa que GET /actividades/empresa/{id_empresa}.
+    - 400 si el lote supera el máximo.
+    - 500 en error interno.
+    """
+    if len(lote.empresas) > MAXIMO_LOTE:
+        raise HTTPException(status_code=400, detail=f"Máximo {MAXIMO_LOTE} empresas por pedido")
+    try:
+        ids_empresa = list(dict.fromkeys(lote.empresas))
+        actividades = await _actividades_empresas(db, ids_empresa) if ids_empresa else {}
+        return {
+            "actividades": actividades,
+            "no_encontrados": [i for i in ids_empresa if i not in actividades]
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener actividades: {str(e)}")
 
 
 @router.delete("/empresa/{id_empresa}/{id_actividad}", response_model=dict)
-async def eliminar_actividad_empresa(id_empresa: int, id_actividad: int, db: Session = Depends(get_db)):
+async def eliminar_actividad_empresa(id_empresa: int, id_actividad: int, db: AsyncSession = Depends(get_async_db)):
     """
     Eliminar una actividad asignada a una empresa específica.
 
@@ -394,54 +510,49 @@ async def eliminar_actividad_empresa(id_empresa: int, id_actividad: int, db: Ses
     - 500 en error interno.
     """
     try:
-        empresa = db.query(Empresa).filter(Empresa.id_empresa == id_empresa).first()
+        empresa = await db.get(Empresa, id_empresa)
         if not empresa:
             raise HTTPException(status_code=404, detail="Empresa no encontrada")
         
-        actividad = db.query(Actividad).filter(Actividad.id_actividad == id_actividad).first()
+        actividad = await catalogo_actividades.buscar_async(id_actividad)
         if not actividad:
             raise HTTPException(status_code=404, detail="Actividad no encontrada")
         
-        relacion_existente = db.query(EmpresaActividad).filter(
+        relacion_existente = (await db.execute(select(EmpresaActividad).where(
             EmpresaActividad.id_empresa == id_empresa,
             EmpresaActividad.id_actividad == id_actividad
-        ).first()
+        ))).scalars().first()
         
         if not relacion_existente:
             raise HTTPException(status_code=404, detail="La empresa no tiene esta actividad asignada")
         
-        db.delete(relacion_existente)
-        db.commit()
+        await db.delete(relacion_existente)
+        await db.commit()
         
         return {"message": "Actividad eliminada de la empresa exitosamente"}
         
     except HTTPException:
-        db.rollback()
+        await db.rollback()
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error al eliminar actividad: {str(e)}")
 
 
 
 @router.post("/sistema-aprendizaje/ejecutar")
-async def ejecutar_aprendizaje(db: Session = Depends(get_db)):
+async def ejecutar_aprendizaje():
     """Ejecutar aprendizaje automático en Prolog"""
     try:
-        PROLOG_URL = "http://prolog-engine:4000"
-        
         print("🎓 Ejecutando aprendizaje en Prolog...")
         
-        # Paso 1: Ejecutar aprendizaje en Prolog
-        response_aprender = requests.post(f"{PROLOG_URL}/aprender", timeout=30)
-        response_aprender.raise_for_status()
-        
-        resultado_aprender = response_aprender.json()
+        # Paso 1: Ejecutar aprendizaje en Prolog (sin bloquear el event loop)
+        resultado_aprender = await motor_prolog_async.aprender()
         print("✅ Aprendizaje completado en Prolog")
         
         # Paso 2: Regenerar archivos de Prolog con las nuevas relaciones aprendidas
-        from app.prolog.generador_hechos import generar_hechos
-        resultado_generacion = generar_hechos()
+        # (coordinado con otras regeneraciones y fuera del event loop)
+        resultado_generacion = await run_in_threadpool(regenerar_hechos)
         print("✅ Archivos de Prolog regenerados con nuevas relaciones")
         
         return {
@@ -451,7 +562,7 @@ async def ejecutar_aprendizaje(db: Session = Depends(get_db)):
             "archivos_regenerados": resultado_generacion
         }
         
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         raise HTTPException(status_code=500, detail=f"Error ejecutando aprendizaje: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error en sistema de aprendizaje: {str(e)}")
@@ -461,9 +572,7 @@ async def ejecutar_aprendizaje(db: Session = Depends(get_db)):
 async def busqueda_semantica(consulta: str):
     """Búsqueda semántica de actividades"""
     try:
-        PROLOG_URL = "http://prolog-engine:4000"
-        response = requests.get(f"{PROLOG_URL}/buscar_semantica?consulta={consulta}")
-        return response.json()
+        return await motor_prolog_async.buscar_semantica(consulta)
     except Exception as e:
         raise HTTPException(500, f"Error en búsqueda semántica: {str(e)}")
 
@@ -476,7 +585,8 @@ def recomendaciones_habilidades(dni: int, db: Session = Depends(get_db)):
     Luego le agrega id_oferta y datos de ofertas reales
     """
     try:
-        # 1) Llamar al microservicio Prolog
+        # 1) Llamar al microservicio Prolog (con hechos al día)
+        asegurar_hechos_actualizados()
         resultado = prolog.recomendaciones_habilidades(dni)
 
         if resultado.get("status") == "error":
@@ -485,44 +595,21 @@ def recomendaciones_habilidades(dni: int, db: Session = Depends(get_db)):
                 detail=resultado.get("message", "Error consultando Prolog")
             )
 
-        recomendaciones_finales = []
-
-        # 2) Enriquecer con datos reales de la BD
-        for rec in resultado.get("recomendaciones", []):
-            habilidad = rec["habilidad"]
-
-            # Buscar la actividad en DB
-            actividad = db.query(Actividad).filter(
-                Actividad.nombre == habilidad
-            ).first()
-
-            ofertas = []
-
-            if actividad:
-                # Buscar relaciones actividad → oferta
-                relaciones = db.query(OfertaActividad).filter(
-                    OfertaActividad.id_actividad == actividad.id_actividad
-                ).all()
+        recomendaciones = resultado.get("recomendaciones", [])
 
-                for rel in relaciones:
-                    oferta = db.query(OfertaEmpleo).filter(
-                        OfertaEmpleo.id_oferta == rel.id_oferta
-                    ).first()
+        # 2) Enriquecer con ofertas reales: una consulta para todas las
+        #    habilidades (o ninguna si ya están en caché)
+        ofertas = ofertas_por_habilidad(db, [rec["habilidad"] for rec in recomendaciones])
 
-                    if oferta:
-                        ofertas.append({
-                            "id_oferta": oferta.id_oferta,
-                            "titulo": oferta.titulo,
-                            "descripcion": oferta.descripcion
-                        })
-
-            # Completar recomendación
-            recomendaciones_finales.append({
+        recomendaciones_finales = [
+            {
                 "habilidad": rec["habilidad"],
                 "confianza": rec["confianza"],
                 "razon": rec["razon"],
-                "ofertas": ofertas
-            })
+                "ofertas": ofertas[rec["habilidad"]]
+            }
+            for rec in recomendaciones
+        ]
 
         return {
             "dni": dni,
@@ -530,5 +617,7 @@ def recomendaciones_habilidades(dni: int, db: Session = Depends(get_db)):
             "status": "ok"
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,167 @@
+"""
+Escritura diferida de los datos de control del login.
+
+Cada login exitoso o fallido modifica `ultimo_login` / `intentos_login` del
+usuario. En vez de confirmar una transacción por pedido, los cambios se
+acumulan en memoria (uno por usuario, combinando los sucesivos) y se
+escriben en lote:
+  - cada LOGIN_FLUSH_SEGUNDOS, desde una tarea en segundo plano
+  - al juntar LOGIN_FLUSH_MAXIMO usuarios pendientes
+  - al apagar el servidor (siempre)
+
+Los datos de control pueden llegar a la base con hasta LOGIN_FLUSH_SEGUNDOS
+de atraso; nada del login depende de leerlos.
+"""
+import os
+import asyncio
+from datetime import datetime
+from sqlalchemy import update, bindparam
+from app.database import async_engine
+from .models import Usuario
+
+
+LOGIN_FLUSH_SEGUNDOS = float(os.getenv("LOGIN_FLUSH_SEGUNDOS", "2"))
+LOGIN_FLUSH_MAXIMO = int(os.getenv("LOGIN_FLUSH_MAXIMO", "500"))
+
+tabla = Usuario.__table__
+
+# Login exitoso: fija ultimo_login y deja intentos en los fallos posteriores
+_UPDATE_EXITO = (
+    update(tabla)
+    .where(tabla.c.id_usuario == bindparam("b_id"))
+    .values(ultimo_login=bindparam("b_login"), intentos_login=bindparam("b_fallos"))
+)
+
+# Solo fallos: suma al contador que ya está en la base
+_UPDATE_FALLOS = (
+    update(tabla)
+    .where(tabla.c.id_usuario == bindparam("b_id"))
+    .values(intentos_login=tabla.c.intentos_login + bindparam("b_fallos"))
+)
+
+
+# id_usuario -> {"ultimo_login": datetime | None, "fallos": int}
+# ultimo_login != None significa "hubo un login exitoso": intentos_login se
+# reinicia y "fallos" cuenta solo los fallos posteriores a ese login
+_pendientes = {}
+_tarea = None
+# Flushes disparados por tamaño: se guarda la referencia (si no, el event
+# loop puede descartar la tarea) y se esperan al apagar
+_flushes_por_tamanio = set()
+_flush_en_curso = None
+_contadores = {"lotes": 0, "filas": 0, "errores": 0}
+
+
+def registrar_login_exitoso(id_usuario: int):
+    _pendientes[id_usuario] = {"ultimo_login": datetime.now(), "fallos": 0}
+    _controlar_tamanio()
+
+
+def registrar_login_fallido(id_usuario: int):
+    entrada = _pendientes.setdefault(id_usuario, {"ultimo_login": None, "fallos": 0})
+    entrada["fallos"] += 1
+    _controlar_tamanio()
+
+
+def _controlar_tamanio():
+    # Con un flush por tamaño ya en marcha no se dispara otro: flush() escribe
+    # todo lo pendiente, incluido lo que llegue mientras espera su turno
+    if len(_pendientes) >= LOGIN_FLUSH_MAXIMO and not _flushes_por_tamanio:
+        try:
+            tarea = asyncio.get_running_loop().create_task(flush())
+        except RuntimeError:
+            return  # sin event loop: queda para la tarea periódica o el apagado
+        _flushes_por_tamanio.add(tarea)
+        tarea.add_done_callback(_flush_por_tamanio_terminado)
+
+
+def _flush_por_tamanio_terminado(tarea):
+    _flushes_por_tamanio.discard(tarea)
+    if not tarea.cancelled() and tarea.exception() is not None:
+        _contadores["errores"] += 1
+        print(f"❌ Error en flush de datos de login: {tarea.exception()}")
+
+
+def _combinar(viejo, nuevo):
+    """Une un cambio no escrito (viejo) con uno posterior del mismo usuario"""
+    if nuevo["ultimo_login"] is not None:
+        return nuevo
+    return {"ultimo_login": viejo["ultimo_login"], "fallos": viejo["fallos"] + nuevo["fallos"]}
+
+
+async def flush():
+    """Escribe todos los cambios pendientes en dos UPDATE en lote"""
+    global _pendientes, _flush_en_curso
+    # Un solo flush a la vez: si ya hay uno, se espera y se vuelve a revisar
+    while _flush_en_curso is not None:
+        await _flush_en_curso
+    if not _pendientes:
+        return
+
+    lote, _pendientes = _pendientes, {}
+    _flush_en_curso = asyncio.get_running_loop().create_future()
+    exitos = [
+        {"b_id": id_usuario, "b_login": e["ultimo_login"], "b_fallos": e["fallos"]}
+        for id_usuario, e in lote.items() if e["ultimo_login"] is not None
+    ]
+    fallos = [
+        {"b_id": id_usuario, "b_fallos": e["fallos"]}
+        for id_usuario, e in lote.items() if e["ultimo_login"] is None
+    ]
+    try:
+        async with async_engine.begin() as conn:
+            if exitos:
+                await conn.execute(_UPDATE_EXITO, exitos)
+            if fallos:
+                await conn.execute(_UPDATE_FALLOS, fallos)
+        _contadores["lotes"] += 1
+        _contadores["filas"] += len(lote)
+    except Exception as e:
+        # Se devuelven al buffer para el próximo intento, sin pisar lo nuevo
+        _contadores["errores"] += 1
+        print(f"❌ Error escribiendo datos de login ({len(lote)} usuarios): {e}")
+        for id_usuario, viejo in lote.items():
+            nuevo = _pendientes.get(id_usuario)
+            _pendientes[id_usuario] = _combinar(viejo, nuevo) if nuevo else viejo
+    finally:
+        _flush_en_curso.set_result(None)
+        _flush_en_curso = None
+
+
+async def _flush_periodico():
+    while True:
+        await asyncio.sleep(LOGIN_FLUSH_SEGUNDOS)
+        await flush()
+
+
+def iniciar():
+    """Arranca la tarea periódica (llamar desde el startup de la app)"""
+    global _tarea
+    if _tarea is None:
+        _tarea = asyncio.get_running_loop().create_task(_flush_periodico())
+
+
+async def detener():
+    """Detiene la tarea periódica y escribe lo que haya pendiente"""
+    global _tarea
+    if _tarea is not None:
+        _tarea.cancel()
+        try:
+            await _tarea
+        except asyncio.CancelledError:
+            pass
+        _tarea = None
+    if _flushes_por_tamanio:
+        await asyncio.gather(*_flushes_por_tamanio, return_exceptions=True)
+    await flush()
+    if _pendientes:
+        print(f"⚠️ Quedaron {len(_pendientes)} usuarios sin escribir datos de login")
+
+
+def estadisticas():
+    return {
+        **_contadores,
+        "pendientes": len(_pendientes),
+        "intervalo_segundos": LOGIN_FLUSH_SEGUNDOS,
+        "maximo_pendientes": LOGIN_FLUSH_MAXIMO,
+    }
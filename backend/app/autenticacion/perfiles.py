@@ -0,0 +1,144 @@
+"""
+Perfil completo de un usuario (datos de Usuario + Persona o Empresa).
+
+Una sola consulta trae el usuario junto con su persona o empresa (LEFT JOIN)
+y `construir_perfil` arma el diccionario que devuelven /login y
+/usuario/completo. Los perfiles se guardan en una caché LRU en memoria con
+TTL corto y a lo sumo PERFIL_CACHE_TAMANIO entradas; actualizar_persona /
+actualizar_empresa los invalidan.
+"""
+import os
+import time
+import threading
+from collections import OrderedDict
+from sqlalchemy import select
+from .models import Usuario
+from app.personas.models import Persona
+from app.empresas.models import Empresa
+
+
+# Segundos que un perfil puede servirse desde la caché (acota lo desactualizado
+# que puede quedar en otros workers, que no reciben la invalidación)
+PERFIL_CACHE_TTL = float(os.getenv("PERFIL_CACHE_TTL", "30"))
+# Máximo de perfiles en caché: al superarlo se descarta el usado hace más tiempo
+PERFIL_CACHE_TAMANIO = int(os.getenv("PERFIL_CACHE_TAMANIO", "10000"))
+
+
+def consulta_usuario_con_perfil():
+    """SELECT usuario, persona, empresa con LEFT JOIN: filtrar con .where()"""
+    return (
+        select(Usuario, Persona, Empresa)
+        .outerjoin(Persona, Persona.dni == Usuario.dni)
+        .outerjoin(Empresa, Empresa.id_empresa == Usuario.id_empresa)
+    )
+
+
+def construir_perfil(usuario, persona=None, empresa=None) -> dict:
+    """
+    Datos completos del usuario según su rol.
+    PERSONA o EMPRESA sin su fila asociada devuelven {} (como antes).
+    """
+    base = {
+        "id_usuario": usuario.id_usuario,
+        "email": usuario.email,
+        "rol": usuario.rol,
+        "dni": usuario.dni,
+        "id_empresa": usuario.id_empresa,
+    }
+    cierre = {
+        "fecha_registro": usuario.fecha_registro.isoformat() if usuario.fecha_registro else None,
+        "activo": usuario.activo
+    }
+
+    if usuario.rol == "PERSONA" and usuario.dni:
+        if persona is None:
+            return {}
+        return {
+            **base,
+            "nombre": persona.nombre,
+            "apellido": persona.apellido,
+            "fecha_nacimiento": persona.fecha_nacimiento.isoformat() if persona.fecha_nacimiento else None,
+            "direccion": persona.direccion,
+            "ciudad": persona.ciudad,
+            "provincia": persona.provincia,
+            "sexo": persona.sexo,
+            "telefono": persona.telefono,
+            **cierre
+        }
+
+    if usuario.rol == "EMPRESA" and usuario.id_empresa:
+        if empresa is None:
+            return {}
+        return {
+            **base,
+            "nombre_empresa": empresa.nombre,
+            "direccion": empresa.direccion,
+            "ciudad": empresa.ciudad,
+            "provincia": empresa.provincia,
+            "telefono": empresa.telefono,
+            **cierre
+        }
+
+    return {**base, **cierre}
+
+
+# -------------------------
+# CACHÉ DE PERFILES (id_usuario -> (perfil, vence, dni, id_empresa))
+# -------------------------
+_lock = threading.Lock()
+_perfiles = OrderedDict()
+_por_dni = {}
+_por_empresa = {}
+
+
+def perfil_en_cache(id_usuario: int):
+    with _lock:
+        entrada = _perfiles.get(id_usuario)
+        if entrada is None:
+            return None
+        perfil, vence, _, _ = entrada
+        if vence <= time.monotonic():
+            _quitar(id_usuario)
+            return None
+        _perfiles.move_to_end(id_usuario)
+        return dict(perfil)
+
+
+def guardar_perfil(id_usuario: int, perfil: dict, dni: int = None, id_empresa: int = None):
+    with _lock:
+        _quitar(id_usuario)
+        _perfiles[id_usuario] = (dict(perfil), time.monotonic() + PERFIL_CACHE_TTL, dni, id_empresa)
+        if dni is not None:
+            _por_dni[dni] = id_usuario
+        if id_empresa is not None:
+            _por_empresa[id_empresa] = id_usuario
+        while len(_perfiles) > PERFIL_CACHE_TAMANIO:
+            _quitar(next(iter(_perfiles)))
+
+
+def _quitar(id_usuario):
+    """Saca el perfil y sus entradas en los índices inversos (con _lock tomado)"""
+    entrada = _perfiles.pop(id_usuario, None)
+    if entrada is None:
+        return
+    _, _, dni, id_empresa = entrada
+    if dni is not None and _por_dni.get(dni) == id_usuario:
+        del _por_dni[dni]
+    if id_empresa is not None and _por_empresa.get(id_empresa) == id_usuario:
+        del _por_empresa[id_empresa]
+
+
+def invalidar_perfil_persona(dni: int):
+    """Descarta el perfil del usuario de esa persona (tras modificarla)"""
+    with _lock:
+        id_usuario = _por_dni.pop(dni, None)
+        if id_usuario is not None:
+            _quitar(id_usuario)
+
+
+def invalidar_perfil_empresa(id_empresa: int):
+    """Descarta el perfil del usuario de esa empresa (tras modificarla)"""
+    with _lock:
+        id_usuario = _por_empresa.pop(id_empresa, None)
+        if id_usuario is not None:
+            _quitar(id_usuario)
@@ -1,12 +1,17 @@
 from fastapi import APIRouter, HTTPException, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from app.database import get_db
-from sqlalchemy import func 
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from sqlalchemy import select
 from .models import Usuario, UsuarioLogin, PersonaRegistro, EmpresaRegistro, Token, UsuarioResponse
 from app.personas.models import Persona
 from app.empresas.models import Empresa
-from .security import get_password_hash, verify_password, create_access_token, get_current_user
+from .security import (
+    get_password_hash_async, verify_password_async, create_access_token, get_current_user,
+    PoolHashSaturado, estadisticas_cache_tokens
+)
+from . import bitacora_login
+from .perfiles import consulta_usuario_con_perfil, construir_perfil, perfil_en_cache, guardar_perfil
 
 
 router = APIRouter(tags=["autenticación"])
@@ -14,6 +19,15 @@ router = APIRouter(tags=["autenticación"])
 security = HTTPBearer()
 
 
+def _servidor_ocupado():
+    """Respuesta cuando el pool de hashing tiene la cola llena"""
+    return HTTPException(
+        status_code=503,
+        detail="Servidor ocupado, intente nuevamente en unos segundos",
+        headers={"Retry-After": "1"}
+    )
+
+
 async def get_current_active_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """
     Dependencia para extraer el usuario actual validando el token Bearer.
@@ -26,7 +40,7 @@ async def get_current_active_user(credentials: HTTPAuthorizationCredentials = De
 
 
 @router.post("/registro/persona", response_model=dict)
-async def registro_persona(persona_data: PersonaRegistro, db: Session = Depends(get_db)):
+async def registro_persona(persona_data: PersonaRegistro, db: AsyncSession = Depends(get_async_db)):
     """
     Endpoint para registrar una nueva persona.
 
@@ -41,15 +55,15 @@ async def registro_persona(persona_data: PersonaRegistro, db: Session = Depends(
     Lanza HTTP 400 si email o DNI ya existen, y HTTP 500 para errores internos.
     """
     try:
-        usuario_existente = db.query(Usuario).filter(Usuario.email == persona_data.email).first()
+        usuario_existente = (await db.execute(select(Usuario).where(Usuario.email == persona_data.email))).scalars().first()
         if usuario_existente:
             raise HTTPException(status_code=400, detail="Email ya registrado")
         
-        persona_existente = db.query(Persona).filter(Persona.dni == persona_data.dni).first()
+        persona_existente = await db.get(Persona, persona_data.dni)
         if persona_existente:
             raise HTTPException(status_code=400, detail="DNI ya registrado")
         
-        password_hash = get_password_hash(persona_data.password)
+        password_hash = await get_password_hash_async(persona_data.password)
         
         nueva_persona = Persona(
             dni=persona_data.dni,
@@ -64,7 +78,7 @@ async def registro_persona(persona_data: PersonaRegistro, db: Session = Depends(
             telefono=persona_data.telefono
         )
         db.add(nueva_persona)
-        db.flush()  # Obtener DNI para usuario sin commit
+        await db.flush()  # Obtener DNI para usuario sin commit
         
         nuevo_usuario = Usuario(
             dni=nueva_persona.dni,
@@ -75,16 +89,22 @@ async def registro_persona(persona_data: PersonaRegistro, db: Session = Depends(
         )
         db.add(nuevo_usuario)
         
-        db.commit()
+        await db.commit()
         return {"mensaje": "Persona registrada exitosamente", "dni": nueva_persona.dni}
         
+    except PoolHashSaturado:
+        await db.rollback()
+        raise _servidor_ocupado()
+    except HTTPException:
+        await db.rollback()
+        raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error en registro: {str(e)}")
 
 
 @router.post("/registro/empresa", response_model=dict)
-async def registro_empresa(empresa_data: EmpresaRegistro, db: Session = Depends(get_db)):
+async def registro_empresa(empresa_data: EmpresaRegistro, db: AsyncSession = Depends(get_async_db)):
     """
     Endpoint para registrar una nueva empresa.
 
@@ -98,11 +118,11 @@ async def registro_empresa(empresa_data: EmpresaRegistro, db: Session = Depends(
     Maneja errores con HTTP 400 y 500.
     """
     try:
-        usuario_existente = db.query(Usuario).filter(Usuario.email == empresa_data.email).first()
+        usuario_existente = (await db.execute(select(Usuario).where(Usuario.email == empresa_data.email))).scalars().first()
         if usuario_existente:
             raise HTTPException(status_code=400, detail="Email ya registrado")
         
-        password_hash = get_password_hash(empresa_data.password)
+        password_hash = await get_password_hash_async(empresa_data.password)
         
         nueva_empresa = Empresa(
             nombre=empresa_data.nombre,
@@ -113,7 +133,7 @@ async def registro_empresa(empresa_data: EmpresaRegistro, db: Session = Depends(
             telefono=empresa_data.telefono
         )
         db.add(nueva_empresa)
-        db.flush()  # Obtener id_empresa sin commit
+        await db.flush()  # Obtener id_empresa sin commit
         
         nuevo_usuario = Usuario(
             id_empresa=nueva_empresa.id_empresa,
@@ -124,96 +144,59 @@ async def registro_empresa(empresa_data: EmpresaRegistro, db: Session = Depends(
         )
         db.add(nuevo_usuario)
         
-        db.commit()
+        await db.commit()
         return {"mensaje": "Empresa registrada exitosamente", "id_empresa": nueva_empresa.id_empresa}
         
+    except PoolHashSaturado:
+        await db.rollback()
+        raise _servidor_ocupado()
+    except HTTPException:
+        await db.rollback()
+        raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error en registro: {str(e)}")
 
 
 @router.post("/login", response_model=Token)
-async def login(usuario_data: UsuarioLogin, db: Session = Depends(get_db)):
+async def login(usuario_data: UsuarioLogin, db: AsyncSession = Depends(get_async_db)):
     """
     Endpoint para autenticar un usuario y emitir token JWT.
 
     Pasos:
-    - Busca usuario activo por email.
+    - Busca usuario activo por email junto con su persona o empresa (una consulta).
     - Verifica contraseña (incrementa intento_login si falla).
-    - Actualiza último login y reinicia intentos_login.
-    - Obtiene información completa según rol (PERSONA o EMPRESA).
+    - Actualiza último login y reinicia intentos_login (escritura diferida, ver bitacora_login).
+    - Arma la información completa según rol (PERSONA o EMPRESA) y la guarda en caché.
     - Genera y retorna token JWT con datos usuario.
 
     HTTP 401 si credenciales inválidas, HTTP 500 en errores internos.
     """
     try:
-        usuario = db.query(Usuario).filter(
+        # Usuario, persona y empresa en una sola consulta (LEFT JOIN)
+        fila = (await db.execute(consulta_usuario_con_perfil().where(
             Usuario.email == usuario_data.email,
             Usuario.activo == True
-        ).first()
+        ))).first()
         
-        if not usuario:
+        if not fila:
             raise HTTPException(status_code=401, detail="Credenciales inválidas")
+        usuario, persona, empresa = fila
         
-        if not verify_password(usuario_data.password, usuario.password_hash):
-            usuario.intentos_login += 1
-            db.commit()
+        try:
+            password_valida = await verify_password_async(usuario_data.password, usuario.password_hash)
+        except PoolHashSaturado:
+            raise _servidor_ocupado()
+
+        # ultimo_login / intentos_login se escriben en lote, fuera del pedido
+        if not password_valida:
+            bitacora_login.registrar_login_fallido(usuario.id_usuario)
             raise HTTPException(status_code=401, detail="Credenciales inválidas")
         
-        usuario.ultimo_login = func.now()
-        usuario.intentos_login = 0
-        db.commit()
-        
-        usuario_info = {}
+        bitacora_login.registrar_login_exitoso(usuario.id_usuario)
         
-        if usuario.rol == "PERSONA" and usuario.dni:
-            persona = db.query(Persona).filter(Persona.dni == usuario.dni).first()
-            if persona:
-                usuario_info = {
-                    "id_usuario": usuario.id_usuario,
-                    "email": usuario.email,
-                    "rol": usuario.rol,
-                    "dni": usuario.dni,
-                    "id_empresa": usuario.id_empresa,
-                    "nombre": persona.nombre,
-                    "apellido": persona.apellido,
-                    "fecha_nacimiento": persona.fecha_nacimiento.isoformat() if persona.fecha_nacimiento else None,
-                    "direccion": persona.direccion,
-                    "ciudad": persona.ciudad,
-                    "provincia": persona.provincia,
-                    "sexo": persona.sexo,
-                    "telefono": persona.telefono,
-                    "fecha_registro": usuario.fecha_registro.isoformat() if usuario.fecha_registro else None,
-                    "activo": usuario.activo
-                }
-        
-        elif usuario.rol == "EMPRESA" and usuario.id_empresa:
-            empresa = db.query(Empresa).filter(Empresa.id_empresa == usuario.id_empresa).first()
-            if empresa:
-                usuario_info = {
-                    "id_usuario": usuario.id_usuario,
-                    "email": usuario.email,
-                    "rol": usuario.rol,
-                    "dni": usuario.dni,
-                    "id_empresa": usuario.id_empresa,
-                    "nombre_empresa": empresa.nombre,
-                    "direccion": empresa.direccion,
-                    "ciudad": empresa.ciudad,
-                    "provincia": empresa.provincia,
-                    "telefono": empresa.telefono,
-                    "fecha_registro": usuario.fecha_registro.isoformat() if usuario.fecha_registro else None,
-                    "activo": usuario.activo
-                }
-        else:
-            usuario_info = {
-                "id_usuario": usuario.id_usuario,
-                "email": usuario.email,
-                "rol": usuario.rol,
-                "dni": usuario.dni,
-                "id_empresa": usuario.id_empresa,
-                "fecha_registro": usuario.fecha_registro.isoformat() if usuario.fecha_registro else None,
-                "activo": usuario.activo
-            }
+        usuario_info = construir_perfil(usuario, persona, empresa)
+        guardar_perfil(usuario.id_usuario, usuario_info, usuario.dni, usuario.id_empresa)
         
         token_data = {
             "id_usuario": usuario.id_usuario,
@@ -257,64 +240,47 @@ async def logout(usuario_actual: dict = Depends(get_current_active_user)):
     return {"mensaje": "Sesión cerrada exitosamente"}
 
 
+@router.get("/tokens/cache")
+async def estadisticas_tokens(usuario_actual: dict = Depends(get_current_active_user)):
+    """Aciertos y fallos de la caché de tokens verificados"""
+    return estadisticas_cache_tokens()
+
+
+@router.get("/login/bitacora")
+async def estadisticas_bitacora_login(usuario_actual: dict = Depends(get_current_active_user)):
+    """Estado del buffer de escritura diferida de datos de login"""
+    return bitacora_login.estadisticas()
+
+
 @router.get("/usuario/completo")
-async def get_usuario_completo(usuario_actual: dict = Depends(get_current_active_user), db: Session = Depends(get_db)):
+async def get_usuario_completo(usuario_actual: dict = Depends(get_current_active_user), db: AsyncSession = Depends(get_async_db)):
     """
     Endpoint para obtener información completa del usuario autenticado,
     diferenciando entre persona o empresa con sus datos completos.
+    Se responde desde la caché de perfiles si hay una entrada vigente.
 
     Si no se encuentra usuario, lanza 404.
     En caso de error interno, devuelve 500.
     """
     try:
         usuario_id = usuario_actual.get("id_usuario")
-        usuario = db.query(Usuario).filter(Usuario.id_usuario == usuario_id).first()
-        
-        if not usuario:
-            raise HTTPException(status_code=404, detail="Usuario no encontrado")
+        usuario_info = perfil_en_cache(usuario_id)
+        if usuario_info is not None:
+            return usuario_info
         
-        usuario_info = {}
+        fila = (await db.execute(
+            consulta_usuario_con_perfil().where(Usuario.id_usuario == usuario_id)
+        )).first()
         
-        if usuario.rol == "PERSONA" and usuario.dni:
-            persona = db.query(Persona).filter(Persona.dni == usuario.dni).first()
-            if persona:
-                usuario_info = {
-                    "id_usuario": usuario.id_usuario,
-                    "email": usuario.email,
-                    "rol": usuario.rol,
-                    "dni": usuario.dni,
-                    "id_empresa": usuario.id_empresa,
-                    "nombre": persona.nombre,
-                    "apellido": persona.apellido,
-                    "fecha_nacimiento": persona.fecha_nacimiento.isoformat() if persona.fecha_nacimiento else None,
-                    "direccion": persona.direccion,
-                    "ciudad": persona.ciudad,
-                    "provincia": persona.provincia,
-                    "sexo": persona.sexo,
-                    "telefono": persona.telefono,
-                    "fecha_registro": usuario.fecha_registro.isoformat() if usuario.fecha_registro else None,
-                    "activo": usuario.activo
-                }
-        
-        elif usuario.rol == "EMPRESA" and usuario.id_empresa:
-            empresa = db.query(Empresa).filter(Empresa.id_empresa == usuario.id_empresa).first()
-            if empresa:
-                usuario_info = {
-                    "id_usuario": usuario.id_usuario,
-                    "email": usuario.email,
-                    "rol": usuario.rol,
-                    "dni": usuario.dni,
-                    "id_empresa": usuario.id_empresa,
-                    "nombre_empresa": empresa.nombre,
-                    "direccion": empresa.direccion,
-                    "ciudad": empresa.ciudad,
-                    "provincia": empresa.provincia,
-                    "telefono": empresa.telefono,
-                    "fecha_registro": usuario.fecha_registro.isoformat() if usuario.fecha_registro else None,
-                    "activo": usuario.activo
-                }
+        if not fila:
+            raise HTTPException(status_code=404, detail="Usuario no encontrado")
+        usuario, persona, empresa = fila
         
+        usuario_info = construir_perfil(usuario, persona, empresa)
+        guardar_perfil(usuario.id_usuario, usuario_info, usuario.dni, usuario.id_empresa)
         return usuario_info
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener usuario: {str(e)}")
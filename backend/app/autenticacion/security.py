@@ -2,6 +2,13 @@ import bcrypt
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 import os
+import time
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from typing import Optional
 
 
@@ -10,6 +17,15 @@ SECRET_KEY = os.getenv("SECRET_KEY", "tu-clave-secreta-universidad")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 horas
 
+# Pool de procesos para bcrypt: el hashing es CPU puro (~100 ms por llamada)
+# y no debe correr en el event loop. Tamaño acotado y cola con límite: si se
+# supera, se rechaza el pedido en vez de acumular latencia sin fin.
+BCRYPT_PROCESOS = int(os.getenv("BCRYPT_PROCESOS", str(os.cpu_count() or 2)))
+BCRYPT_COLA_MAXIMA = int(os.getenv("BCRYPT_COLA_MAXIMA", "64"))
+
+# Caché de tokens ya verificados (LRU): cantidad máxima de tokens recordados
+JWT_CACHE_TAMANIO = int(os.getenv("JWT_CACHE_TAMANIO", "10000"))
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
@@ -58,6 +74,63 @@ def get_password_hash(password: str) -> str:
         raise e
 
 
+# -------------------------
+# HASHING EN POOL DE PROCESOS
+# -------------------------
+class PoolHashSaturado(Exception):
+    """Hay más pedidos de hashing en curso y en espera que BCRYPT_COLA_MAXIMA"""
+
+
+_pool_hash = None
+_pool_lock = threading.Lock()
+_pendientes_hash = 0
+
+
+def iniciar_pool_hash():
+    """Crea el pool de procesos (idempotente); conviene llamarlo al arrancar"""
+    global _pool_hash
+    with _pool_lock:
+        if _pool_hash is None:
+            # spawn: los procesos no heredan hilos ni el event loop del servidor
+            _pool_hash = ProcessPoolExecutor(
+                max_workers=BCRYPT_PROCESOS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+    return _pool_hash
+
+
+def cerrar_pool_hash():
+    global _pool_hash
+    with _pool_lock:
+        if _pool_hash is not None:
+            _pool_hash.shutdown(wait=True, cancel_futures=True)
+            _pool_hash = None
+
+
+async def _en_pool_hash(funcion, *args):
+    global _pendientes_hash
+    with _pool_lock:
+        if _pendientes_hash >= BCRYPT_PROCESOS + BCRYPT_COLA_MAXIMA:
+            raise PoolHashSaturado()
+        _pendientes_hash += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(iniciar_pool_hash(), funcion, *args)
+    finally:
+        with _pool_lock:
+            _pendientes_hash -= 1
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password en el pool de procesos. Lanza PoolHashSaturado si la cola está llena."""
+    return await _en_pool_hash(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash en el pool de procesos. Lanza PoolHashSaturado si la cola está llena."""
+    return await _en_pool_hash(get_password_hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """
     Crea un token JWT firmado que incluye información del usuario y expiración.
@@ -81,9 +154,55 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
+# -------------------------
+# CACHÉ DE TOKENS VERIFICADOS
+# -------------------------
+# sha256(token) -> (payload, exp). Solo se guardan tokens válidos; una entrada
+# vencida se descarta al consultarla y el token se vuelve a verificar (y falla)
+_cache_tokens = OrderedDict()
+_cache_lock = threading.Lock()
+_cache_contadores = {"aciertos": 0, "fallos": 0}
+
+
+def _cache_obtener(clave):
+    with _cache_lock:
+        entrada = _cache_tokens.get(clave)
+        if entrada is not None:
+            payload, exp = entrada
+            if exp > time.time():
+                _cache_tokens.move_to_end(clave)
+                _cache_contadores["aciertos"] += 1
+                return dict(payload)
+            del _cache_tokens[clave]
+        _cache_contadores["fallos"] += 1
+        return None
+
+
+def _cache_guardar(clave, payload):
+    exp = payload.get("exp")
+    with _cache_lock:
+        _cache_tokens[clave] = (dict(payload), float(exp) if exp is not None else float("inf"))
+        _cache_tokens.move_to_end(clave)
+        while len(_cache_tokens) > JWT_CACHE_TAMANIO:
+            _cache_tokens.popitem(last=False)
+
+
+def estadisticas_cache_tokens():
+    with _cache_lock:
+        total = _cache_contadores["aciertos"] + _cache_contadores["fallos"]
+        return {
+            **_cache_contadores,
+            "tasa_aciertos": round(_cache_contadores["aciertos"] / total, 4) if total else 0,
+            "tokens": len(_cache_tokens),
+            "tamanio_maximo": JWT_CACHE_TAMANIO,
+        }
+
+
 def verify_token(token: str):
     """
     Verifica y decodifica un token JWT, validando firma y expiración.
+    Un token ya verificado y no vencido se responde desde la caché sin
+    volver a validar la firma.
 
     Argumentos:
         token (str): Token JWT a verificar.
@@ -91,11 +210,17 @@ def verify_token(token: str):
     Retorna:
         dict o None: Payload decodificado si token válido, None si inválido.
     """
+    clave = hashlib.sha256(token.encode("utf-8")).digest()
+    payload = _cache_obtener(clave)
+    if payload is not None:
+        return payload
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except JWTError:
         return None
+    _cache_guardar(clave, payload)
+    return payload
 
 
 def get_current_user(token: str):
@@ -1,7 +1,11 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
+import time
+import threading
+from app.metricas_pool import QueuePoolMedido, AsyncQueuePoolMedido, estado_pool
 
 #Variables de entorno para configuración de la base de datos
 DB_USER = os.getenv("DB_USER", "postgres")  # Usuario de la base de datos
@@ -13,12 +17,62 @@ DB_PORT = os.getenv("DB_PORT", "5432")  # Puerto de conexión
 #URL de conexión completa para SQLAlchemy
 DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
+#URL equivalente para el motor asíncrono (driver asyncpg)
+ASYNC_DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+
+#Réplica de solo lectura (opcional): si DB_READ_HOST está vacío, las lecturas van al primario
+DB_READ_HOST = os.getenv("DB_READ_HOST", "")  # Host de la réplica
+DB_READ_PORT = os.getenv("DB_READ_PORT", DB_PORT)  # Puerto de la réplica
+DB_READ_MAX_LAG = float(os.getenv("DB_READ_MAX_LAG", "5"))  # Segundos de atraso tolerados antes de volver al primario
+DB_READ_LAG_INTERVALO = float(os.getenv("DB_READ_LAG_INTERVALO", "5"))  # Cada cuántos segundos se mide el atraso
+
+READ_DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASS}@{DB_READ_HOST}:{DB_READ_PORT}/{DB_NAME}" if DB_READ_HOST else None
+ASYNC_READ_DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{DB_READ_HOST}:{DB_READ_PORT}/{DB_NAME}" if DB_READ_HOST else None
+
+#Pool de conexiones: DB_MAX_CONEXIONES es el máximo de conexiones abiertas
+#por proceso, sumando todos los motores (primario sync y async y, si hay
+#réplica, réplica sync y async). Se reparte en partes iguales entre los
+#motores que existen; en cada uno, la mitad queda abierta (pool_size) y el
+#resto se abre solo en picos (max_overflow). Con N workers, el servidor
+#necesita N * DB_MAX_CONEXIONES conexiones (por defecto 40 por worker:
+#20 por motor sin réplica, 10 por motor con réplica).
+DB_MAX_CONEXIONES = int(os.getenv("DB_MAX_CONEXIONES", "40"))  # Total por proceso
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # Segundos de espera por una conexión
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # Reabrir conexiones más viejas (-1: nunca)
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "si", "yes")  # Descartar conexiones caídas
+
+MOTORES = 4 if DB_READ_HOST else 2
+CONEXIONES_POR_MOTOR = max(2, DB_MAX_CONEXIONES // MOTORES)
+
+OPCIONES_POOL = dict(
+    pool_size=CONEXIONES_POR_MOTOR // 2,
+    max_overflow=CONEXIONES_POR_MOTOR - CONEXIONES_POR_MOTOR // 2,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+)
+
 #Motor de base de datos para manejar la conexión y operaciones
-engine = create_engine(DATABASE_URL)
+engine = create_engine(DATABASE_URL, poolclass=QueuePoolMedido, **OPCIONES_POOL)
+
+#Motor asíncrono para rutas async def: la espera a la base no bloquea el event loop
+async_engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=AsyncQueuePoolMedido, **OPCIONES_POOL)
+
+#Motores de la réplica (None si no hay réplica configurada)
+read_engine = create_engine(READ_DATABASE_URL, poolclass=QueuePoolMedido, **OPCIONES_POOL) if READ_DATABASE_URL else None
+async_read_engine = create_async_engine(ASYNC_READ_DATABASE_URL, poolclass=AsyncQueuePoolMedido, **OPCIONES_POOL) if ASYNC_READ_DATABASE_URL else None
 
 #Creador de sesiones para gestionar las transacciones con la base de datos
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+#Sesiones asíncronas: sin expirar al confirmar, porque en async no se puede
+#recargar un atributo de forma implícita al leerlo
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+#Sesiones sobre la réplica (mismas opciones que las del primario)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine) if read_engine else None
+AsyncReadSessionLocal = async_sessionmaker(bind=async_read_engine, autoflush=False, expire_on_commit=False) if async_read_engine else None
+
 #Clase base para la declaración de los modelos ORM
 Base = declarative_base()  # Esta línea crea la clase base para los modelos
 
@@ -31,4 +85,133 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db():
+    """
+    Versión asíncrona de get_db para rutas async def: entrega una AsyncSession
+    y la cierra al terminar el pedido.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# -------------------------
+# RÉPLICA DE LECTURA
+# -------------------------
+# Atraso de la réplica en segundos: 0 si ya aplicó todo lo recibido y
+# sigue recibiendo del primario (una réplica sin escrituras nuevas no está
+# atrasada aunque el último replay sea viejo) y 0 también si el servidor no
+# es una réplica. Si el WAL receiver no está en 'streaming' (desconectado,
+# reconectando) "aplicó todo lo recibido" no dice nada: se usa el tiempo
+# desde el último replay (o desde el arranque si todavía no aplicó ninguna
+# transacción), que crece hasta superar DB_READ_MAX_LAG.
+# El status de pg_stat_wal_receiver solo es visible con pg_read_all_stats
+# (o pg_monitor); sin ese permiso se toma siempre el tiempo desde el replay.
+CONSULTA_LAG = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn()
+             AND EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming') THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - COALESCE(pg_last_xact_replay_timestamp(), pg_postmaster_start_time()))
+    END
+""")
+
+_estado_replica = {"disponible": False, "lag_segundos": None, "revisado": 0.0, "error": None}
+_lock_replica = threading.Lock()
+
+
+def _registrar_lag(lag, error=None):
+    _estado_replica.update(
+        disponible=error is None and lag <= DB_READ_MAX_LAG,
+        lag_segundos=None if lag is None else round(float(lag), 3),
+        revisado=time.monotonic(),
+        error=error,
+    )
+    if error is not None:
+        print(f"⚠️ Réplica de lectura no disponible, se usa el primario: {error}")
+    elif lag > DB_READ_MAX_LAG:
+        print(f"⚠️ Réplica atrasada {lag:.1f}s (máximo {DB_READ_MAX_LAG}s), se usa el primario")
+
+
+def _hay_que_revisar():
+    return time.monotonic() - _estado_replica["revisado"] >= DB_READ_LAG_INTERVALO
+
+
+def _usar_replica() -> bool:
+    """Mide el atraso (como mucho cada DB_READ_LAG_INTERVALO) y dice si se puede leer de la réplica"""
+    if read_engine is None:
+        return False
+    # Un solo pedido mide; los demás usan el último resultado
+    if _hay_que_revisar() and _lock_replica.acquire(blocking=False):
+        try:
+            if _hay_que_revisar():
+                try:
+                    with read_engine.connect() as conexion:
+                        _registrar_lag(conexion.execute(CONSULTA_LAG).scalar())
+                except Exception as e:
+                    _registrar_lag(None, error=str(e))
+        finally:
+            _lock_replica.release()
+    return _estado_replica["disponible"]
+
+
+async def _usar_replica_async() -> bool:
+    if async_read_engine is None:
+        return False
+    if _hay_que_revisar() and _lock_replica.acquire(blocking=False):
+        try:
+            if _hay_que_revisar():
+                try:
+                    async with async_read_engine.connect() as conexion:
+                        _registrar_lag((await conexion.execute(CONSULTA_LAG)).scalar())
+                except Exception as e:
+                    _registrar_lag(None, error=str(e))
+        finally:
+            _lock_replica.release()
+    return _estado_replica["disponible"]
+
+
+def get_read_db():
+    """
+    Como get_db, para rutas de solo lectura: usa la réplica si está
+    configurada y su atraso no supera DB_READ_MAX_LAG; si no, el primario.
+    """
+    fabrica = ReadSessionLocal if _usar_replica() else SessionLocal
+    db = fabrica()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db():
+    """Versión asíncrona de get_read_db"""
+    fabrica = AsyncReadSessionLocal if await _usar_replica_async() else AsyncSessionLocal
+    async with fabrica() as db:
+        yield db
+
+
+def estado_replica():
+    return {
+        "configurada": read_engine is not None,
+        "disponible": _estado_replica["disponible"],
+        "lag_segundos": _estado_replica["lag_segundos"],
+        "lag_maximo_segundos": DB_READ_MAX_LAG,
+        "error": _estado_replica["error"],
+    }
+
+
+def estadisticas_pool():
+    """Conexiones en uso, overflow y tiempos de checkout de todos los motores"""
+    datos = {
+        "sync": estado_pool(engine.pool),
+        "async": estado_pool(async_engine.pool),
+    }
+    if read_engine is not None:
+        datos["replica_sync"] = estado_pool(read_engine.pool)
+        datos["replica_async"] = estado_pool(async_read_engine.pool)
+    datos["replica"] = estado_replica()
+    datos["maximo_conexiones"] = MOTORES * CONEXIONES_POR_MOTOR
+    return datos
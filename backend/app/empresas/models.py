@@ -1,7 +1,7 @@
 from sqlalchemy import Column, Integer, String, Boolean, DateTime
 from sqlalchemy.sql import func
 from app.database import Base
-from pydantic import BaseModel, validator, field_serializer
+from pydantic import BaseModel, validator, field_validator, field_serializer
 from typing import Optional
 from datetime import date, datetime
 
@@ -106,6 +106,14 @@ class EmpresaResponse(BaseModel):
     activa: bool
     
     
+    # La columna es DateTime: se convierte a texto antes de validar
+    @field_validator('fecha_registro', mode='before')
+    @classmethod
+    def fecha_registro_a_texto(cls, value):
+        if isinstance(value, (date, datetime)):
+            return value.isoformat()
+        return value
+
     @field_serializer('fecha_registro')
     def serialize_fecha_nacimiento(self, value: any, _info) -> str:
         if isinstance(value, (date, datetime)):
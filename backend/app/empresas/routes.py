@@ -1,7 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from .models import Empresa, EmpresaCreate, EmpresaUpdate, EmpresaResponse
-from app.database import get_db
+from app.database import get_db, get_read_db
+from app.autenticacion.perfiles import invalidar_perfil_empresa
+from app.paginacion import Pagina, CURSOR, LIMITE, paginar, pagina
+from typing import Optional
 
 router = APIRouter(prefix="/empresas", tags=["Empresas"])
 
@@ -61,18 +64,23 @@ def obtener_empresa(id_empresa: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Empresa no encontrada")
     return empresa
 
-@router.get("/empresas/", response_model=list[EmpresaResponse])
-def listar_empresas(db: Session = Depends(get_db)):
+@router.get("/empresas/", response_model=Pagina[EmpresaResponse])
+def listar_empresas(cursor: Optional[str] = CURSOR, limit: int = LIMITE, db: Session = Depends(get_read_db)):
     """
-    Devuelve una lista con todas las empresas almacenadas en la base de datos.
+    Devuelve las empresas almacenadas en la base de datos, paginadas por
+    cursor en orden de id_empresa.
 
     Parámetros:
+    - cursor (str): `siguiente` de la página anterior (vacío para la primera).
+    - limit (int): Máximo de empresas por página.
     - db (Session): Sesión de base de datos inyectada automáticamente vía Depends.
 
     Respuesta:
-    - 200: Lista con todas las empresas (puede estar vacía).
+    - 200: {"resultados": [empresas], "siguiente": cursor | null, "limit": n}
+    - 400: Cursor inválido.
     """
-    return db.query(Empresa).all()
+    empresas = paginar(db.query(Empresa), [Empresa.id_empresa], cursor, limit).all()
+    return pagina(empresas, [Empresa.id_empresa], limit)
 
 @router.put("/empresas/{id_empresa}", response_model=EmpresaResponse)
 def actualizar_empresa(id_empresa: int, empresa_actualizada: EmpresaUpdate, db: Session = Depends(get_db)):
@@ -106,5 +114,6 @@ def actualizar_empresa(id_empresa: int, empresa_actualizada: EmpresaUpdate, db:
     
     db.commit()
     db.refresh(empresa_existente)
+    invalidar_perfil_empresa(id_empresa)  # el perfil en caché de /usuario/completo quedó viejo
     
     return empresa_existente
\ No newline at end of file
@@ -173,4 +173,203 @@ CREATE INDEX idx_postulaciones_estado ON postulaciones(estado);
 CREATE INDEX idx_postulaciones_fecha ON postulaciones(creado_en);
 CREATE INDEX idx_relaciones_base ON relaciones_aprendidas(habilidad_base);
 CREATE INDEX idx_relaciones_confianza ON relaciones_aprendidas(confianza) WHERE activo = true;
-CREATE INDEX idx_relaciones_activas ON relaciones_aprendidas(activo) WHERE activo = true;
\ No newline at end of file
+CREATE INDEX idx_relaciones_activas ON relaciones_aprendidas(activo) WHERE activo = true;
+
+-- =============================================
+-- BÚSQUEDA DE TEXTO COMPLETO (buscar_semantica)
+-- Mismo DDL que app/matching/busqueda.py, que lo vuelve a aplicar al arrancar
+-- =============================================
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+-- unaccent() no es IMMUTABLE: este envoltorio fija el diccionario para poder indexar
+CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text AS $$
+    SELECT public.unaccent('public.unaccent', $1)
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT;
+
+-- Documento de la oferta: título (peso A) y descripción (peso B), en español y sin acentos
+ALTER TABLE oferta_empleo ADD COLUMN IF NOT EXISTS documento tsvector;
+
+CREATE OR REPLACE FUNCTION oferta_empleo_documento() RETURNS trigger AS $$
+BEGIN
+    NEW.documento :=
+        setweight(to_tsvector('spanish', f_unaccent(coalesce(NEW.titulo, ''))), 'A') ||
+        setweight(to_tsvector('spanish', f_unaccent(coalesce(NEW.descripcion, ''))), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_oferta_empleo_documento ON oferta_empleo;
+CREATE TRIGGER trg_oferta_empleo_documento
+    BEFORE INSERT OR UPDATE OF titulo, descripcion ON oferta_empleo
+    FOR EACH ROW EXECUTE FUNCTION oferta_empleo_documento();
+
+CREATE INDEX IF NOT EXISTS idx_oferta_empleo_documento ON oferta_empleo USING GIN (documento);
+
+
+-- Búsqueda de personas (buscar_semantica_personas): trigramas sobre un documento
+-- con nombre, apellido, ciudad, provincia y actividades ya armadas
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE persona ADD COLUMN IF NOT EXISTS habilidades TEXT;
+
+ALTER TABLE persona ADD COLUMN IF NOT EXISTS busqueda TEXT;
+
+CREATE OR REPLACE FUNCTION persona_busqueda() RETURNS trigger AS $$
+BEGIN
+    NEW.busqueda := f_unaccent(lower(concat_ws(' ',
+        NEW.nombre, NEW.apellido, NEW.ciudad, NEW.provincia, NEW.habilidades)));
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_persona_busqueda ON persona;
+
+CREATE TRIGGER trg_persona_busqueda
+    BEFORE INSERT OR UPDATE OF nombre, apellido, ciudad, provincia, habilidades ON persona
+    FOR EACH ROW EXECUTE FUNCTION persona_busqueda();
+
+-- persona.habilidades se recalcula al cambiar persona_actividad o el nombre de una actividad
+CREATE OR REPLACE FUNCTION persona_refrescar_habilidades(p_dni INTEGER) RETURNS void AS $$
+    UPDATE persona SET habilidades = (
+        SELECT string_agg(a.nombre, ', ' ORDER BY a.nombre)
+        FROM persona_actividad pa
+        JOIN actividad a ON a.id_actividad = pa.id_actividad
+        WHERE pa.dni = p_dni
+    )
+    WHERE dni = p_dni
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION persona_actividad_habilidades() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM persona_refrescar_habilidades(NEW.dni);
+    END IF;
+    IF TG_OP = 'DELETE' OR (TG_OP = 'UPDATE' AND OLD.dni IS DISTINCT FROM NEW.dni) THEN
+        PERFORM persona_refrescar_habilidades(OLD.dni);
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_persona_actividad_habilidades ON persona_actividad;
+
+CREATE TRIGGER trg_persona_actividad_habilidades
+    AFTER INSERT OR UPDATE OR DELETE ON persona_actividad
+    FOR EACH ROW EXECUTE FUNCTION persona_actividad_habilidades();
+
+CREATE OR REPLACE FUNCTION actividad_habilidades() RETURNS trigger AS $$
+BEGIN
+    PERFORM persona_refrescar_habilidades(pa.dni)
+    FROM persona_actividad pa WHERE pa.id_actividad = NEW.id_actividad;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_actividad_habilidades ON actividad;
+
+CREATE TRIGGER trg_actividad_habilidades
+    AFTER UPDATE OF nombre ON actividad
+    FOR EACH ROW EXECUTE FUNCTION actividad_habilidades();
+
+CREATE INDEX IF NOT EXISTS idx_persona_busqueda_trgm ON persona USING GIN (busqueda gin_trgm_ops);
+
+
+-- =============================================
+-- REGISTRO DE CAMBIOS DE HECHOS (generación incremental para Prolog)
+-- Mismo DDL que app/prolog/cambios_hechos.py, que lo vuelve a aplicar al arrancar
+-- =============================================
+CREATE TABLE IF NOT EXISTS cambios_hechos (
+    id          BIGSERIAL PRIMARY KEY,
+    txid        BIGINT NOT NULL DEFAULT txid_current(),
+    tabla       TEXT NOT NULL,
+    clave       JSONB NOT NULL,
+    registrado  TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_cambios_hechos_txid ON cambios_hechos(txid);
+CREATE INDEX IF NOT EXISTS idx_cambios_hechos_registrado ON cambios_hechos(registrado);
+
+-- Anota la clave (columnas pasadas como argumentos) de cada fila escrita
+CREATE OR REPLACE FUNCTION registrar_cambio_hecho() RETURNS trigger AS $$
+DECLARE
+    anterior JSONB;
+    nueva JSONB;
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        SELECT jsonb_agg(to_jsonb(OLD) -> c ORDER BY i) INTO anterior
+        FROM unnest(TG_ARGV) WITH ORDINALITY AS a(c, i);
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        SELECT jsonb_agg(to_jsonb(NEW) -> c ORDER BY i) INTO nueva
+        FROM unnest(TG_ARGV) WITH ORDINALITY AS a(c, i);
+    END IF;
+    INSERT INTO cambios_hechos (tabla, clave)
+    SELECT DISTINCT TG_TABLE_NAME, k FROM (VALUES (anterior), (nueva)) AS v(k)
+    WHERE k IS NOT NULL;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+-- TRUNCATE: clave null, la próxima generación es completa
+CREATE OR REPLACE FUNCTION registrar_vaciado_hecho() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO cambios_hechos (tabla, clave) VALUES (TG_TABLE_NAME, 'null');
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_cambios_hechos ON persona;
+CREATE TRIGGER trg_cambios_hechos AFTER INSERT OR UPDATE OR DELETE ON persona
+    FOR EACH ROW EXECUTE FUNCTION registrar_cambio_hecho('dni');
+DROP TRIGGER IF EXISTS trg_cambios_hechos ON persona_actividad;
+CREATE TRIGGER trg_cambios_hechos AFTER INSERT OR UPDATE OR DELETE ON persona_actividad
+    FOR EACH ROW EXECUTE FUNCTION registrar_cambio_hecho('dni', 'id_actividad');
+DROP TRIGGER IF EXISTS trg_cambios_hechos ON actividad;
+CREATE TRIGGER trg_cambios_hechos AFTER INSERT OR UPDATE OR DELETE ON actividad
+    FOR EACH ROW EXECUTE FUNCTION registrar_cambio_hecho('id_actividad');
+DROP TRIGGER IF EXISTS trg_cambios_hechos ON empresa;
+CREATE TRIGGER trg_cambios_hechos AFTER INSERT OR UPDATE OR DELETE ON empresa
+    FOR EACH ROW EXECUTE FUNCTION registrar_cambio_hecho('id_empresa');
+DROP TRIGGER IF EXISTS trg_cambios_hechos ON empresa_actividad;
+CREATE TRIGGER trg_cambios_hechos AFTER INSERT OR UPDATE OR DELETE ON empresa_actividad
+    FOR EACH ROW EXECUTE FUNCTION registrar_cambio_hecho('id_empresa', 'id_actividad');
+DROP TRIGGER IF EXISTS trg_cambios_hechos ON oferta_empleo;
+CREATE TRIGGER trg_cambios_hechos AFTER INSERT OR UPDATE OR DELETE ON oferta_empleo
+    FOR EACH ROW EXECUTE FUNCTION registrar_cambio_hecho('id_oferta');
+DROP TRIGGER IF EXISTS trg_cambios_hechos ON oferta_actividad;
+CREATE TRIGGER trg_cambios_hechos AFTER INSERT OR UPDATE OR DELETE ON oferta_actividad
+    FOR EACH ROW EXECUTE FUNCTION registrar_cambio_hecho('id_oferta', 'id_actividad');
+DROP TRIGGER IF EXISTS trg_cambios_hechos ON postulaciones;
+CREATE TRIGGER trg_cambios_hechos AFTER INSERT OR UPDATE OR DELETE ON postulaciones
+    FOR EACH ROW EXECUTE FUNCTION registrar_cambio_hecho('dni', 'id_oferta');
+DROP TRIGGER IF EXISTS trg_cambios_hechos ON relaciones_aprendidas;
+CREATE TRIGGER trg_cambios_hechos AFTER INSERT OR UPDATE OR DELETE ON relaciones_aprendidas
+    FOR EACH ROW EXECUTE FUNCTION registrar_cambio_hecho('id');
+
+DROP TRIGGER IF EXISTS trg_vaciado_hechos ON persona;
+CREATE TRIGGER trg_vaciado_hechos AFTER TRUNCATE ON persona
+    FOR EACH STATEMENT EXECUTE FUNCTION registrar_vaciado_hecho();
+DROP TRIGGER IF EXISTS trg_vaciado_hechos ON persona_actividad;
+CREATE TRIGGER trg_vaciado_hechos AFTER TRUNCATE ON persona_actividad
+    FOR EACH STATEMENT EXECUTE FUNCTION registrar_vaciado_hecho();
+DROP TRIGGER IF EXISTS trg_vaciado_hechos ON actividad;
+CREATE TRIGGER trg_vaciado_hechos AFTER TRUNCATE ON actividad
+    FOR EACH STATEMENT EXECUTE FUNCTION registrar_vaciado_hecho();
+DROP TRIGGER IF EXISTS trg_vaciado_hechos ON empresa;
+CREATE TRIGGER trg_vaciado_hechos AFTER TRUNCATE ON empresa
+    FOR EACH STATEMENT EXECUTE FUNCTION registrar_vaciado_hecho();
+DROP TRIGGER IF EXISTS trg_vaciado_hechos ON empresa_actividad;
+CREATE TRIGGER trg_vaciado_hechos AFTER TRUNCATE ON empresa_actividad
+    FOR EACH STATEMENT EXECUTE FUNCTION registrar_vaciado_hecho();
+DROP TRIGGER IF EXISTS trg_vaciado_hechos ON oferta_empleo;
+CREATE TRIGGER trg_vaciado_hechos AFTER TRUNCATE ON oferta_empleo
+    FOR EACH STATEMENT EXECUTE FUNCTION registrar_vaciado_hecho();
+DROP TRIGGER IF EXISTS trg_vaciado_hechos ON oferta_actividad;
+CREATE TRIGGER trg_vaciado_hechos AFTER TRUNCATE ON oferta_actividad
+    FOR EACH STATEMENT EXECUTE FUNCTION registrar_vaciado_hecho();
+DROP TRIGGER IF EXISTS trg_vaciado_hechos ON postulaciones;
+CREATE TRIGGER trg_vaciado_hechos AFTER TRUNCATE ON postulaciones
+    FOR EACH STATEMENT EXECUTE FUNCTION registrar_vaciado_hecho();
+DROP TRIGGER IF EXISTS trg_vaciado_hechos ON relaciones_aprendidas;
+CREATE TRIGGER trg_vaciado_hechos AFTER TRUNCATE ON relaciones_aprendidas
+    FOR EACH STATEMENT EXECUTE FUNCTION registrar_vaciado_hecho();
@@ -0,0 +1,259 @@
+"""
+Búsqueda de texto completo (PostgreSQL) para la búsqueda semántica.
+
+Ofertas: cada oferta guarda en `oferta_empleo.documento` un tsvector (configuración
+'spanish', sin acentos vía f_unaccent) con el título de peso A y la
+descripción de peso B. Un trigger lo mantiene al insertar o modificar y un
+índice GIN resuelve el `@@` sin recorrer la tabla.
+
+Personas: `persona.habilidades` es la lista de actividades de la persona ya
+armada (la mantienen triggers sobre persona_actividad y actividad) y
+`persona.busqueda` junta nombre, apellido, ciudad, provincia y habilidades en
+minúsculas y sin acentos. Un índice GIN de trigramas (pg_trgm) sobre
+`busqueda` resuelve los LIKE '%termino%' sin recorrer la tabla.
+
+El DDL es idempotente: se aplica en init_database.sql y de nuevo al arrancar
+el backend, para bases creadas antes de este cambio.
+"""
+import os
+from sqlalchemy import text
+
+
+# Dónde se busca por defecto: "postgres" (este módulo) o "memoria"
+# (índice BM25 de app/matching/indice_busqueda.py)
+MOTOR_BUSQUEDA = os.getenv("MOTOR_BUSQUEDA", "postgres")
+
+# Peso de las palabras escritas por el usuario y de las que agrega Prolog
+PESO_PALABRA = 1.0
+PESO_EXPANSION = 0.4
+
+# Clave del advisory lock que serializa el DDL entre workers que arrancan juntos
+_LOCK_DDL = 72519301
+
+DDL_BUSQUEDA = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    # unaccent() no es IMMUTABLE (depende del diccionario por defecto): este
+    # envoltorio fija el diccionario y se puede usar en índices y triggers
+    """
+    CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text AS $$
+        SELECT public.unaccent('public.unaccent', $1)
+    $$ LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    """,
+    "ALTER TABLE oferta_empleo ADD COLUMN IF NOT EXISTS documento tsvector",
+    """
+    CREATE OR REPLACE FUNCTION oferta_empleo_documento() RETURNS trigger AS $$
+    BEGIN
+        NEW.documento :=
+            setweight(to_tsvector('spanish', f_unaccent(coalesce(NEW.titulo, ''))), 'A') ||
+            setweight(to_tsvector('spanish', f_unaccent(coalesce(NEW.descripcion, ''))), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS trg_oferta_empleo_documento ON oferta_empleo",
+    """
+    CREATE TRIGGER trg_oferta_empleo_documento
+        BEFORE INSERT OR UPDATE OF titulo, descripcion ON oferta_empleo
+        FOR EACH ROW EXECUTE FUNCTION oferta_empleo_documento()
+    """,
+    # Filas previas al trigger (el UPDATE lo dispara y calcula el documento)
+    "UPDATE oferta_empleo SET titulo = titulo WHERE documento IS NULL",
+    "CREATE INDEX IF NOT EXISTS idx_oferta_empleo_documento ON oferta_empleo USING GIN (documento)",
+
+    # ---- Personas ----
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "ALTER TABLE persona ADD COLUMN IF NOT EXISTS habilidades TEXT",
+    "ALTER TABLE persona ADD COLUMN IF NOT EXISTS busqueda TEXT",
+    """
+    CREATE OR REPLACE FUNCTION persona_busqueda() RETURNS trigger AS $$
+    BEGIN
+        NEW.busqueda := f_unaccent(lower(concat_ws(' ',
+            NEW.nombre, NEW.apellido, NEW.ciudad, NEW.provincia, NEW.habilidades)));
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS trg_persona_busqueda ON persona",
+    """
+    CREATE TRIGGER trg_persona_busqueda
+        BEFORE INSERT OR UPDATE OF nombre, apellido, ciudad, provincia, habilidades ON persona
+        FOR EACH ROW EXECUTE FUNCTION persona_busqueda()
+    """,
+    # Recalcula persona.habilidades de una persona (dispara persona_busqueda)
+    """
+    CREATE OR REPLACE FUNCTION persona_refrescar_habilidades(p_dni INTEGER) RETURNS void AS $$
+        UPDATE persona SET habilidades = (
+            SELECT string_agg(a.nombre, ', ' ORDER BY a.nombre)
+            FROM persona_actividad pa
+            JOIN actividad a ON a.id_actividad = pa.id_actividad
+            WHERE pa.dni = p_dni
+        )
+        WHERE dni = p_dni
+    $$ LANGUAGE sql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION persona_actividad_habilidades() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            PERFORM persona_refrescar_habilidades(NEW.dni);
+        END IF;
+        IF TG_OP = 'DELETE' OR (TG_OP = 'UPDATE' AND OLD.dni IS DISTINCT FROM NEW.dni) THEN
+            PERFORM persona_refrescar_habilidades(OLD.dni);
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS trg_persona_actividad_habilidades ON persona_actividad",
+    """
+    CREATE TRIGGER trg_persona_actividad_habilidades
+        AFTER INSERT OR UPDATE OR DELETE ON persona_actividad
+        FOR EACH ROW EXECUTE FUNCTION persona_actividad_habilidades()
+    """,
+    # Renombrar una actividad cambia el documento de quienes la tienen
+    """
+    CREATE OR REPLACE FUNCTION actividad_habilidades() RETURNS trigger AS $$
+    BEGIN
+        PERFORM persona_refrescar_habilidades(pa.dni)
+        FROM persona_actividad pa WHERE pa.id_actividad = NEW.id_actividad;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS trg_actividad_habilidades ON actividad",
+    """
+    CREATE TRIGGER trg_actividad_habilidades
+        AFTER UPDATE OF nombre ON actividad
+        FOR EACH ROW EXECUTE FUNCTION actividad_habilidades()
+    """,
+    # Filas previas a los triggers
+    """
+    UPDATE persona per SET habilidades = h.habilidades
+    FROM (
+        SELECT pa.dni, string_agg(a.nombre, ', ' ORDER BY a.nombre) AS habilidades
+        FROM persona_actividad pa
+        JOIN actividad a ON a.id_actividad = pa.id_actividad
+        GROUP BY pa.dni
+    ) h
+    WHERE per.dni = h.dni AND per.busqueda IS NULL
+    """,
+    "UPDATE persona SET nombre = nombre WHERE busqueda IS NULL",
+    "CREATE INDEX IF NOT EXISTS idx_persona_busqueda_trgm ON persona USING GIN (busqueda gin_trgm_ops)",
+]
+
+
+def preparar_busqueda(engine):
+    """Aplica el DDL de búsqueda (idempotente). Devuelve False si falló."""
+    try:
+        with engine.begin() as conexion:
+            conexion.exec_driver_sql(f"SELECT pg_advisory_xact_lock({_LOCK_DDL})")
+            for sentencia in DDL_BUSQUEDA:
+                conexion.exec_driver_sql(sentencia)
+        print("✅ Índices de búsqueda de texto listos")
+        return True
+    except Exception as e:
+        print(f"❌ No se pudieron preparar los índices de búsqueda: {e}")
+        return False
+
+
+def terminos_ponderados(palabras, expandidas):
+    """
+    Une palabras originales y expansiones sin repetir, con su peso.
+    Las palabras del usuario pesan más que lo que agrega la expansión.
+    """
+    terminos = {}
+    for palabra in palabras:
+        terminos.setdefault(palabra.strip().lower(), PESO_PALABRA)
+    for palabra in expandidas or []:
+        terminos.setdefault(str(palabra).strip().lower(), PESO_EXPANSION)
+    terminos.pop("", None)
+    return list(terminos.items())
+
+
+def buscar_ofertas(db, terminos, skip: int = 0, limit: int = 100):
+    """
+    Ofertas que contienen alguno de los términos, de mayor a menor relevancia.
+    La relevancia suma ts_rank de cada término multiplicado por su peso.
+    """
+    if not terminos:
+        return []
+
+    params = {"skip": skip, "limit": limit}
+    consultas = []
+    for i, (termino, peso) in enumerate(terminos):
+        params[f"t{i}"] = termino
+        params[f"w{i}"] = peso
+        consultas.append(f"plainto_tsquery('spanish', f_unaccent(:t{i}))")
+
+    # Una sola tsquery con OR para el filtro (usa el índice GIN) y un
+    # ts_rank por término para el orden
+    filtro = " || ".join(consultas)
+    relevancia = " + ".join(
+        f"ts_rank(o.documento, {q}) * :w{i}" for i, q in enumerate(consultas)
+    )
+
+    sql = text(f"""
+        SELECT
+            o.id_oferta,
+            o.titulo,
+            o.descripcion,
+            COALESCE(e.ciudad, p.ciudad) AS ciudad,
+            COALESCE(e.provincia, p.provincia) AS provincia,
+            {relevancia} AS relevancia
+        FROM oferta_empleo o
+        LEFT JOIN empresa e ON o.id_empresa = e.id_empresa
+        LEFT JOIN persona p ON o.persona_dni = p.dni
+        WHERE o.documento @@ ({filtro})
+        ORDER BY relevancia DESC, o.id_oferta
+        LIMIT :limit OFFSET :skip
+    """)
+
+    return db.execute(sql, params).fetchall()
+
+
+def _patron_like(termino: str) -> str:
+    """'%termino%' con los comodines de LIKE escapados"""
+    termino = termino.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{termino}%"
+
+
+def buscar_personas(db, terminos, skip: int = 0, limit: int = 100):
+    """
+    Personas cuyo nombre, apellido, ciudad, provincia o actividades contienen
+    alguno de los términos, de mayor a menor relevancia: cada término que
+    aparece suma su peso por (1 + word_similarity), así una coincidencia de
+    palabra completa pesa más que una parcial.
+    """
+    if not terminos:
+        return []
+
+    params = {"skip": skip, "limit": limit}
+    condiciones = []
+    puntajes = []
+    for i, (termino, peso) in enumerate(terminos):
+        params[f"t{i}"] = termino
+        params[f"p{i}"] = _patron_like(termino)
+        params[f"w{i}"] = peso
+        # f_unaccent es IMMUTABLE: el patrón se resuelve al planificar y usa el índice
+        condicion = f"per.busqueda LIKE f_unaccent(lower(:p{i}))"
+        condiciones.append(condicion)
+        puntajes.append(
+            f"CASE WHEN {condicion} "
+            f"THEN :w{i} * (1 + word_similarity(f_unaccent(lower(:t{i})), per.busqueda)) ELSE 0 END"
+        )
+
+    sql = text(f"""
+        SELECT per.dni,
+               per.nombre,
+               per.apellido,
+               per.ciudad,
+               per.provincia,
+               COALESCE(per.habilidades, '') AS actividades,
+               {" + ".join(puntajes)} AS relevancia
+        FROM persona per
+        WHERE {" OR ".join(condiciones)}
+        ORDER BY relevancia DESC, per.apellido, per.nombre, per.dni
+        LIMIT :limit OFFSET :skip
+    """)
+
+    return db.execute(sql, params).mappings().all()
@@ -0,0 +1,293 @@
+"""
+Índice invertido en memoria con ranking BM25 para la búsqueda semántica.
+
+Alternativa a la búsqueda en Postgres (app/matching/busqueda.py) que no toca
+la base en cada consulta:
+  - ofertas: título, descripción y actividades requeridas
+  - personas: actividades, ciudad, provincia, nombre y apellido
+
+Los textos se normalizan igual que limpiar_y_formatear (NFKD sin acentos) y
+se pasan a minúsculas. El índice se arma completo en el primer uso y después
+se actualiza por documento: eventos de sesión anotan qué ofertas y personas
+cambió cada commit y antes de la próxima búsqueda se releen solo esas.
+Escrituras que no dejan saber qué filas tocaron (UPDATE/DELETE masivos,
+cambios en actividad) fuerzan a rearmar el índice completo.
+"""
+import re
+import math
+import heapq
+import threading
+import unicodedata
+from collections import defaultdict
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.ofertas.models import OfertaEmpleo, OfertaActividad
+from app.personas.models import Persona
+from app.empresas.models import Empresa
+from app.actividades.models import Actividad, PersonaActividad
+
+
+# Parámetros de BM25
+K1 = 1.2
+B = 0.75
+
+# Peso de cada campo en la frecuencia del término (BM25F simplificado)
+PESOS_OFERTA = {"titulo": 2.0, "descripcion": 1.0, "actividades": 1.5}
+PESOS_PERSONA = {"actividades": 2.0, "ciudad": 1.0, "provincia": 1.0, "nombre": 1.0, "apellido": 1.0}
+
+
+def tokenizar(texto):
+    """Palabras en minúscula y sin acentos (misma normalización que limpiar_y_formatear)"""
+    if not texto:
+        return []
+    texto = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode().lower()
+    return re.findall(r"[a-z0-9]+", texto)
+
+
+class _IndiceBM25:
+    """Postings token -> {id: frecuencia ponderada} con altas y bajas por documento"""
+
+    def __init__(self):
+        self.postings = defaultdict(dict)
+        self.terminos_doc = {}   # id -> {token: tf}, para poder dar de baja
+        self.largo_doc = {}
+        self.largo_total = 0.0
+        self.datos = {}          # id -> campos que devuelve la búsqueda
+
+    def quitar(self, id_doc):
+        terminos = self.terminos_doc.pop(id_doc, None)
+        if terminos is None:
+            return
+        for token in terminos:
+            posting = self.postings[token]
+            posting.pop(id_doc, None)
+            if not posting:
+                del self.postings[token]
+        self.largo_total -= self.largo_doc.pop(id_doc)
+        self.datos.pop(id_doc, None)
+
+    def agregar(self, id_doc, campos: dict, pesos: dict, datos: dict):
+        self.quitar(id_doc)
+        tf = defaultdict(float)
+        for campo, peso in pesos.items():
+            for token in tokenizar(campos.get(campo)):
+                tf[token] += peso
+        for token, frecuencia in tf.items():
+            self.postings[token][id_doc] = frecuencia
+        self.terminos_doc[id_doc] = dict(tf)
+        self.largo_doc[id_doc] = sum(tf.values())
+        self.largo_total += self.largo_doc[id_doc]
+        self.datos[id_doc] = datos
+
+    def buscar(self, terminos, skip: int, limit: int):
+        """terminos: [(texto, peso)] -> [(datos, puntaje)] de mayor a menor puntaje"""
+        n = len(self.largo_doc)
+        if not n:
+            return []
+        largo_medio = self.largo_total / n or 1.0
+
+        # Un término de varias palabras aporta cada una con su peso
+        pesos_token = {}
+        for termino, peso in terminos:
+            for token in tokenizar(termino):
+                pesos_token[token] = max(peso, pesos_token.get(token, 0))
+
+        puntajes = defaultdict(float)
+        for token, peso in pesos_token.items():
+            posting = self.postings.get(token)
+            if not posting:
+                continue
+            idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            for id_doc, tf in posting.items():
+                normalizacion = K1 * (1 - B + B * self.largo_doc[id_doc] / largo_medio)
+                puntajes[id_doc] += peso * idf * tf * (K1 + 1) / (tf + normalizacion)
+
+        mejores = heapq.nlargest(skip + limit, puntajes.items(), key=lambda x: (x[1], -x[0]))
+        return [(self.datos[id_doc], puntaje) for id_doc, puntaje in mejores[skip:]]
+
+
+# -------------------------
+# CARGA DESDE LA BASE
+# -------------------------
+_SQL_OFERTAS = """
+    SELECT o.id_oferta, o.titulo, o.descripcion,
+           COALESCE(e.ciudad, p.ciudad) AS ciudad,
+           COALESCE(e.provincia, p.provincia) AS provincia,
+           COALESCE(string_agg(a.nombre, ' '), '') AS actividades
+    FROM oferta_empleo o
+    LEFT JOIN empresa e ON o.id_empresa = e.id_empresa
+    LEFT JOIN persona p ON o.persona_dni = p.dni
+    LEFT JOIN oferta_actividad oa ON oa.id_oferta = o.id_oferta
+    LEFT JOIN actividad a ON a.id_actividad = oa.id_actividad
+    {filtro}
+    GROUP BY o.id_oferta, e.ciudad, p.ciudad, e.provincia, p.provincia
+"""
+
+_SQL_PERSONAS = """
+    SELECT per.dni, per.nombre, per.apellido, per.ciudad, per.provincia,
+           COALESCE(string_agg(a.nombre, ', ' ORDER BY a.nombre), '') AS actividades
+    FROM persona per
+    LEFT JOIN persona_actividad pa ON pa.dni = per.dni
+    LEFT JOIN actividad a ON a.id_actividad = pa.id_actividad
+    {filtro}
+    GROUP BY per.dni
+"""
+
+
+def _cargar_ofertas(indice, db, ids=None, empresas=None, dnis=None):
+    if ids is None:
+        filas = db.execute(text(_SQL_OFERTAS.format(filtro=""))).mappings().all()
+    else:
+        filas = db.execute(text(_SQL_OFERTAS.format(filtro="""
+            WHERE o.id_oferta = ANY(:ids) OR o.id_empresa = ANY(:empresas) OR o.persona_dni = ANY(:dnis)
+        """)), {"ids": list(ids), "empresas": list(empresas), "dnis": list(dnis)}).mappings().all()
+        # Las que ya no están en la base se dan de baja
+        for id_oferta in set(ids) - {f["id_oferta"] for f in filas}:
+            indice.quitar(id_oferta)
+
+    for f in filas:
+        indice.agregar(
+            f["id_oferta"], f, PESOS_OFERTA,
+            {"id_oferta": f["id_oferta"], "titulo": f["titulo"], "descripcion": f["descripcion"],
+             "ciudad": f["ciudad"]}
+        )
+
+
+def _cargar_personas(indice, db, dnis=None):
+    if dnis is None:
+        filas = db.execute(text(_SQL_PERSONAS.format(filtro=""))).mappings().all()
+    else:
+        filas = db.execute(
+            text(_SQL_PERSONAS.format(filtro="WHERE per.dni = ANY(:dnis)")), {"dnis": list(dnis)}
+        ).mappings().all()
+        for dni in set(dnis) - {f["dni"] for f in filas}:
+            indice.quitar(dni)
+
+    for f in filas:
+        indice.agregar(
+            f["dni"], f, PESOS_PERSONA,
+            {"dni": f["dni"], "nombre": f["nombre"], "apellido": f["apellido"], "ciudad": f["ciudad"],
+             "provincia": f["provincia"],
+             "actividades": f["actividades"].split(", ") if f["actividades"] else []}
+        )
+
+
+def _sin_cambios():
+    return {"ofertas": set(), "empresas": set(), "dnis": set(), "recargar": False}
+
+
+class IndiceBusqueda:
+    """Índices de ofertas y personas del proceso, al día con lo confirmado en la base"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ofertas = None
+        self._personas = None
+        # Cambios confirmados aún no aplicados al índice (con su propio lock:
+        # un commit no espera a que termine una búsqueda)
+        self._lock_pendientes = threading.Lock()
+        self._pendientes = _sin_cambios()
+
+    def anotar_cambios(self, ofertas=(), empresas=(), dnis=(), recargar=False):
+        with self._lock_pendientes:
+            self._pendientes["ofertas"].update(ofertas)
+            self._pendientes["empresas"].update(empresas)
+            self._pendientes["dnis"].update(dnis)
+            self._pendientes["recargar"] = self._pendientes["recargar"] or recargar
+
+    def _al_dia(self):
+        """Arma o actualiza los índices (llamar con el lock tomado)"""
+        with self._lock_pendientes:
+            pendientes, self._pendientes = self._pendientes, _sin_cambios()
+        completo = self._ofertas is None or pendientes["recargar"]
+        if not completo and not (pendientes["ofertas"] or pendientes["empresas"] or pendientes["dnis"]):
+            return
+
+        db = SessionLocal()
+        try:
+            if completo:
+                ofertas, personas = _IndiceBM25(), _IndiceBM25()
+                _cargar_ofertas(ofertas, db)
+                _cargar_personas(personas, db)
+                self._ofertas, self._personas = ofertas, personas
+                print(f"🔎 Índice de búsqueda: {len(ofertas.datos)} ofertas y {len(personas.datos)} personas")
+            else:
+                _cargar_ofertas(self._ofertas, db, pendientes["ofertas"], pendientes["empresas"], pendientes["dnis"])
+                _cargar_personas(self._personas, db, pendientes["dnis"])
+        except Exception:
+            # Se reintenta completo en la próxima búsqueda
+            self.anotar_cambios(recargar=True)
+            raise
+        finally:
+            db.close()
+
+    def buscar_ofertas(self, terminos, skip: int = 0, limit: int = 100):
+        with self._lock:
+            self._al_dia()
+            return self._ofertas.buscar(terminos, skip, limit)
+
+    def buscar_personas(self, terminos, skip: int = 0, limit: int = 100):
+        with self._lock:
+            self._al_dia()
+            return self._personas.buscar(terminos, skip, limit)
+
+    def precargar(self):
+        with self._lock:
+            self._al_dia()
+
+
+indice_busqueda = IndiceBusqueda()
+
+
+# -------------------------
+# EVENTOS DE SESIÓN: qué ofertas / personas cambió cada commit
+# -------------------------
+def _cambios(session):
+    return session.info.setdefault("indice_busqueda", _sin_cambios())
+
+
+@event.listens_for(Session, "after_flush")
+def _anotar_flush(session, flush_context):
+    # Se lee __dict__ y no el atributo: en AsyncSession un atributo vencido
+    # no se puede recargar desde un evento
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, (OfertaEmpleo, OfertaActividad)):
+            _cambios(session)["ofertas"].add(obj.__dict__.get("id_oferta"))
+        elif isinstance(obj, (Persona, PersonaActividad)):
+            _cambios(session)["dnis"].add(obj.__dict__.get("dni"))
+        elif isinstance(obj, Empresa):
+            _cambios(session)["empresas"].add(obj.__dict__.get("id_empresa"))
+        elif isinstance(obj, Actividad) and obj not in session.new:
+            # Un nombre de actividad aparece en muchos documentos
+            _cambios(session)["recargar"] = True
+
+
+_TABLAS_INDICE = {
+    OfertaEmpleo.__tablename__, OfertaActividad.__tablename__, Persona.__tablename__,
+    PersonaActividad.__tablename__, Empresa.__tablename__, Actividad.__tablename__,
+}
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _anotar_masivo(orm_execute_state):
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None and mapper.local_table.name in _TABLAS_INDICE:
+            _cambios(orm_execute_state.session)["recargar"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _aplicar(session):
+    cambios = session.info.pop("indice_busqueda", None)
+    if cambios:
+        for clave in ("ofertas", "empresas", "dnis"):
+            cambios[clave].discard(None)
+        indice_busqueda.anotar_cambios(
+            cambios["ofertas"], cambios["empresas"], cambios["dnis"], cambios["recargar"]
+        )
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar(session):
+    session.info.pop("indice_busqueda", None)
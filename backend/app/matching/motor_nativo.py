@@ -0,0 +1,203 @@
+"""
+Motor de matching nativo (en proceso) equivalente a recomendacion/3 de reglas.pl.
+
+Carga persona_actividad y oferta_actividad en arreglos de NumPy y calcula
+puntaje_actividad / normalizar_puntaje vectorizado sobre todas las ofertas
+activas, sin ida y vuelta HTTP al motor Prolog. Los datos se recargan solo
+cuando cambia la versión de alguna de las tablas involucradas.
+
+años_experiencia NULL: generador_hechos lo exporta como `None`, que en
+Prolog es una variable libre; si ese requisito se cumple (VP >= VR),
+`Anios * 5` lanza un error de instanciación y /matching falla para esa
+persona. El motor nativo responde igual: status "error" para la persona
+(en el lote, solo para ese DNI; Prolog corta ahí el resto del stream).
+"""
+import threading
+import numpy as np
+from sqlalchemy import text
+from app.database import SessionLocal
+from app.versiones import version_tabla
+from app.prolog.formato_hechos import limpiar_y_formatear
+
+
+# nivel_valor/2 de reglas.pl (0 = nivel desconocido: el requisito no suma)
+NIVEL_VALOR = {"principiante": 1, "intermedio": 2, "avanzado": 3, "experto": 4}
+
+TABLAS = ("persona_actividad", "oferta_empleo", "oferta_actividad")
+
+# Mensaje para personas con años_experiencia NULL en un requisito cumplido
+ERROR_AÑOS_NULL = "años_experiencia NULL en una actividad requerida por una oferta activa"
+
+
+def _nivel(texto):
+    return NIVEL_VALOR.get(limpiar_y_formatear(texto).lower(), 0)
+
+
+class _Datos:
+    """Foto inmutable de las tablas en arreglos (se reemplaza entera al recargar)"""
+
+    def __init__(self, db):
+        # Ofertas activas: oferta_activa/1 y título de oferta/4
+        ofertas = db.execute(text("""
+            SELECT id_oferta, titulo FROM oferta_empleo
+            WHERE activa = true ORDER BY id_oferta
+        """)).fetchall()
+        self.ids_oferta = np.array([o.id_oferta for o in ofertas], dtype=np.int64)
+        self.titulos = [limpiar_y_formatear(o.titulo) for o in ofertas]
+        indice_oferta = {o.id_oferta: i for i, o in enumerate(ofertas)}
+
+        # Requisitos de las ofertas activas: oferta_actividad/3
+        # (ordenados por oferta para sumar por tramos con reduceat)
+        requisitos = sorted(
+            (
+                r for r in db.execute(text(
+                    "SELECT id_oferta, id_actividad, nivel_requerido FROM oferta_actividad"
+                )).fetchall()
+                if r.id_oferta in indice_oferta
+            ),
+            key=lambda r: indice_oferta[r.id_oferta]
+        )
+        self.indice_actividad = {}
+        for r in requisitos:
+            self.indice_actividad.setdefault(r.id_actividad, len(self.indice_actividad))
+
+        self.req_oferta = np.array([indice_oferta[r.id_oferta] for r in requisitos], dtype=np.int64)
+        self.req_actividad = np.array([self.indice_actividad[r.id_actividad] for r in requisitos], dtype=np.int64)
+        self.req_nivel = np.array([_nivel(r.nivel_requerido) for r in requisitos], dtype=np.int64)
+        # contar_requisitos/2
+        self.n_requisitos = np.bincount(self.req_oferta, minlength=len(ofertas))
+        # Inicio de cada tramo de requisitos y oferta a la que pertenece
+        self.inicios = np.flatnonzero(np.r_[True, self.req_oferta[1:] != self.req_oferta[:-1]]) \
+            if len(requisitos) else np.array([], dtype=np.int64)
+        self.ofertas_con_requisitos = self.req_oferta[self.inicios]
+
+        # Habilidades por persona (solo las que alguna oferta requiere)
+        self.personas = {}
+        for pa in db.execute(text("""
+            SELECT dni, id_actividad, nivel_experiencia, años_experiencia
+            FROM persona_actividad
+        """)).fetchall():
+            idx = self.indice_actividad.get(pa.id_actividad)
+            if idx is not None:
+                self.personas.setdefault(pa.dni, []).append(
+                    (idx, _nivel(pa.nivel_experiencia), pa.años_experiencia)
+                )
+
+    def matrices_personas(self, dnis):
+        """
+        Nivel y años por actividad, una fila por DNI (0 si no la tiene), y
+        qué actividades tienen años_experiencia NULL.
+        """
+        nivel = np.zeros((len(dnis), len(self.indice_actividad)), dtype=np.int64)
+        anios = np.zeros((len(dnis), len(self.indice_actividad)), dtype=np.int64)
+        sin_anios = np.zeros((len(dnis), len(self.indice_actividad)), dtype=bool)
+        for fila, dni in enumerate(dnis):
+            for idx, valor, años in self.personas.get(dni, []):
+                nivel[fila, idx] = valor
+                if años is None:
+                    sin_anios[fila, idx] = True
+                else:
+                    anios[fila, idx] = años
+        return nivel, anios, sin_anios
+
+    def puntajes(self, nivel, anios, sin_anios):
+        """
+        Puntaje normalizado por oferta, una fila por persona:
+        puntaje_actividad = VP*20 + Años*5 si VP >= VR (0 si no cumple o no la tiene),
+        normalizar_puntaje = Suma / (100 * NReq) * 100.
+        Devuelve también, por persona, si algún requisito cumplido tiene años
+        NULL (en Prolog, error de instanciación).
+        """
+        suma = np.zeros((nivel.shape[0], len(self.ids_oferta)))
+        indefinidos = np.zeros(nivel.shape[0], dtype=bool)
+        if len(self.inicios):
+            vp = nivel[:, self.req_actividad]
+            cumple = (vp > 0) & (self.req_nivel > 0) & (vp >= self.req_nivel)
+            parciales = np.where(cumple, vp * 20 + anios[:, self.req_actividad] * 5, 0)
+            suma[:, self.ofertas_con_requisitos] = np.add.reduceat(parciales, self.inicios, axis=1)
+            indefinidos = (cumple & sin_anios[:, self.req_actividad]).any(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            puntajes = np.where(self.n_requisitos > 0, suma / (100 * self.n_requisitos) * 100, 0.0)
+        return puntajes, indefinidos
+
+
+class MotorNativo:
+    """
+    Alternativa en proceso a MotorProlog.buscar_recomendaciones con el mismo
+    formato de respuesta: {"status", "dni", "recomendaciones": [{oferta, titulo, puntaje}]}
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._datos = None
+        self._version = None
+
+    def _datos_actuales(self):
+        version = tuple(version_tabla(t) for t in TABLAS)
+        if self._datos is None or self._version != version:
+            with self._lock:
+                if self._datos is None or self._version != version:
+                    db = SessionLocal()
+                    try:
+                        self._datos = _Datos(db)
+                    finally:
+                        db.close()
+                    self._version = version
+                    print(f"🧮 Motor nativo: {len(self._datos.ids_oferta)} ofertas activas cargadas")
+        return self._datos
+
+    def _resultado(self, datos, dni, puntajes, indefinido):
+        if indefinido:
+            return {
+                "status": "error",
+                "message": f"Error en el motor de matching nativo: {ERROR_AÑOS_NULL}",
+                "dni": dni,
+                "recomendaciones": []
+            }
+        return {
+            "status": "ok",
+            "dni": dni,
+            "recomendaciones": [
+                {"oferta": int(datos.ids_oferta[i]), "titulo": datos.titulos[i], "puntaje": float(puntajes[i])}
+                for i in np.flatnonzero(puntajes > 0)
+            ]
+        }
+
+    def buscar_recomendaciones(self, dni: int):
+        """Recomendaciones de ofertas para una persona (recomendacion/3 con Score > 0)"""
+        try:
+            datos = self._datos_actuales()
+            puntajes, indefinidos = datos.puntajes(*datos.matrices_personas([dni]))
+            return self._resultado(datos, dni, puntajes[0], indefinidos[0])
+        except Exception as e:
+            print(f"💥 Error en motor nativo: {e}")
+            return {
+                "status": "error",
+                "message": f"Error en el motor de matching nativo: {e}",
+                "dni": dni,
+                "recomendaciones": []
+            }
+
+    def buscar_recomendaciones_lote(self, dnis: list, tamanio_bloque: int = 512):
+        """
+        Recomendaciones para muchas personas en una sola pasada por bloques
+        de DNIs (una matriz personas x requisitos por bloque).
+        Generador: produce un resultado por DNI, en el mismo orden.
+        """
+        try:
+            datos = self._datos_actuales()
+        except Exception as e:
+            print(f"💥 Error en motor nativo: {e}")
+            for dni in dnis:
+                yield {"status": "error", "message": f"Error en el motor de matching nativo: {e}",
+                       "dni": dni, "recomendaciones": []}
+            return
+
+        for inicio in range(0, len(dnis), tamanio_bloque):
+            bloque = dnis[inicio:inicio + tamanio_bloque]
+            puntajes, indefinidos = datos.puntajes(*datos.matrices_personas(bloque))
+            for fila, dni in enumerate(bloque):
+                yield self._resultado(datos, dni, puntajes[fila], indefinidos[fila])
+
+
+motor_nativo = MotorNativo()
@@ -1,14 +1,20 @@
 # app/matching/routes.py
 
 import json
-from fastapi import APIRouter, Depends, Query
-from app.database import get_db
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from app.database import get_db, get_read_db
 from sqlalchemy.orm import Session
 from sqlalchemy import text
-from app.matching.servicio import generar_hechos
-from app.prolog.motor import MotorProlog
-from app.database import SessionLocal
-import os
+from app.matching.servicio import (
+    regenerar_hechos, asegurar_hechos_actualizados, buscar_recomendaciones, buscar_recomendaciones_lote
+)
+from app.prolog.motor import motor_prolog
+from app.matching.busqueda import MOTOR_BUSQUEDA, terminos_ponderados, buscar_ofertas, buscar_personas
+from app.matching.indice_busqueda import indice_busqueda
+from app.prolog import cliente, expansion
 import re
 
 
@@ -17,21 +23,42 @@ db: Session = Depends(get_db)
 
 @router.post("/generar-hechos", summary="Regenerar hechos.pl desde la base")
 def generar_hechos_endpoint(db: Session = Depends(get_db)):
-    return generar_hechos(db)
+    return regenerar_hechos(incremental=False)
+
+
+# Máximo de personas por pedido de /matching/lote
+MAXIMO_LOTE = 1000
+
+
+class MatchingLote(BaseModel):
+    dnis: List[int] = Field(..., max_length=MAXIMO_LOTE)
+    # Igual que ?motor= de GET /matching/{dni}
+    motor: Optional[str] = Field(None, pattern="^(prolog|nativo)$")
+
+
+@router.post("/matching/lote", summary="Recomendaciones para varias personas (NDJSON)")
+def matching_lote(datos: MatchingLote):
+    """
+    Calcula las recomendaciones de todos los DNIs en una sola pasada y las
+    devuelve en streaming, una línea JSON por persona (application/x-ndjson).
+    """
+    resultados = buscar_recomendaciones_lote(datos.dnis, datos.motor)
+    return StreamingResponse(
+        (json.dumps(r, ensure_ascii=False) + "\n" for r in resultados),
+        media_type="application/x-ndjson"
+    )
 
 
 @router.get("/matching/{dni}", summary="Obtener recomendaciones para una persona")
-def matching(dni: int, db: Session = Depends(get_db)): 
-    generar_hechos(db)  # recargar base de conocimiento
-    motor = MotorProlog()
-    return motor.buscar_recomendaciones(dni)
+def matching(dni: int, motor: str = Query(None, regex="^(prolog|nativo)$")):
+    """motor: fuerza "prolog" o "nativo" (por defecto, MOTOR_MATCHING)"""
+    return buscar_recomendaciones(dni, motor)
 
 @router.get("/prolog/test")
 def test_prolog():
-    import os, requests
-    url = os.getenv("PROLOG_URL", "http://prolog-engine:4000")
+    url = cliente.PROLOG_URL
     try:
-        r = requests.get(f"{url}/reload_hechos", timeout=5)
+        r = cliente.get("reload_hechos")
         return {
             "backend": "ok",
             "prolog_url": url,
@@ -49,7 +76,7 @@ def buscar_por_habilidades(actividades: str, nivel_minimo: int = 2):
     """Buscar personas que tengan las habilidades especificadas
     Ejemplo: actividades=1,2,3&nivel_minimo=2
     """
-    motor = MotorProlog()
+    asegurar_hechos_actualizados()
     
     try:
         # Opción 1: Si viene como "1,2,3" (formato simple)
@@ -63,7 +90,7 @@ def buscar_por_habilidades(actividades: str, nivel_minimo: int = 2):
             actividades_list = [int(actividades)]
         
         print(f"🔍 Buscando por habilidades: {actividades_list}, nivel mínimo: {nivel_minimo}")
-        return motor.buscar_por_habilidades(actividades_list, nivel_minimo)
+        return motor_prolog.buscar_por_habilidades(actividades_list, nivel_minimo)
         
     except Exception as e:
         print(f"❌ Error procesando actividades: {e}")
@@ -71,16 +98,21 @@ def buscar_por_habilidades(actividades: str, nivel_minimo: int = 2):
 
 @router.get("/buscar_por_ubicacion", summary="Buscar candidatos por ubicación")
 def buscar_por_ubicacion(ciudad: str = "", provincia: str = ""):
-    motor = MotorProlog()
-    return motor.buscar_por_ubicacion(ciudad, provincia)
+    return motor_prolog.buscar_por_ubicacion(ciudad, provincia)
 
 @router.get("/ofertas_por_empresa/{id_empresa}", summary="Obtener ofertas de una empresa")
 def ofertas_por_empresa(id_empresa: int):
-    motor = MotorProlog()
-    return motor.ofertas_por_empresa(id_empresa)
+    return motor_prolog.ofertas_por_empresa(id_empresa)
 
 
-PROLOG_URL = os.getenv("PROLOG_URL", "http://prolog-engine:4000")
+@router.get("/prolog/pool", summary="Estadísticas del pool de conexiones a Prolog")
+def estadisticas_pool_prolog():
+    return cliente.estadisticas()
+
+
+@router.get("/prolog/expansion", summary="Caché e interruptor de la expansión semántica")
+def estadisticas_expansion():
+    return expansion.estadisticas()
 
 
 # ============================================================
@@ -88,7 +120,14 @@ PROLOG_URL = os.getenv("PROLOG_URL", "http://prolog-engine:4000")
 # ============================================================
 
 @router.get("/buscar_semantica")
-def buscar_semantica(consulta: str = Query(...), db: Session = Depends(get_db)):
+def buscar_semantica(
+    consulta: str = Query(...),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    motor: str = Query(None, regex="^(postgres|memoria)$"),
+    db: Session = Depends(get_read_db)
+):
+    """motor: "postgres" (texto completo) o "memoria" (índice BM25); por defecto, MOTOR_BUSQUEDA"""
     print("\n==============================")
     print(f"🔍 Buscando SEMÁNTICO: {consulta}")
     print("==============================")
@@ -106,8 +145,7 @@ def buscar_semantica(consulta: str = Query(...), db: Session = Depends(get_db)):
     # 1) Expansión semántica vía Prolog
     # -----------------------------------
     try:
-       
-        expandidas = MotorProlog.expandir(palabras)
+        expandidas = motor_prolog.expandir(palabras)
 
         if not expandidas:
             print("⚠️ Prolog no devolvió expansiones.")
@@ -116,65 +154,50 @@ def buscar_semantica(consulta: str = Query(...), db: Session = Depends(get_db)):
         print(f"📌 Expandidas: {expandidas}")
 
     except Exception as e:
-        print("⚠️ Error usando MotorProlog:", e)
+        print("⚠️ Error usando motor_prolog:", e)
         expandidas = palabras
 
     # -----------------------------------
-    # 2) SQL dinámico basado en expansiones
+    # 2) Búsqueda por relevancia: texto completo sobre oferta_empleo.documento
+    #    o índice BM25 en memoria
     # -----------------------------------
-    like_clauses = " OR ".join([
-        "(titulo ILIKE :p{0} OR descripcion ILIKE :p{0}_d)".format(i)
-        for i in range(len(expandidas))
-    ])
-
-    params = {}
-    for i, palabra in enumerate(expandidas):
-        wildcard = f"%{palabra}%"
-        params[f"p{i}"] = wildcard
-        params[f"p{i}_d"] = wildcard
-
-    sql = text("""
-        SELECT 
-            o.id_oferta,
-            o.titulo,
-            o.descripcion,
-            COALESCE(e.ciudad, p.ciudad) AS ciudad,
-            COALESCE(e.provincia, p.provincia) AS provincia
-        FROM oferta_empleo o
-        LEFT JOIN empresa e ON o.id_empresa = e.id_empresa
-        LEFT JOIN persona p ON o.persona_dni = p.dni
-        WHERE 
-            """ + " OR ".join([
-                "(o.titulo ILIKE :p{0} OR o.descripcion ILIKE :p{0}_d)".format(i)
-                for i in range(len(palabras))
-            ])
-    )
-
-    params = {}
-    for i, palabra in enumerate(palabras):
-        params[f"p{i}"] = f"%{palabra}%"
-        params[f"p{i}_d"] = f"%{palabra}%"
-
-    resultados = db.execute(sql, params).fetchall()
+    terminos = terminos_ponderados(palabras, expandidas)
+
+    if (motor or MOTOR_BUSQUEDA) == "memoria":
+        resultados = [
+            {**datos, "relevancia": round(puntaje, 4)}
+            for datos, puntaje in indice_busqueda.buscar_ofertas(terminos, skip=skip, limit=limit)
+        ]
+    else:
+        resultados = [
+            {
+                "id_oferta": r.id_oferta,
+                "titulo": r.titulo,
+                "descripcion": r.descripcion,
+                "ciudad": r.ciudad,
+                "relevancia": round(float(r.relevancia), 4)
+            }
+            for r in buscar_ofertas(db, terminos, skip=skip, limit=limit)
+        ]
 
     print(f"📌 Total ofertas encontradas: {len(resultados)}")
     print("==============================\n")
 
-    return [
-        {
-            "id_oferta": r.id_oferta,
-            "titulo": r.titulo,
-            "descripcion": r.descripcion,
-            "ciudad": r.ciudad
-        }
-        for r in resultados
-    ]
+    return resultados
 
 
 @router.get("/buscar_semantica_personas")
-def buscar_semantica_personas(consulta: str = Query(...), db: Session = Depends(get_db)):
+def buscar_semantica_personas(
+    consulta: str = Query(...),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    motor: str = Query(None, regex="^(postgres|memoria)$"),
+    db: Session = Depends(get_read_db)
+):
     """
     Búsqueda semántica de personas por actividades, habilidades, ciudad o provincia.
+    Resultados de mayor a menor relevancia, paginados con skip/limit.
+    motor: "postgres" (trigramas) o "memoria" (índice BM25); por defecto, MOTOR_BUSQUEDA
     """
 
     print("\n==============================")
@@ -187,8 +210,7 @@ def buscar_semantica_personas(consulta: str = Query(...), db: Session = Depends(
 
     # intentar expansión semántica
     try:
-        motor = MotorProlog()
-        expandidas = motor.expandir(palabras)
+        expandidas = motor_prolog.expandir(palabras)
     except Exception as e:
         print("⚠️ Error expandiendo palabras:", e)
         expandidas = palabras
@@ -196,55 +218,23 @@ def buscar_semantica_personas(consulta: str = Query(...), db: Session = Depends(
     print("📌 Expandidas:", expandidas)
 
     # ----------------------------------------------------------------------
-    # SQL dinámico: busca en actividades, ciudad, provincia, nombre, apellido
+    # Índice de trigramas sobre persona.busqueda (nombre, apellido, ciudad,
+    # provincia y actividades precalculadas), ver app/matching/busqueda.py
     # ----------------------------------------------------------------------
+    terminos = terminos_ponderados(palabras, expandidas)
 
-    condiciones = []
-    params = {}
-
-    for i, p in enumerate(expandidas):
-        param = f"p{i}"
-        params[param] = f"%{p}%"
-
-        condiciones.append(
-            f"""
-            (
-                LOWER(per.nombre) ILIKE :{param}
-                OR LOWER(per.apellido) ILIKE :{param}
-                OR LOWER(per.ciudad) ILIKE :{param}
-                OR LOWER(per.provincia) ILIKE :{param}
-                OR EXISTS (
-                    SELECT 1 FROM persona_actividad pa
-                    JOIN actividad a ON pa.id_actividad = a.id_actividad
-                    WHERE pa.dni = per.dni
-                    AND LOWER(a.nombre) ILIKE :{param}
-                )
-            )
-            """
-        )
-
-    sql = text(f"""
-        SELECT per.dni,
-               per.nombre,
-               per.apellido,
-               per.ciudad,
-               per.provincia,
-               COALESCE(
-                   (
-                       SELECT string_agg(a.nombre, ', ')
-                       FROM persona_actividad pa
-                       JOIN actividad a ON a.id_actividad = pa.id_actividad
-                       WHERE pa.dni = per.dni
-                   ), ''
-               ) AS actividades
-        FROM persona per
-        WHERE {" OR ".join(condiciones)}
-        ORDER BY per.nombre
-    """)
+    if (motor or MOTOR_BUSQUEDA) == "memoria":
+        personas = [
+            {**datos, "relevancia": round(puntaje, 4)}
+            for datos, puntaje in indice_busqueda.buscar_personas(terminos, skip=skip, limit=limit)
+        ]
+        print("📌 Total personas enviadas:", len(personas))
+        print("==============================\n")
+        return {"personas": personas}
 
     print("📌 Ejecutando SQL...")
 
-    filas = db.execute(sql, params).mappings().all()
+    filas = buscar_personas(db, terminos, skip=skip, limit=limit)
 
     print("📌 Resultados crudos:", len(filas))
 
@@ -256,7 +246,8 @@ def buscar_semantica_personas(consulta: str = Query(...), db: Session = Depends(
             "apellido": f["apellido"],
             "ciudad": f["ciudad"],
             "provincia": f["provincia"],
-            "actividades": f["actividades"].split(", ") if f["actividades"] else []
+            "actividades": f["actividades"].split(", ") if f["actividades"] else [],
+            "relevancia": round(float(f["relevancia"]), 4)
         }
         for f in filas
     ]
@@ -1,29 +1,155 @@
 import os
-import requests
+import threading
+import time
+from concurrent.futures import Future
+from app.prolog import cliente
 from sqlalchemy.orm import Session
 from app.prolog.generador_hechos import generar_hechos as generador_principal
+from app.versiones import version_datos
 
 
-def generar_hechos(db: Session = None):
+# Versión de datos que tiene cargada el motor Prolog (None = desconocida)
+_version_prolog = {"version": None}
+
+
+def generar_hechos(db: Session = None, incremental: bool = True):
     """
     Genera hechos.pl y ofertas.pl y los envía al microservicio Prolog.
+    En modo incremental solo se procesan y envían los hechos que cambiaron
+    desde la última generación; el generador ya recarga o aplica el delta.
     """
-    rutas = generador_principal()   # ← genera archivos correctamente
+    # La versión se toma antes de leer: lo escrito durante la generación
+    # deja a Prolog desactualizado y se procesa en la próxima llamada
+    version = version_datos()
+    rutas = generador_principal(incremental=incremental, version=version)   # ← genera archivos correctamente
 
-    recargar_hechos_en_prolog()
+    if rutas.get("prolog") == "ok":
+        _version_prolog["version"] = version
+    else:
+        _version_prolog["version"] = None
 
     return {
         **rutas,
+        "version": version,
         "message": "Archivos generados y recargados via volumen compartido"
     }
 
 
+class CoordinadorRegeneracion:
+    """
+    Evita regeneraciones de hechos concurrentes sobre los mismos archivos:
+    - single-flight: a lo sumo una regeneración en curso; quienes llegan
+      durante la ventana de espera se suman a ella y reciben su resultado.
+    - debounce: el líder espera `ventana_ms` antes de leer la base, así una
+      ráfaga de escrituras se resuelve con una sola regeneración.
+    Si llega un pedido con una regeneración ya en curso (que quizás no vea
+    sus escrituras) se encola UNA siguiente, compartida por todos.
+    """
+
+    def __init__(self, ventana_ms: int = 100):
+        self.ventana = ventana_ms / 1000
+        self._lock = threading.Lock()
+        self._en_curso = None
+        self._pendiente = None
+        self._pendiente_incremental = True
+
+    def solicitar(self, incremental: bool = True):
+        with self._lock:
+            if self._pendiente is not None:
+                futuro = self._pendiente
+                # Si alguno pidió regeneración completa, se hace completa
+                self._pendiente_incremental = self._pendiente_incremental and incremental
+                lider = False
+            else:
+                futuro = Future()
+                self._pendiente = futuro
+                self._pendiente_incremental = incremental
+                anterior = self._en_curso
+                lider = True
+
+        if not lider:
+            return futuro.result()
+
+        # Esperar la regeneración en curso y luego la ventana de agrupación
+        if anterior is not None:
+            anterior.exception()
+        time.sleep(self.ventana)
+
+        with self._lock:
+            self._pendiente = None
+            self._en_curso = futuro
+            incremental = self._pendiente_incremental
+
+        try:
+            futuro.set_result(generar_hechos(incremental=incremental))
+        except Exception as e:
+            futuro.set_exception(e)
+        finally:
+            with self._lock:
+                if self._en_curso is futuro:
+                    self._en_curso = None
+
+        return futuro.result()
+
+
+coordinador = CoordinadorRegeneracion(
+    ventana_ms=int(os.getenv("REGENERACION_VENTANA_MS", "100"))
+)
+
+
+def regenerar_hechos(incremental: bool = True):
+    """Punto de entrada para rutas: regeneración coordinada (ver CoordinadorRegeneracion)"""
+    return coordinador.solicitar(incremental=incremental)
+
+
+def asegurar_hechos_actualizados():
+    """
+    Regenera (en modo incremental) solo si la versión de datos cargada en
+    Prolog quedó vieja respecto de la del backend. Si está al día no toca
+    la base ni el motor: las lecturas quedan como simples consultas.
+    """
+    version = version_datos()
+    if _version_prolog["version"] == version:
+        return {"status": "ok", "version": version, "regenerado": False}
+
+    print(f"🔄 Base de conocimiento desactualizada (Prolog: {_version_prolog['version']}, datos: {version})")
+    resultado = regenerar_hechos()
+    return {"status": resultado.get("prolog"), "version": resultado["version"], "regenerado": True}
+
+
+# Motor para recomendaciones de ofertas: "prolog" (servicio HTTP) o "nativo" (NumPy en proceso)
+MOTOR_MATCHING = os.getenv("MOTOR_MATCHING", "prolog")
+
+
+def buscar_recomendaciones(dni: int, motor: str = None):
+    """Recomendaciones de ofertas para una persona con el motor configurado"""
+    if (motor or MOTOR_MATCHING) == "nativo":
+        from app.matching.motor_nativo import motor_nativo
+        return motor_nativo.buscar_recomendaciones(dni)
+
+    from app.prolog.motor import motor_prolog
+    asegurar_hechos_actualizados()  # regenera solo si Prolog quedó desactualizado
+    return motor_prolog.buscar_recomendaciones(dni)
+
+
+def buscar_recomendaciones_lote(dnis: list, motor: str = None):
+    """
+    Recomendaciones para varias personas en una sola pasada del motor.
+    Generador: un resultado por DNI, en el orden recibido.
+    """
+    if (motor or MOTOR_MATCHING) == "nativo":
+        from app.matching.motor_nativo import motor_nativo
+        return motor_nativo.buscar_recomendaciones_lote(dnis)
+
+    from app.prolog.motor import motor_prolog
+    asegurar_hechos_actualizados()
+    return motor_prolog.buscar_recomendaciones_lote(dnis)
+
+
 def enviar_hechos_a_prolog(path_hechos: str, path_ofertas: str):
     """
     OPCIÓN ALTERNATIVA: Si quieres mantener el upload, cambia a modo texto
     """
-    prolog_url = os.getenv("PROLOG_URL", "http://prolog-engine:4000")
-
     if not os.path.exists(path_hechos) or not os.path.exists(path_ofertas):
         print("❌ Archivos no encontrados:", path_hechos, path_ofertas)
         return {"status": "error", "detalle": "archivos no encontrados"}
@@ -40,11 +166,7 @@ def enviar_hechos_a_prolog(path_hechos: str, path_ofertas: str):
 
     try:
         print(f"📤 Enviando archivos a Prolog...")
-        r = requests.post(
-            f"{prolog_url}/upload_hechos",
-            files=files,
-            timeout=30
-        )
+        r = cliente.post("upload_hechos", files=files)
         r.raise_for_status()
         print("✅ Prolog respondió:", r.status_code)
         return r.json()
@@ -55,10 +177,9 @@ def enviar_hechos_a_prolog(path_hechos: str, path_ofertas: str):
 
 
 def recargar_hechos_en_prolog():
-    prolog_url = os.getenv("PROLOG_URL", "http://prolog-engine:4000")
     try:
         print("🔄 Recargando hechos en Prolog...")
-        r = requests.post(f"{prolog_url}/reload_hechos", timeout=10)
+        r = cliente.post("reload_hechos")
         r.raise_for_status()
         print("✅ Recarga exitosa")
         return r.json()
@@ -0,0 +1,101 @@
+"""
+Métricas del pool de conexiones a la base.
+
+Los pools medidos cronometran cada checkout (lo que tarda un pedido en
+obtener una conexión: inmediato si hay una libre, o la espera hasta que se
+libera o se abre una nueva) y lo acumulan en un histograma por pool.
+"""
+import time
+import threading
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+
+# Límites superiores (ms) de los buckets del histograma de checkout
+BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class MetricasCheckout:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_ms = 0.0
+        self.maximo_ms = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)  # el último: > BUCKETS_MS[-1]
+
+    def registrar(self, ms: float, timeout: bool = False):
+        with self._lock:
+            if timeout:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.total_ms += ms
+            self.maximo_ms = max(self.maximo_ms, ms)
+            for i, limite in enumerate(BUCKETS_MS):
+                if ms <= limite:
+                    self.buckets[i] += 1
+                    break
+            else:
+                self.buckets[-1] += 1
+
+    def resumen(self):
+        with self._lock:
+            total = self.checkouts + self.timeouts
+            etiquetas = [f"<={b}ms" for b in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"]
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "espera_promedio_ms": round(self.total_ms / total, 2) if total else 0,
+                "espera_maxima_ms": round(self.maximo_ms, 2),
+                "histograma_ms": dict(zip(etiquetas, self.buckets)),
+            }
+
+
+class _Medido:
+    """Mixin: cronometra _do_get (obtener una conexión del pool)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metricas = MetricasCheckout()
+
+    def recreate(self):
+        # dispose()/recreate conservan el histograma acumulado
+        nuevo = super().recreate()
+        nuevo.metricas = self.metricas
+        return nuevo
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            conexion = super()._do_get()
+        except exc.TimeoutError:
+            self.metricas.registrar((time.perf_counter() - inicio) * 1000, timeout=True)
+            raise
+        self.metricas.registrar((time.perf_counter() - inicio) * 1000)
+        return conexion
+
+
+class QueuePoolMedido(_Medido, QueuePool):
+    pass
+
+
+class AsyncQueuePoolMedido(_Medido, AsyncAdaptedQueuePool):
+    pass
+
+
+def estado_pool(pool) -> dict:
+    """Estado actual del pool más las métricas acumuladas de checkout"""
+    datos = {
+        "tamanio": pool.size(),
+        "en_uso": pool.checkedout(),
+        "libres": pool.checkedin(),
+        # QueuePool cuenta el overflow desde -tamanio: se informa solo el positivo
+        "overflow": max(pool.overflow(), 0),
+        "overflow_maximo": pool._max_overflow,
+        "timeout_segundos": pool.timeout(),
+    }
+    metricas = getattr(pool, "metricas", None)
+    if metricas is not None:
+        datos.update(metricas.resumen())
+    return datos
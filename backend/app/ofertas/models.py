@@ -39,6 +39,13 @@ class OfertaActividad(Base):
     actividad = relationship("Actividad")      # <-- ESTA FALTABA
     oferta = relationship("OfertaEmpleo")      # <-- ESTA TAMBIÉN FALTABA
 
+    @property
+    def nombre_actividad(self):
+        # Solo si la actividad ya se cargó (joinedload): leer la relación
+        # dispararía una consulta por fila, y en AsyncSession falla
+        actividad = self.__dict__.get("actividad")
+        return actividad.nombre if actividad is not None else None
+
 
     # Validación del nivel requerido
     __table_args__ = (
@@ -1,6 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy import select, delete
+from sqlalchemy.orm import subqueryload, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db, get_async_read_db
+from app.paginacion import Pagina, CURSOR, LIMITE, paginar, pagina
 from app.empresas.models import Empresa
 from app.personas.models import Persona
 from app.actividades.models import Actividad
@@ -11,6 +14,12 @@ from datetime import datetime
 
 router = APIRouter(prefix="/ofertas", tags=["ofertas"])
 
+# Actividades de cada oferta con su nombre: una sola consulta para todas las
+# ofertas (repite la consulta de ofertas como subconsulta) con el nombre en
+# la misma (JOIN). Son 2 consultas por listado sea cual sea el tamaño de la
+# página; selectinload parte los ids en tandas de 500.
+CARGAR_ACTIVIDADES = subqueryload(OfertaEmpleo.actividades).joinedload(OfertaActividad.actividad)
+
 # Schemas para actividades de oferta
 class OfertaActividadBase(BaseModel):
     id_actividad: int
@@ -49,7 +58,7 @@ class OfertaResponse(OfertaBase):
 
 # Endpoints
 @router.post("/", response_model=OfertaResponse)
-async def crear_oferta(oferta: OfertaCreate, db: Session = Depends(get_db)):
+async def crear_oferta(oferta: OfertaCreate, db: AsyncSession = Depends(get_async_db)):
     try:
         if not oferta.id_empresa and not oferta.persona_dni:
             raise HTTPException(
@@ -58,12 +67,12 @@ async def crear_oferta(oferta: OfertaCreate, db: Session = Depends(get_db)):
             )
         
         if oferta.id_empresa:
-            empresa = db.query(Empresa).filter(Empresa.id_empresa == oferta.id_empresa).first()
+            empresa = await db.get(Empresa, oferta.id_empresa)
             if not empresa:
                 raise HTTPException(status_code=404, detail="Empresa no encontrada")
         
         if oferta.persona_dni:
-            persona = db.query(Persona).filter(Persona.dni == oferta.persona_dni).first()
+            persona = await db.get(Persona, oferta.persona_dni)
             if not persona:
                 raise HTTPException(status_code=404, detail="Persona no encontrada")
 
@@ -76,8 +85,8 @@ async def crear_oferta(oferta: OfertaCreate, db: Session = Depends(get_db)):
         )
 
         db.add(nueva_oferta)
-        db.commit()
-        db.refresh(nueva_oferta)
+        await db.commit()
+        await db.refresh(nueva_oferta)
 
         return OfertaResponse(
             id_oferta=nueva_oferta.id_oferta,
@@ -91,43 +100,49 @@ async def crear_oferta(oferta: OfertaCreate, db: Session = Depends(get_db)):
         )
         
     except HTTPException:
-        db.rollback()
+        await db.rollback()
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error al crear oferta: {str(e)}")
 
 
-@router.get("/", response_model=List[OfertaResponse])
+@router.get("/", response_model=Pagina[OfertaResponse])
 async def listar_ofertas(
-    skip: int = 0, 
-    limit: int = 100, 
+    cursor: Optional[str] = CURSOR,
+    limit: int = LIMITE,
     activa: bool = True,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
-    Listar ofertas de empleo
+    Listar ofertas de empleo, paginadas por cursor en orden de id_oferta
     """
     try:
-        ofertas = db.query(OfertaEmpleo).filter(OfertaEmpleo.activa == activa).offset(skip).limit(limit).all()
-        return ofertas
+        # En async las relaciones no se cargan solas al leerlas: se traen por adelantado
+        consulta = select(OfertaEmpleo).options(CARGAR_ACTIVIDADES).where(OfertaEmpleo.activa == activa)
+        ofertas = (await db.execute(
+            paginar(consulta, [OfertaEmpleo.id_oferta], cursor, limit)
+        )).scalars().all()
+        return pagina(ofertas, [OfertaEmpleo.id_oferta], limit)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener ofertas: {str(e)}")
 
 @router.get("/{id_oferta}", response_model=OfertaResponse)
-async def obtener_oferta(id_oferta: int, db: Session = Depends(get_db)):
+async def obtener_oferta(id_oferta: int, db: AsyncSession = Depends(get_async_db)):
     """
     Obtener una oferta específica por ID
     """
     try:
-        oferta = db.query(OfertaEmpleo).filter(OfertaEmpleo.id_oferta == id_oferta).first()
+        oferta = await db.get(OfertaEmpleo, id_oferta)
         if not oferta:
             raise HTTPException(status_code=404, detail="Oferta no encontrada")
         
         # Cargar actividades de la oferta
-        actividades = db.query(OfertaActividad).filter(
+        actividades = (await db.execute(select(OfertaActividad).options(joinedload(OfertaActividad.actividad)).where(
             OfertaActividad.id_oferta == id_oferta
-        ).all()
+        ))).scalars().all()
         
         response_data = OfertaResponse(
             id_oferta=oferta.id_oferta,
@@ -147,32 +162,44 @@ async def obtener_oferta(id_oferta: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Error al obtener oferta: {str(e)}")
 
 @router.get("/empresa/{id_empresa}", response_model=List[OfertaResponse])
-async def obtener_ofertas_empresa(id_empresa: int, db: Session = Depends(get_db)):
+async def obtener_ofertas_empresa(id_empresa: int, db: AsyncSession = Depends(get_async_db)):
     """
     Obtener ofertas de una empresa específica
     """
     try:
-        empresa = db.query(Empresa).filter(Empresa.id_empresa == id_empresa).first()
+        empresa = await db.get(Empresa, id_empresa)
         if not empresa:
             raise HTTPException(status_code=404, detail="Empresa no encontrada")
         
-        ofertas = db.query(OfertaEmpleo).filter(OfertaEmpleo.id_empresa == id_empresa).all()
+        ofertas = (await db.execute(
+            select(OfertaEmpleo)
+            .options(CARGAR_ACTIVIDADES)
+            .where(OfertaEmpleo.id_empresa == id_empresa)
+        )).scalars().all()
         return ofertas
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener ofertas: {str(e)}")
 
 @router.get("/persona/{persona_dni}", response_model=List[OfertaResponse])
-async def obtener_ofertas_persona(persona_dni: int, db: Session = Depends(get_db)):
+async def obtener_ofertas_persona(persona_dni: int, db: AsyncSession = Depends(get_async_db)):
     """
     Obtener ofertas de una persona específica
     """
     try:
-        persona = db.query(Persona).filter(Persona.dni == persona_dni).first()
+        persona = await db.get(Persona, persona_dni)
         if not persona:
             raise HTTPException(status_code=404, detail="Persona no encontrada")
         
-        ofertas = db.query(OfertaEmpleo).filter(OfertaEmpleo.persona_dni == persona_dni).all()
+        ofertas = (await db.execute(
+            select(OfertaEmpleo)
+            .options(CARGAR_ACTIVIDADES)
+            .where(OfertaEmpleo.persona_dni == persona_dni)
+        )).scalars().all()
         return ofertas
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener ofertas: {str(e)}")
 
@@ -180,13 +207,13 @@ async def obtener_ofertas_persona(persona_dni: int, db: Session = Depends(get_db
 async def actualizar_oferta(
     id_oferta: int, 
     oferta_update: OfertaBase, 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Actualizar una oferta existente
     """
     try:
-        oferta = db.query(OfertaEmpleo).filter(OfertaEmpleo.id_oferta == id_oferta).first()
+        oferta = await db.get(OfertaEmpleo, id_oferta)
         if not oferta:
             raise HTTPException(status_code=404, detail="Oferta no encontrada")
         
@@ -194,13 +221,13 @@ async def actualizar_oferta(
         oferta.descripcion = oferta_update.descripcion
         oferta.activa = oferta_update.activa
         
-        db.commit()
-        db.refresh(oferta)
+        await db.commit()
+        await db.refresh(oferta)
         
         # Cargar actividades para la respuesta
-        actividades = db.query(OfertaActividad).filter(
+        actividades = (await db.execute(select(OfertaActividad).options(joinedload(OfertaActividad.actividad)).where(
             OfertaActividad.id_oferta == id_oferta
-        ).all()
+        ))).scalars().all()
         
         response_data = OfertaResponse(
             id_oferta=oferta.id_oferta,
@@ -216,34 +243,34 @@ async def actualizar_oferta(
         return response_data
         
     except HTTPException:
-        db.rollback()
+        await db.rollback()
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error al actualizar oferta: {str(e)}")
 
 @router.delete("/{id_oferta}")
-async def eliminar_oferta(id_oferta: int, db: Session = Depends(get_db)):
+async def eliminar_oferta(id_oferta: int, db: AsyncSession = Depends(get_async_db)):
     """
     Eliminar una oferta
     """
     try:
-        oferta = db.query(OfertaEmpleo).filter(OfertaEmpleo.id_oferta == id_oferta).first()
+        oferta = await db.get(OfertaEmpleo, id_oferta)
         if not oferta:
             raise HTTPException(status_code=404, detail="Oferta no encontrada")
         
         # Primero eliminar las actividades relacionadas
-        db.query(OfertaActividad).filter(OfertaActividad.id_oferta == id_oferta).delete()
+        await db.execute(delete(OfertaActividad).where(OfertaActividad.id_oferta == id_oferta))
         
         # Luego eliminar la oferta
-        db.delete(oferta)
-        db.commit()
+        await db.delete(oferta)
+        await db.commit()
         
         return {"message": "Oferta eliminada correctamente"}
         
     except HTTPException:
-        db.rollback()
+        await db.rollback()
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error al eliminar oferta: {str(e)}")
\ No newline at end of file
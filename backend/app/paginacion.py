@@ -0,0 +1,91 @@
+"""
+Paginación por cursor (keyset) de los listados.
+
+Cada listado se ordena por una clave única (la clave primaria) y la página
+siguiente se pide con `WHERE clave > último_valor ORDER BY clave LIMIT n`:
+usa el índice de la clave y una página profunda cuesta lo mismo que la
+primera, a diferencia de OFFSET, que recorre y descarta todas las filas
+anteriores.
+
+El cursor es opaco para el cliente (base64 url-safe de los valores de la
+clave de la última fila devuelta). Todos los listados responden igual:
+
+    {"resultados": [...], "siguiente": "<cursor>" | null, "limit": n}
+
+`siguiente` es null en la última página; para seguir se repite el pedido
+con `?cursor=<siguiente>`.
+"""
+import json
+import base64
+import binascii
+from typing import Generic, List, Optional, TypeVar
+from fastapi import HTTPException, Query
+from pydantic import BaseModel
+from sqlalchemy import tuple_
+
+
+LIMITE_POR_DEFECTO = 100
+LIMITE_MAXIMO = 1000
+
+T = TypeVar("T")
+
+
+class Pagina(BaseModel, Generic[T]):
+    """Envoltorio común de los listados paginados"""
+    resultados: List[T]
+    siguiente: Optional[str] = None
+    limit: int
+
+
+# Parámetros de query compartidos por las rutas de listado
+CURSOR = Query(None, description="Valor de `siguiente` de la página anterior")
+LIMITE = Query(LIMITE_POR_DEFECTO, ge=1, le=LIMITE_MAXIMO, description="Máximo de resultados por página")
+
+
+def codificar_cursor(valores) -> str:
+    crudo = json.dumps(list(valores), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(crudo).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str, cantidad: int) -> list:
+    """Valores de la clave guardados en el cursor (400 si no es válido)"""
+    try:
+        crudo = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        valores = json.loads(crudo)
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    if (
+        not isinstance(valores, list) or len(valores) != cantidad
+        # Las claves de orden de los listados son ids enteros
+        or not all(isinstance(v, int) and not isinstance(v, bool) for v in valores)
+    ):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    return valores
+
+
+def paginar(consulta, columnas, cursor: Optional[str], limit: int):
+    """
+    Aplica el cursor a una consulta (select() o Query): filtra las filas
+    posteriores al cursor, ordena por `columnas` y trae limit + 1 filas (la
+    de más indica que hay otra página).
+    """
+    if cursor:
+        valores = decodificar_cursor(cursor, len(columnas))
+        if len(columnas) == 1:
+            consulta = consulta.filter(columnas[0] > valores[0])
+        else:
+            consulta = consulta.filter(tuple_(*columnas) > tuple_(*valores))
+    return consulta.order_by(*columnas).limit(limit + 1)
+
+
+def pagina(filas, columnas, limit: int) -> dict:
+    """Respuesta de un listado a partir de las filas que trajo paginar()"""
+    filas = list(filas)
+    siguiente = None
+    if len(filas) > limit:
+        filas = filas[:limit]
+        ultima = filas[-1]
+        siguiente = codificar_cursor(
+            ultima[c.key] if isinstance(ultima, dict) else getattr(ultima, c.key) for c in columnas
+        )
+    return {"resultados": filas, "siguiente": siguiente, "limit": limit}
@@ -1,6 +1,6 @@
 from sqlalchemy import Column, Integer, String, Date, Boolean
 from app.database import Base
-from pydantic import BaseModel, validator, field_serializer
+from pydantic import BaseModel, validator, field_validator, field_serializer
 from typing import Optional
 from datetime import date, datetime
 
@@ -68,6 +68,14 @@ class PersonaResponse(BaseModel):
     telefono: Optional[str] = None
     activa: bool
 
+    # La columna es Date: se convierte a texto antes de validar
+    @field_validator('fecha_nacimiento', mode='before')
+    @classmethod
+    def fecha_nacimiento_a_texto(cls, value):
+        if isinstance(value, (date, datetime)):
+            return value.isoformat()
+        return value
+
     #  Convierte datetime.date a string
     @field_serializer('fecha_nacimiento')
     def serialize_fecha_nacimiento(self, value: any, _info) -> str:
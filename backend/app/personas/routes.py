@@ -1,7 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from .models import Persona, PersonaCreate, PersonaUpdate, PersonaResponse 
-from app.database import get_db
+from app.database import get_db, get_read_db
+from app.autenticacion.perfiles import invalidar_perfil_persona
+from app.paginacion import Pagina, CURSOR, LIMITE, paginar, pagina
+from typing import Optional
 
 
 router = APIRouter(prefix="/personas", tags=["Personas"])
@@ -28,9 +31,11 @@ def obtener_persona(dni: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Persona no encontrada")
     return persona
 
-@router.get("/", response_model=list[PersonaResponse])  # ← Quita "/personas/" de aquí
-def listar_personas(db: Session = Depends(get_db)):
-    return db.query(Persona).all()
+@router.get("/", response_model=Pagina[PersonaResponse])  # ← Quita "/personas/" de aquí
+def listar_personas(cursor: Optional[str] = CURSOR, limit: int = LIMITE, db: Session = Depends(get_read_db)):
+    # Paginado por cursor sobre el DNI (ver app/paginacion.py)
+    personas = paginar(db.query(Persona), [Persona.dni], cursor, limit).all()
+    return pagina(personas, [Persona.dni], limit)
 
 @router.put("/{dni}", response_model=PersonaResponse)  # ← Quita "/personas/" de aquí
 def actualizar_persona(dni: int, persona_actualizada: PersonaUpdate, db: Session = Depends(get_db)):
@@ -47,5 +52,6 @@ def actualizar_persona(dni: int, persona_actualizada: PersonaUpdate, db: Session
     
     db.commit()
     db.refresh(persona_existente)
+    invalidar_perfil_persona(dni)  # el perfil en caché de /usuario/completo quedó viejo
     
     return persona_existente
\ No newline at end of file
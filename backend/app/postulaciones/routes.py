@@ -1,6 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db, get_async_read_db
+from app.paginacion import Pagina, CURSOR, LIMITE, paginar, pagina
 from .models import Postulacion
 from app.personas.models import Persona
 from app.ofertas.models import OfertaEmpleo
@@ -27,72 +29,76 @@ class PostulacionResponse(PostulacionBase):
         from_attributes = True
 
 # Endpoints CRUD
-@router.get("/", response_model=List[PostulacionResponse])
+@router.get("/", response_model=Pagina[PostulacionResponse])
 async def listar_postulaciones(
-    skip: int = 0, 
-    limit: int = 100, 
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = CURSOR,
+    limit: int = LIMITE,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Listar todas las postulaciones"""
+    """Listar todas las postulaciones, paginadas por cursor en orden de id"""
     try:
-        postulaciones = db.query(Postulacion).offset(skip).limit(limit).all()
-        return postulaciones
+        postulaciones = (await db.execute(
+            paginar(select(Postulacion), [Postulacion.id], cursor, limit)
+        )).scalars().all()
+        return pagina(postulaciones, [Postulacion.id], limit)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(500, f"Error al obtener postulaciones: {str(e)}")
 
 @router.post("/", response_model=PostulacionResponse)
-async def crear_postulacion(postulacion: PostulacionCreate, db: Session = Depends(get_db)):
+async def crear_postulacion(postulacion: PostulacionCreate, db: AsyncSession = Depends(get_async_db)):
     """Crear una nueva postulación"""
     try:
         # Verificar si ya existe
-        existente = db.query(Postulacion).filter(
+        existente = (await db.execute(select(Postulacion).where(
             Postulacion.dni == postulacion.dni,
             Postulacion.id_oferta == postulacion.id_oferta
-        ).first()
+        ))).scalars().first()
         
         if existente:
             raise HTTPException(400, "Ya existe una postulación para esta persona y oferta")
         
         nueva_postulacion = Postulacion(**postulacion.dict())
         db.add(nueva_postulacion)
-        db.commit()
-        db.refresh(nueva_postulacion)
+        await db.commit()
+        await db.refresh(nueva_postulacion)
         
         return nueva_postulacion
         
     except HTTPException:
-        db.rollback()
+        await db.rollback()
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(500, f"Error al crear postulación: {str(e)}")
     
 @router.delete("/{dni}/{id_oferta}")
-async def eliminar_postulacion(dni: int, id_oferta: int, db: Session = Depends(get_db)):
+async def eliminar_postulacion(dni: int, id_oferta: int, db: AsyncSession = Depends(get_async_db)):
     """Eliminar una postulación por DNI e id_oferta"""
     try:
-        postulacion = db.query(Postulacion).filter(
+        postulacion = (await db.execute(select(Postulacion).where(
             Postulacion.dni == dni,
             Postulacion.id_oferta == id_oferta
-        ).first()
+        ))).scalars().first()
 
         if not postulacion:
             raise HTTPException(404, "Postulación no encontrada")
 
-        db.delete(postulacion)
-        db.commit()
+        await db.delete(postulacion)
+        await db.commit()
 
         return {"mensaje": "Postulación eliminada correctamente"}
 
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(500, f"Error al eliminar postulación: {str(e)}")
     
 
 @router.get("/empresa/{id_empresa}")
-async def obtener_postulaciones_empresa(id_empresa: int, db: Session = Depends(get_db)):
-    resultados = (
-        db.query(
+async def obtener_postulaciones_empresa(id_empresa: int, db: AsyncSession = Depends(get_async_read_db)):
+    resultados = (await db.execute(
+        select(
             Postulacion.id,
             Postulacion.estado,
             Postulacion.creado_en,
@@ -108,9 +114,8 @@ async def obtener_postulaciones_empresa(id_empresa: int, db: Session = Depends(g
         )
         .join(Persona, Persona.dni == Postulacion.dni)
         .join(OfertaEmpleo, OfertaEmpleo.id_oferta == Postulacion.id_oferta)
-        .filter(OfertaEmpleo.id_empresa == id_empresa)
-        .all()
-    )
+        .where(OfertaEmpleo.id_empresa == id_empresa)
+    )).all()
 
     return [
         {
@@ -135,14 +140,14 @@ async def obtener_postulaciones_empresa(id_empresa: int, db: Session = Depends(g
     ]
 
 @router.put("/{id_postulacion}/estado")
-async def actualizar_estado(id_postulacion: int, estado: str, db: Session = Depends(get_db)):
-    postulacion = db.query(Postulacion).filter(Postulacion.id == id_postulacion).first()
+async def actualizar_estado(id_postulacion: int, estado: str, db: AsyncSession = Depends(get_async_db)):
+    postulacion = await db.get(Postulacion, id_postulacion)
 
     if not postulacion:
         raise HTTPException(404, "Postulación no encontrada")
 
     postulacion.estado = estado
-    db.commit()
-    db.refresh(postulacion)
+    await db.commit()
+    await db.refresh(postulacion)
 
     return {"mensaje": "Estado actualizado", "estado": postulacion.estado}
@@ -0,0 +1,231 @@
+"""
+Escritura de los archivos .pl de hechos en snapshots.
+
+Cada generación se escribe en snapshots/<id>/ (hechos, ofertas, relaciones,
+postulaciones, segmentos de diario y manifiesto.json con el hash de cada
+archivo); publicacion_hechos la publica cambiando el enlace "actual". Los
+archivos que no cambian se enlazan (enlace duro) desde el snapshot vigente.
+"""
+import os
+import re
+import json
+import time
+import uuid
+import shutil
+import hashlib
+from itertools import chain
+from app.prolog.formato_hechos import TABLAS
+
+
+# Volumen compartido con el motor Prolog (allí se monta como /app/data)
+DIRECTORIO_DATOS = os.getenv("PROLOG_DATA_DIR", "/app/prolog_data")
+
+ARCHIVOS = ("hechos", "ofertas", "relaciones", "postulaciones")
+
+
+# Las rutas se calculan en cada llamada a partir de DIRECTORIO_DATOS
+def directorio_snapshots():
+    return os.path.join(DIRECTORIO_DATOS, "snapshots")
+
+
+def enlace_actual():
+    return os.path.join(DIRECTORIO_DATOS, "actual")
+
+
+# -------------------------
+# SNAPSHOTS
+# -------------------------
+def ruta_vigente(archivo):
+    """Ruta publicada de un archivo: snapshot vigente, o ruta plana si no hay enlace"""
+    base = enlace_actual() if os.path.isdir(enlace_actual()) else DIRECTORIO_DATOS
+    return os.path.join(base, archivo)
+
+
+def manifiesto_vigente():
+    """Manifiesto (id y hash de contenido por archivo) del snapshot publicado ({} si no hay)"""
+    try:
+        with open(ruta_vigente("manifiesto.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def nuevo_snapshot():
+    ruta = os.path.join(directorio_snapshots(), f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}")
+    os.makedirs(ruta)
+    return ruta
+
+
+def escribir(snapshot, nombre, lineas):
+    """
+    Escribe las líneas (cualquier iterable, p. ej. un generador) en el
+    snapshot, calculando el hash del contenido mientras se escribe.
+    Devuelve (cantidad de líneas, sha256).
+    """
+    digest = hashlib.sha256()
+    total = 0
+    with open(os.path.join(snapshot, f"{nombre}.pl"), "w", encoding="utf-8") as f:
+        for linea in lineas:
+            trozo = ("\n" if total else "") + linea
+            f.write(trozo)
+            digest.update(trozo.encode("utf-8"))
+            total += 1
+    print(f"✅ {nombre}.pl generado en: {snapshot}")
+    return total, digest.hexdigest()
+
+
+def hash_lineas(lineas):
+    """sha256 del archivo que escribir() generaría con estas líneas"""
+    return hashlib.sha256("\n".join(lineas).encode("utf-8")).hexdigest()
+
+
+def _hash_archivo(ruta):
+    digest = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 16), b""):
+            digest.update(bloque)
+    return digest.hexdigest()
+
+
+def enlazar(snapshot, archivo):
+    """Enlace duro al archivo del snapshot vigente (o copia si no se puede)"""
+    origen = os.path.realpath(ruta_vigente(archivo))
+    destino = os.path.join(snapshot, archivo)
+    try:
+        os.link(origen, destino)
+    except OSError:
+        shutil.copyfile(origen, destino)
+    return destino
+
+
+def reutilizar(snapshot, nombre, anteriores):
+    """Archivo sin cambios: enlace duro al del snapshot vigente (o copia)"""
+    destino = enlazar(snapshot, f"{nombre}.pl")
+    return anteriores.get(nombre) or _hash_archivo(destino)
+
+
+# Extrae predicado y primeros argumentos de una línea de hecho: persona(123, ...
+_PATRON_HECHO = re.compile(r"^(\w+)\(([^,)]+)(?:,\s*([^,)]+))?")
+# Operación de delta: retractall(Hecho). o assertz(Hecho).
+_PATRON_OPERACION = re.compile(r"^(retractall|assertz)\((.*)\)\.$")
+
+_ARIDAD_CLAVE = {spec["predicado"]: len(spec["claves"]) for spec in TABLAS}
+_ARCHIVO_PREDICADO = {spec["predicado"]: spec["archivo"] for spec in TABLAS}
+
+
+def _clave_hecho(hecho):
+    """(predicado, clave) de un hecho exportado, o None si no es uno"""
+    m = _PATRON_HECHO.match(hecho)
+    if not m or m.group(1) not in _ARIDAD_CLAVE:
+        return None
+    try:
+        return m.group(1), tuple(int(g) for g in m.groups()[1:1 + _ARIDAD_CLAVE[m.group(1)]])
+    except (TypeError, ValueError):
+        return None
+
+
+def _parchear(snapshot, nombre, tocados, nuevas_lineas):
+    """
+    Aplica un delta sobre el archivo vigente sin releer la base: descarta
+    las líneas cuyos hechos fueron modificados/borrados y agrega las nuevas
+    al final, escribiendo línea a línea en el nuevo snapshot.
+    Devuelve el sha256 del resultado.
+    """
+    def lineas():
+        with open(ruta_vigente(f"{nombre}.pl"), "r", encoding="utf-8") as entrada:
+            for linea in entrada:
+                linea = linea.rstrip("\n")
+                if _clave_hecho(linea) in tocados:
+                    continue
+                yield linea
+        yield from nuevas_lineas
+
+    _, digest = escribir(snapshot, nombre, lineas())
+    return digest
+
+
+# -------------------------
+# DIARIO DE DELTAS
+# Cada delta no reescribe hechos.pl / ofertas.pl / postulaciones.pl: esos
+# archivos se enlazan tal cual y las operaciones se agregan al snapshot como
+# un segmento diario-NNNNNN.pl (Prolog los aplica en orden después de cargar
+# los archivos). Los segmentos anteriores también se enlazan, así publicar
+# un delta cuesta lo que el delta. Cuando el diario supera DIARIO_MAXIMO
+# operaciones se compacta: se parchean los archivos (lo único que recorre
+# los archivos enteros) y el diario vuelve a empezar.
+# -------------------------
+DIARIO_MAXIMO = int(os.getenv("PROLOG_DIARIO_MAXIMO", "20000"))
+
+PATRON_DIARIO = re.compile(r"^diario-\d{6}\.pl$")
+
+
+def _operaciones_diario(diario):
+    """Operaciones de los segmentos del snapshot vigente, en orden"""
+    for segmento in diario:
+        with open(ruta_vigente(segmento), "r", encoding="utf-8") as f:
+            for linea in f:
+                if linea.strip():
+                    yield linea.rstrip("\n")
+
+
+def _compactar(snapshot, anteriores, operaciones):
+    """
+    Aplica las operaciones (diario vigente + delta nuevo) sobre los archivos
+    y devuelve los hashes de los tres archivos de hechos.
+    """
+    tocados = {nombre: set() for nombre in ARCHIVOS}
+    nuevas = {nombre: {} for nombre in ARCHIVOS}   # (predicado, clave) -> [hechos]
+    for operacion in operaciones:
+        m = _PATRON_OPERACION.match(operacion)
+        clave = _clave_hecho(m.group(2)) if m else None
+        if clave is None:
+            continue
+        archivo = _ARCHIVO_PREDICADO[clave[0]]
+        if m.group(1) == "retractall":
+            tocados[archivo].add(clave)
+            nuevas[archivo].pop(clave, None)
+        else:
+            nuevas[archivo].setdefault(clave, []).append(f"{m.group(2)}.")
+
+    hashes = {}
+    for nombre in ("hechos", "ofertas", "postulaciones"):
+        if tocados[nombre]:
+            hashes[nombre] = _parchear(
+                snapshot, nombre, tocados[nombre], chain.from_iterable(nuevas[nombre].values())
+            )
+        else:
+            hashes[nombre] = reutilizar(snapshot, nombre, anteriores)
+    return hashes
+
+
+def escribir_hechos_delta(snapshot, anteriores, operaciones, archivos_tocados):
+    """
+    Arma hechos / ofertas / postulaciones del snapshot de un delta: enlaza
+    los archivos y el diario vigentes y agrega las operaciones como un
+    segmento nuevo (o compacta). Devuelve la parte del manifiesto.
+    """
+    diario = list(anteriores.get("diario", []))
+    pendientes = anteriores.get("operaciones_diario", 0) + len(operaciones)
+
+    if operaciones and pendientes > DIARIO_MAXIMO:
+        print(f"🗜️  Compactando diario de hechos ({pendientes} operaciones)")
+        hashes = _compactar(snapshot, anteriores, chain(_operaciones_diario(diario), operaciones))
+        return {**hashes, "diario": [], "diario_archivos": [], "operaciones_diario": 0}
+
+    manifiesto = {
+        nombre: reutilizar(snapshot, nombre, anteriores)
+        for nombre in ("hechos", "ofertas", "postulaciones")
+    }
+    for segmento in diario:
+        enlazar(snapshot, segmento)
+    if operaciones:
+        segmento = f"diario-{len(diario) + 1:06d}"
+        escribir(snapshot, segmento, operaciones)
+        diario.append(f"{segmento}.pl")
+    return {
+        **manifiesto,
+        "diario": diario,
+        # Archivos cuyo contenido en memoria de Prolog no es el del archivo
+        "diario_archivos": sorted(set(anteriores.get("diario_archivos", [])) | set(archivos_tocados)),
+        "operaciones_diario": pendientes if operaciones else anteriores.get("operaciones_diario", 0),
+    }
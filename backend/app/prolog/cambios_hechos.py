@@ -0,0 +1,186 @@
+"""
+Registro de cambios de hechos (tabla cambios_hechos) y su lectura.
+
+Un trigger por tabla exportada (y por relaciones_aprendidas) anota la clave
+de cada fila insertada, modificada o borrada junto con el txid de la
+transacción. La generación incremental lee solo esas claves (índice por
+txid) y busca las filas por clave: su costo depende de lo que cambió y no
+del tamaño de las tablas. El mismo DDL está en init_database.sql.
+"""
+import os
+from sqlalchemy import text
+from app.database import engine
+from app.prolog.formato_hechos import TABLAS, TABLA_RELACIONES
+
+
+# Segundos que se conservan las anotaciones; una generación más vieja que la
+# mitad de este plazo ya no puede seguir en modo incremental
+CAMBIOS_HECHOS_RETENCION = float(os.getenv("CAMBIOS_HECHOS_RETENCION", "86400"))
+
+# Clave del advisory lock que serializa el DDL entre workers que arrancan juntos
+_LOCK_DDL = 72519302
+
+# Tablas con trigger y las columnas de su clave
+TABLAS_REGISTRADAS = [(spec["tabla"], spec["claves"]) for spec in TABLAS] + [(TABLA_RELACIONES, ["id"])]
+
+DDL_CAMBIOS = [
+    """
+    CREATE TABLE IF NOT EXISTS cambios_hechos (
+        id          BIGSERIAL PRIMARY KEY,
+        txid        BIGINT NOT NULL DEFAULT txid_current(),
+        tabla       TEXT NOT NULL,
+        clave       JSONB NOT NULL,
+        registrado  TIMESTAMPTZ NOT NULL DEFAULT now()
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_cambios_hechos_txid ON cambios_hechos(txid)",
+    "CREATE INDEX IF NOT EXISTS idx_cambios_hechos_registrado ON cambios_hechos(registrado)",
+    # Argumentos del trigger: columnas de la clave. Un UPDATE anota la clave
+    # vieja y la nueva (si cambió la clave, la vieja es un borrado)
+    """
+    CREATE OR REPLACE FUNCTION registrar_cambio_hecho() RETURNS trigger AS $$
+    DECLARE
+        anterior JSONB;
+        nueva JSONB;
+    BEGIN
+        IF TG_OP <> 'INSERT' THEN
+            SELECT jsonb_agg(to_jsonb(OLD) -> c ORDER BY i) INTO anterior
+            FROM unnest(TG_ARGV) WITH ORDINALITY AS a(c, i);
+        END IF;
+        IF TG_OP <> 'DELETE' THEN
+            SELECT jsonb_agg(to_jsonb(NEW) -> c ORDER BY i) INTO nueva
+            FROM unnest(TG_ARGV) WITH ORDINALITY AS a(c, i);
+        END IF;
+        INSERT INTO cambios_hechos (tabla, clave)
+        SELECT DISTINCT TG_TABLE_NAME, k FROM (VALUES (anterior), (nueva)) AS v(k)
+        WHERE k IS NOT NULL;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    # TRUNCATE no dispara triggers por fila: se anota clave null y la
+    # próxima generación es completa
+    """
+    CREATE OR REPLACE FUNCTION registrar_vaciado_hecho() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO cambios_hechos (tabla, clave) VALUES (TG_TABLE_NAME, 'null');
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+]
+
+
+def _ddl_triggers(tabla, claves):
+    argumentos = ", ".join(f"'{c}'" for c in claves)
+    return [
+        f"DROP TRIGGER IF EXISTS trg_cambios_hechos ON {tabla}",
+        f"""
+        CREATE TRIGGER trg_cambios_hechos
+            AFTER INSERT OR UPDATE OR DELETE ON {tabla}
+            FOR EACH ROW EXECUTE FUNCTION registrar_cambio_hecho({argumentos})
+        """,
+        f"DROP TRIGGER IF EXISTS trg_vaciado_hechos ON {tabla}",
+        f"""
+        CREATE TRIGGER trg_vaciado_hechos
+            AFTER TRUNCATE ON {tabla}
+            FOR EACH STATEMENT EXECUTE FUNCTION registrar_vaciado_hecho()
+        """,
+    ]
+
+
+# Los triggers están instalados (si no, el modo incremental hace
+# generaciones completas)
+_registro = {"activo": False}
+
+
+def registro_activo():
+    return _registro["activo"]
+
+
+def preparar_registro_cambios(engine):
+    """
+    Crea cambios_hechos y sus triggers (idempotente). Devuelve False si
+    falló: sin registro el modo incremental hace generaciones completas.
+    """
+    try:
+        with engine.begin() as conexion:
+            conexion.exec_driver_sql(f"SELECT pg_advisory_xact_lock({_LOCK_DDL})")
+            for sentencia in DDL_CAMBIOS + [
+                d for tabla, claves in TABLAS_REGISTRADAS for d in _ddl_triggers(tabla, claves)
+            ]:
+                conexion.exec_driver_sql(sentencia)
+        _registro["activo"] = True
+        print("✅ Registro de cambios de hechos listo")
+        return True
+    except Exception as e:
+        print(f"❌ No se pudo preparar el registro de cambios de hechos: {e}")
+        return False
+
+
+def purgar_cambios():
+    """Borra las anotaciones más viejas que CAMBIOS_HECHOS_RETENCION (índice por fecha)"""
+    try:
+        with engine.begin() as conexion:
+            conexion.execute(text(
+                "DELETE FROM cambios_hechos WHERE registrado < now() - make_interval(secs => :segundos)"
+            ), {"segundos": CAMBIOS_HECHOS_RETENCION})
+    except Exception as e:
+        print(f"⚠️ No se pudo purgar cambios_hechos: {e}")
+
+
+def leer_hwm(db):
+    """
+    Transacción más antigua aún en curso: todo cambio anotado con un txid
+    menor ya es visible. Es el txid de 64 bits (con época): no da la vuelta.
+    """
+    return db.execute(text("SELECT txid_snapshot_xmin(txid_current_snapshot()) AS hwm")).scalar()
+
+
+# Filas por lote al leer con cursor del lado del servidor
+LOTE_FILAS = int(os.getenv("GENERADOR_LOTE_FILAS", "1000"))
+
+
+def filas(db, sql, params=None):
+    """
+    Itera las filas de una consulta con un cursor del lado del servidor,
+    de a LOTE_FILAS: la memoria no depende del tamaño de la tabla.
+    """
+    resultado = db.execute(
+        text(sql).execution_options(stream_results=True, yield_per=LOTE_FILAS),
+        params or {}
+    )
+    for lote in resultado.partitions():
+        yield from lote
+
+
+def leer_cambios(db, hwm):
+    """
+    {tabla: {clave}} anotadas desde la marca de agua hwm (índice por txid).
+    None si alguna tabla se vació con TRUNCATE.
+    """
+    cambios = {tabla: set() for tabla, _ in TABLAS_REGISTRADAS}
+    for tabla, clave in filas(
+        db,
+        "SELECT DISTINCT tabla, clave FROM cambios_hechos WHERE txid >= :hwm",
+        {"hwm": hwm}
+    ):
+        if clave is None:
+            return None
+        if tabla in cambios:
+            cambios[tabla].add(tuple(clave))
+    return cambios
+
+
+def filas_por_clave(db, spec, claves):
+    """Filas vigentes con las claves pedidas, de a LOTE_FILAS claves por consulta"""
+    vigente = f' AND {spec["vigente"]}' if spec.get("vigente") else ""
+    arreglos = ", ".join(f"CAST(:k{i} AS bigint[])" for i in range(len(spec["claves"])))
+    sql = text(
+        f'SELECT {spec["columnas"]} FROM {spec["tabla"]} '
+        f'WHERE ({", ".join(spec["claves"])}) IN (SELECT * FROM unnest({arreglos})){vigente}'
+    )
+    claves = sorted(claves)
+    for inicio in range(0, len(claves), LOTE_FILAS):
+        lote = claves[inicio:inicio + LOTE_FILAS]
+        yield from db.execute(sql, {f"k{i}": [c[i] for c in lote] for i in range(len(spec["claves"]))})
@@ -0,0 +1,254 @@
+"""
+Cliente HTTP compartido para todas las llamadas al motor Prolog.
+
+Una única requests.Session con pool de conexiones keep-alive, timeouts por
+endpoint y reintentos con backoff, en lugar de abrir una conexión TCP nueva
+en cada requests.get/post. Todo es configurable por variables de entorno.
+
+Para rutas `async def` hay una variante sobre httpx.AsyncClient (pedir_async,
+get_async, post_async, stream_async) con la misma configuración y estadísticas:
+la espera a Prolog no bloquea el event loop del worker.
+"""
+import os
+import time
+import threading
+from contextlib import asynccontextmanager
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+PROLOG_URL = os.getenv("PROLOG_URL", "http://prolog-engine:4000")
+
+# Pool: conexiones conservadas abiertas (keep-alive) hacia el motor
+POOL_CONEXIONES = int(os.getenv("PROLOG_POOL_CONEXIONES", "20"))
+# Si el pool está lleno, esperar una conexión libre en vez de abrir otra
+POOL_BLOQUEANTE = os.getenv("PROLOG_POOL_BLOQUEANTE", "false").lower() == "true"
+
+# Reintentos: errores de conexión (el pedido no llegó a enviarse) en cualquier
+# método; respuestas 502/503/504 solo en GET, que son idempotentes
+REINTENTOS = int(os.getenv("PROLOG_REINTENTOS", "2"))
+BACKOFF = float(os.getenv("PROLOG_BACKOFF", "0.2"))
+
+# Timeouts en segundos: (conexión, lectura). La lectura se define por
+# endpoint y se puede sobreescribir con PROLOG_TIMEOUT_<ENDPOINT>
+TIMEOUT_CONEXION = float(os.getenv("PROLOG_TIMEOUT_CONEXION", "2"))
+TIMEOUT_LECTURA = float(os.getenv("PROLOG_TIMEOUT", "10"))
+TIMEOUTS = {
+    "expandir": 2,
+    "status": 5,
+    "version_hechos": 5,
+    "relaciones_aprendidas": 10,
+    "reload_hechos": 10,
+    "aplicar_delta": 10,
+    "matching_lote": 30,
+    "upload_hechos": 30,
+    "aprender": 30,
+}
+
+
+def _crear_sesion():
+    reintentos = Retry(
+        total=REINTENTOS,
+        connect=REINTENTOS,
+        read=0,
+        status=REINTENTOS,
+        backoff_factor=BACKOFF,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        raise_on_status=False,
+    )
+    adaptador = HTTPAdapter(
+        pool_connections=1,                # un solo host: el motor Prolog
+        pool_maxsize=POOL_CONEXIONES,
+        pool_block=POOL_BLOQUEANTE,
+        max_retries=reintentos,
+    )
+    sesion = requests.Session()
+    sesion.mount("http://", adaptador)
+    sesion.mount("https://", adaptador)
+    return sesion, adaptador
+
+
+_sesion, _adaptador = _crear_sesion()
+
+_lock = threading.Lock()
+_estadisticas = {}
+
+
+def timeout(endpoint: str):
+    """Timeout (conexión, lectura) para un endpoint del motor"""
+    variable = "PROLOG_TIMEOUT_" + endpoint.upper()
+    lectura = float(os.getenv(variable, TIMEOUTS.get(endpoint, TIMEOUT_LECTURA)))
+    return (TIMEOUT_CONEXION, lectura)
+
+
+def _registrar(endpoint, segundos, error):
+    with _lock:
+        e = _estadisticas.setdefault(endpoint, {"pedidos": 0, "errores": 0, "segundos": 0.0})
+        e["pedidos"] += 1
+        e["segundos"] += segundos
+        if error:
+            e["errores"] += 1
+
+
+def pedir(metodo: str, endpoint: str, **kwargs) -> requests.Response:
+    """
+    Hace un pedido al motor Prolog por el pool compartido.
+    `endpoint` es la ruta sin barra inicial (p. ej. "matching"); el timeout
+    se toma de la configuración salvo que se pase explícitamente.
+    """
+    kwargs.setdefault("timeout", timeout(endpoint))
+    inicio = time.perf_counter()
+    error = True
+    try:
+        respuesta = _sesion.request(metodo, f"{PROLOG_URL}/{endpoint}", **kwargs)
+        error = respuesta.status_code >= 500
+        return respuesta
+    finally:
+        _registrar(endpoint, time.perf_counter() - inicio, error)
+
+
+def get(endpoint: str, **kwargs) -> requests.Response:
+    return pedir("GET", endpoint, **kwargs)
+
+
+def post(endpoint: str, **kwargs) -> requests.Response:
+    return pedir("POST", endpoint, **kwargs)
+
+
+# -------------------------
+# CLIENTE ASÍNCRONO (httpx)
+# -------------------------
+_cliente_async = None
+
+
+def _obtener_cliente_async():
+    global _cliente_async
+    if _cliente_async is None or _cliente_async.is_closed:
+        _cliente_async = httpx.AsyncClient(
+            base_url=PROLOG_URL,
+            # httpx reintenta solo errores de conexión, igual que los POST del cliente sincrónico.
+            # Con un transport propio los límites van en el transport: los de
+            # AsyncClient(limits=...) solo se usan para el transport por defecto
+            transport=httpx.AsyncHTTPTransport(
+                retries=REINTENTOS,
+                limits=httpx.Limits(
+                    max_connections=POOL_CONEXIONES,
+                    max_keepalive_connections=POOL_CONEXIONES,
+                ),
+            ),
+        )
+    return _cliente_async
+
+
+def _timeout_async(endpoint):
+    conexion, lectura = timeout(endpoint)
+    return httpx.Timeout(lectura, connect=conexion)
+
+
+async def pedir_async(metodo: str, endpoint: str, **kwargs) -> httpx.Response:
+    """Versión asíncrona de pedir(): mismo pool de configuración y estadísticas"""
+    kwargs.setdefault("timeout", _timeout_async(endpoint))
+    inicio = time.perf_counter()
+    error = True
+    try:
+        respuesta = await _obtener_cliente_async().request(metodo, f"/{endpoint}", **kwargs)
+        error = respuesta.status_code >= 500
+        return respuesta
+    finally:
+        _registrar(endpoint, time.perf_counter() - inicio, error)
+
+
+async def get_async(endpoint: str, **kwargs) -> httpx.Response:
+    return await pedir_async("GET", endpoint, **kwargs)
+
+
+async def post_async(endpoint: str, **kwargs) -> httpx.Response:
+    return await pedir_async("POST", endpoint, **kwargs)
+
+
+@asynccontextmanager
+async def stream_async(metodo: str, endpoint: str, **kwargs):
+    """
+    Pedido con respuesta en streaming: `async with stream_async(...) as r`.
+    Se registra en las estadísticas al cerrar la respuesta (el tiempo incluye
+    la lectura del cuerpo).
+    """
+    kwargs.setdefault("timeout", _timeout_async(endpoint))
+    inicio = time.perf_counter()
+    error = True
+    try:
+        async with _obtener_cliente_async().stream(metodo, f"/{endpoint}", **kwargs) as respuesta:
+            error = respuesta.status_code >= 500
+            yield respuesta
+    except Exception:
+        error = True
+        raise
+    finally:
+        _registrar(endpoint, time.perf_counter() - inicio, error)
+
+
+async def cerrar_async():
+    """Cierra las conexiones del cliente asíncrono (al apagar la aplicación)"""
+    global _cliente_async
+    if _cliente_async is not None:
+        await _cliente_async.aclose()
+        _cliente_async = None
+
+
+def _estadisticas_async():
+    if _cliente_async is None or _cliente_async.is_closed:
+        return {"abierto": False}
+    # Pool interno de httpcore (no es API pública: se lee con cuidado)
+    pool = getattr(getattr(_cliente_async, "_transport", None), "_pool", None)
+    conexiones = list(getattr(pool, "connections", []))
+    return {
+        "abierto": True,
+        "conexiones_abiertas": len(conexiones),
+        "conexiones_ociosas": sum(1 for c in conexiones if c.is_idle()),
+    }
+
+
+def estadisticas():
+    """Estado del pool de conexiones y contadores por endpoint"""
+    pools = []
+    for clave in list(_adaptador.poolmanager.pools.keys()):
+        pool = _adaptador.poolmanager.pools.get(clave)
+        if pool is None:
+            continue
+        # La cola del pool guarda conexiones abiertas o None (lugar libre sin conexión)
+        cola = list(pool.pool.queue) if pool.pool is not None else []
+        pools.append({
+            "host": f"{pool.scheme}://{pool.host}:{pool.port}",
+            "conexiones_creadas": pool.num_connections,
+            "pedidos_enviados": pool.num_requests,
+            "conexiones_en_uso": POOL_CONEXIONES - len(cola),
+            "conexiones_ociosas": sum(1 for c in cola if c is not None),
+        })
+
+    with _lock:
+        endpoints = {
+            nombre: {
+                "pedidos": e["pedidos"],
+                "errores": e["errores"],
+                "tiempo_promedio_ms": round(e["segundos"] / e["pedidos"] * 1000, 2) if e["pedidos"] else 0,
+            }
+            for nombre, e in _estadisticas.items()
+        }
+
+    return {
+        "prolog_url": PROLOG_URL,
+        "configuracion": {
+            "pool_conexiones": POOL_CONEXIONES,
+            "pool_bloqueante": POOL_BLOQUEANTE,
+            "reintentos": REINTENTOS,
+            "backoff": BACKOFF,
+            "timeout_conexion": TIMEOUT_CONEXION,
+            "timeout_lectura": TIMEOUT_LECTURA,
+        },
+        "pools": pools,
+        "pool_async": _estadisticas_async(),
+        "endpoints": endpoints,
+    }
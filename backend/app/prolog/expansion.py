@@ -0,0 +1,295 @@
+"""
+Servicio de expansión semántica de palabras (detrás de MotorProlog.expandir).
+
+  - Caché por palabra con TTL: la misma palabra buscada segundos después no
+    vuelve a ir a Prolog. Las palabras que no están en caché se piden juntas
+    en un solo POST /expandir (con por_palabra: true, Prolog devuelve además
+    la expansión de cada una) y sus expansiones se guardan tal como las
+    devuelve Prolog, igual que antes de la caché.
+  - Interruptor (circuit breaker): tras EXPANSION_FALLOS_MAXIMOS errores
+    seguidos de /expandir se deja de llamar a Prolog por EXPANSION_PAUSA
+    segundos; pasado ese tiempo se prueba con un pedido y, si responde, se
+    vuelve a usar.
+  - Expansión local: si Prolog no está disponible se expande con el grafo de
+    relaciones_aprendidas (recorrido en anchura hasta EXPANSION_PROFUNDIDAD
+    saltos, multiplicando confianzas y descartando lo que queda por debajo de
+    EXPANSION_CONFIANZA_MINIMA) más las actividades cuyo nombre contiene la
+    palabra. Lo expandido localmente sale normalizado (minúsculas, sin
+    acentos) y no se guarda en la caché.
+"""
+import os
+import time
+import asyncio
+import threading
+from collections import OrderedDict, defaultdict, deque
+from sqlalchemy import text
+from app.database import SessionLocal
+from app.versiones import version_tabla
+from app.prolog import cliente
+from app.actividades.catalogo import catalogo_actividades, normalizar
+
+
+EXPANSION_CACHE_TTL = float(os.getenv("EXPANSION_CACHE_TTL", "600"))
+EXPANSION_CACHE_TAMANIO = int(os.getenv("EXPANSION_CACHE_TAMANIO", "5000"))
+EXPANSION_FALLOS_MAXIMOS = int(os.getenv("EXPANSION_FALLOS_MAXIMOS", "3"))
+EXPANSION_PAUSA = float(os.getenv("EXPANSION_PAUSA", "30"))
+EXPANSION_PROFUNDIDAD = int(os.getenv("EXPANSION_PROFUNDIDAD", "2"))
+EXPANSION_CONFIANZA_MINIMA = float(os.getenv("EXPANSION_CONFIANZA_MINIMA", "0.5"))
+
+
+# -------------------------
+# CACHÉ POR PALABRA
+# -------------------------
+_cache = OrderedDict()   # palabra -> (expansiones, vence)
+_cache_lock = threading.Lock()
+_contadores = {"aciertos": 0, "prolog": 0, "local": 0, "errores_prolog": 0}
+
+
+def _cache_obtener(palabra):
+    with _cache_lock:
+        entrada = _cache.get(palabra)
+        if entrada is not None:
+            expansiones, vence = entrada
+            if vence > time.monotonic():
+                _cache.move_to_end(palabra)
+                _contadores["aciertos"] += 1
+                return expansiones
+            del _cache[palabra]
+        return None
+
+
+def _cache_guardar(palabra, expansiones):
+    with _cache_lock:
+        _cache[palabra] = (expansiones, time.monotonic() + EXPANSION_CACHE_TTL)
+        _cache.move_to_end(palabra)
+        while len(_cache) > EXPANSION_CACHE_TAMANIO:
+            _cache.popitem(last=False)
+
+
+def limpiar_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+# -------------------------
+# INTERRUPTOR DE PROLOG
+# -------------------------
+class _Interruptor:
+    """cerrado: se llama a Prolog · abierto: no · semiabierto: un pedido de prueba"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.fallos = 0
+        self.abierto_hasta = 0.0
+        self.probando = False
+
+    def permite(self) -> bool:
+        with self._lock:
+            if self.fallos < EXPANSION_FALLOS_MAXIMOS:
+                return True
+            if time.monotonic() < self.abierto_hasta or self.probando:
+                return False
+            self.probando = True
+            return True
+
+    def exito(self):
+        with self._lock:
+            if self.fallos >= EXPANSION_FALLOS_MAXIMOS:
+                print("✅ Prolog /expandir respondió de nuevo")
+            self.fallos = 0
+            self.probando = False
+
+    def fallo(self):
+        with self._lock:
+            self.fallos += 1
+            self.probando = False
+            if self.fallos >= EXPANSION_FALLOS_MAXIMOS:
+                self.abierto_hasta = time.monotonic() + EXPANSION_PAUSA
+                print(f"⚠️ Prolog /expandir sin respuesta: se expande localmente por {EXPANSION_PAUSA:.0f}s")
+
+    def estado(self):
+        with self._lock:
+            if self.fallos < EXPANSION_FALLOS_MAXIMOS:
+                return "cerrado"
+            return "abierto" if time.monotonic() < self.abierto_hasta else "semiabierto"
+
+
+_interruptor = _Interruptor()
+
+
+def _expansiones_de_respuesta(palabras, resp):
+    """Expansiones de cada palabra pedida, sin repetir ni incluir la palabra misma"""
+    if resp.status_code != 200:
+        raise RuntimeError(f"código inesperado {resp.status_code}")
+    por_palabra = {e["palabra"]: e["expandidas"] for e in resp.json()["por_palabra"]}
+    return {
+        palabra: [e for e in dict.fromkeys(por_palabra.get(palabra, [])) if e != palabra]
+        for palabra in palabras
+    }
+
+
+# -------------------------
+# GRAFO LOCAL (relaciones_aprendidas + nombres de actividades)
+# -------------------------
+class _GrafoLocal:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self.vecinos = {}
+        self.actividades = []
+
+    def _al_dia(self):
+        catalogo_actividades.al_dia()
+        version = (version_tabla("relaciones_aprendidas"), catalogo_actividades.cambios)
+        if self._version == version:
+            return
+        with self._lock:
+            if self._version == version:
+                return
+            db = SessionLocal()
+            try:
+                relaciones = db.execute(text("""
+                    SELECT habilidad_base, habilidad_objetivo, confianza
+                    FROM relaciones_aprendidas
+                    WHERE activo = true AND confianza >= :minima
+                """), {"minima": EXPANSION_CONFIANZA_MINIMA}).all()
+            finally:
+                db.close()
+
+            # Prolog consulta la relación en ambos sentidos: el grafo es no dirigido
+            vecinos = defaultdict(dict)
+            for base, objetivo, confianza in relaciones:
+                a, b, c = normalizar(base), normalizar(objetivo), float(confianza)
+                if a != b:
+                    vecinos[a][b] = max(c, vecinos[a].get(b, 0))
+                    vecinos[b][a] = max(c, vecinos[b].get(a, 0))
+            self.vecinos = dict(vecinos)
+            self.actividades = sorted({normalizar(n) for n in catalogo_actividades.nombres() if n})
+            self._version = version
+
+    def expandir(self, palabra):
+        """Palabras alcanzables desde `palabra`, de mayor a menor confianza acumulada"""
+        self._al_dia()
+        mejor = {palabra: 1.0}
+        cola = deque([(palabra, 1.0, 0)])
+        while cola:
+            actual, confianza, profundidad = cola.popleft()
+            if profundidad >= EXPANSION_PROFUNDIDAD:
+                continue
+            for vecino, c in self.vecinos.get(actual, {}).items():
+                acumulada = confianza * c
+                if acumulada >= EXPANSION_CONFIANZA_MINIMA and acumulada > mejor.get(vecino, 0):
+                    mejor[vecino] = acumulada
+                    cola.append((vecino, acumulada, profundidad + 1))
+        del mejor[palabra]
+        expansiones = [p for p, _ in sorted(mejor.items(), key=lambda x: -x[1])]
+
+        # Equivalente local de la similitud por nombre de buscar_semantica/2
+        for nombre in self.actividades:
+            if palabra in nombre and nombre != palabra and nombre not in mejor:
+                expansiones.append(nombre)
+        return expansiones
+
+
+_grafo = _GrafoLocal()
+
+
+def _expandir_local(palabra):
+    _contadores["local"] += 1
+    try:
+        return _grafo.expandir(normalizar(palabra))
+    except Exception as e:
+        print(f"⚠️ No se pudo expandir '{palabra}' localmente: {e}")
+        return []
+
+
+def _unir(palabras, expansiones_por_palabra):
+    """Palabras originales primero y después sus expansiones, sin repetir"""
+    resultado = list(dict.fromkeys(palabras))
+    vistas = set(resultado)
+    for expansiones in expansiones_por_palabra:
+        for e in expansiones:
+            if e not in vistas:
+                vistas.add(e)
+                resultado.append(e)
+    return resultado
+
+
+# -------------------------
+# API
+# -------------------------
+def _preparar(palabras):
+    """Palabras sin vacías ni repetidas, lo que hay en caché y las que faltan"""
+    palabras = list(dict.fromkeys(p.strip() for p in palabras if p and p.strip()))
+    expansiones, faltan = {}, []
+    for palabra in palabras:
+        en_cache = _cache_obtener(palabra)
+        if en_cache is None:
+            faltan.append(palabra)
+        else:
+            expansiones[palabra] = en_cache
+    return palabras, expansiones, faltan
+
+
+def _guardar_respuesta(faltan, resp):
+    expansiones = _expansiones_de_respuesta(faltan, resp)
+    _interruptor.exito()
+    _contadores["prolog"] += len(faltan)
+    for palabra, e in expansiones.items():
+        _cache_guardar(palabra, e)
+    return expansiones
+
+
+def _registrar_fallo(e):
+    print(f"⚠️ Prolog /expandir no respondió: {e}")
+    _interruptor.fallo()
+    _contadores["errores_prolog"] += 1
+
+
+def expandir(palabras):
+    """
+    Palabras originales más sus expansiones.
+    Nunca falla: sin Prolog ni grafo local devuelve las palabras tal cual.
+    """
+    palabras, expansiones, faltan = _preparar(palabras)
+
+    if faltan and _interruptor.permite():
+        try:
+            resp = cliente.post("expandir", json={"palabras": faltan, "por_palabra": True})
+            expansiones.update(_guardar_respuesta(faltan, resp))
+        except Exception as e:
+            _registrar_fallo(e)
+
+    for palabra in faltan:
+        if palabra not in expansiones:
+            expansiones[palabra] = _expandir_local(palabra)
+    return _unir(palabras, [expansiones[p] for p in palabras])
+
+
+async def expandir_async(palabras):
+    """expandir() para rutas async: Prolog vía httpx y el grafo local en un hilo"""
+    palabras, expansiones, faltan = _preparar(palabras)
+
+    if faltan and _interruptor.permite():
+        try:
+            resp = await cliente.post_async("expandir", json={"palabras": faltan, "por_palabra": True})
+            expansiones.update(_guardar_respuesta(faltan, resp))
+        except Exception as e:
+            _registrar_fallo(e)
+
+    for palabra in faltan:
+        if palabra not in expansiones:
+            expansiones[palabra] = await asyncio.to_thread(_expandir_local, palabra)
+    return _unir(palabras, [expansiones[p] for p in palabras])
+
+
+def estadisticas():
+    with _cache_lock:
+        palabras_en_cache = len(_cache)
+    return {
+        **_contadores,
+        "palabras_en_cache": palabras_en_cache,
+        "interruptor": _interruptor.estado(),
+        "fallos_seguidos": _interruptor.fallos,
+        "relaciones_locales": sum(len(v) for v in _grafo.vecinos.values()) // 2,
+    }
@@ -0,0 +1,139 @@
+"""
+Formato de los hechos que se exportan a Prolog: una fila → una línea.
+
+TABLAS describe cada tabla exportada (archivo, predicado, claves, columnas);
+la usan el generador, el registro de cambios y el escritor de archivos.
+"""
+import unicodedata
+
+
+"""Limpia y formatea texto para Prolog: normaliza acentos y capitaliza"""
+def limpiar_y_formatear(texto):
+    if texto is None:
+        return ""
+    texto = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode()
+    texto = " ".join([t.capitalize() for t in texto.split()])
+    return texto
+
+
+# -------------------------
+# FORMATEO DE HECHOS (una fila → una línea Prolog)
+# -------------------------
+def _hecho_persona(p):
+    return (
+        f'persona({p.dni}, "{limpiar_y_formatear(p.nombre)}", "{limpiar_y_formatear(p.apellido)}", '
+        f'"{limpiar_y_formatear(p.ciudad)}", "{limpiar_y_formatear(p.provincia)}").'
+    )
+
+
+def _hecho_persona_actividad(a):
+    nivel = limpiar_y_formatear(a.nivel_experiencia).lower()
+    return f'persona_actividad({a.dni}, {a.id_actividad}, "{nivel}", {a.años_experiencia}).'
+
+
+def _hecho_actividad(act):
+    return (
+        f'actividad({act.id_actividad}, "{limpiar_y_formatear(act.nombre)}", '
+        f'"{limpiar_y_formatear(act.area)}", "{limpiar_y_formatear(act.especialidad)}", '
+        f'"{limpiar_y_formatear(act.descripcion)}").'
+    )
+
+
+def _hecho_empresa(emp):
+    return (
+        f'empresa({emp.id_empresa}, "{limpiar_y_formatear(emp.nombre)}", '
+        f'"{limpiar_y_formatear(emp.direccion)}", "{limpiar_y_formatear(emp.ciudad)}", '
+        f'"{limpiar_y_formatear(emp.provincia)}").'
+    )
+
+
+def _hecho_empresa_actividad(emp_act):
+    return (
+        f'empresa_actividad({emp_act.id_empresa}, {emp_act.id_actividad}, '
+        f'"{limpiar_y_formatear(emp_act.especializacion)}").'
+    )
+
+
+def _hecho_oferta(o):
+    activa_atom = "true" if o.activa else "false"
+    return f'oferta({o.id_oferta}, {o.id_empresa}, "{limpiar_y_formatear(o.titulo)}", {activa_atom}).'
+
+
+def _hecho_oferta_actividad(o):
+    nivel = limpiar_y_formatear(o.nivel_requerido).lower()
+    return f'oferta_actividad({o.id_oferta}, {o.id_actividad}, "{nivel}").'
+
+
+def _hecho_postulacion(post):
+    return f'postulacion({post.dni}, {post.id_oferta}, "{post.estado}").'
+
+
+def hecho_relacion(rel):
+    """rel: dict con base, objetivo, confianza y frecuencia"""
+    return (
+        f"relacion_co_ocurrencia('{limpiar_y_formatear(rel['base'])}', "
+        f"'{limpiar_y_formatear(rel['objetivo'])}', {rel['confianza']}, "
+        f"{rel['frecuencia']})."
+    )
+
+
+"""
+    Tablas exportadas a Prolog, en el orden en que se escriben en cada archivo.
+    - claves: columnas que identifican al hecho (primeros argumentos del predicado)
+    - vigente: filtro opcional; las filas que no lo cumplen se tratan como borradas
+"""
+TABLAS = [
+    {
+        "tabla": "persona", "archivo": "hechos", "predicado": "persona", "aridad": 5,
+        "claves": ["dni"],
+        "columnas": "dni, nombre, apellido, ciudad, provincia",
+        "formato": _hecho_persona,
+    },
+    {
+        "tabla": "persona_actividad", "archivo": "hechos", "predicado": "persona_actividad", "aridad": 4,
+        "claves": ["dni", "id_actividad"],
+        "columnas": "dni, id_actividad, nivel_experiencia, años_experiencia",
+        "formato": _hecho_persona_actividad,
+    },
+    {
+        "tabla": "actividad", "archivo": "hechos", "predicado": "actividad", "aridad": 5,
+        "claves": ["id_actividad"],
+        "columnas": "id_actividad, nombre, area, especialidad, descripcion",
+        "formato": _hecho_actividad,
+    },
+    {
+        "tabla": "empresa", "archivo": "hechos", "predicado": "empresa", "aridad": 5,
+        "claves": ["id_empresa"],
+        "columnas": "id_empresa, nombre, direccion, ciudad, provincia",
+        "vigente": "activa = true",
+        "formato": _hecho_empresa,
+    },
+    {
+        "tabla": "empresa_actividad", "archivo": "hechos", "predicado": "empresa_actividad", "aridad": 3,
+        "claves": ["id_empresa", "id_actividad"],
+        "columnas": "id_empresa, id_actividad, especializacion",
+        "formato": _hecho_empresa_actividad,
+    },
+    {
+        "tabla": "oferta_empleo", "archivo": "ofertas", "predicado": "oferta", "aridad": 4,
+        "claves": ["id_oferta"],
+        "columnas": "id_oferta, id_empresa, titulo, activa",
+        "formato": _hecho_oferta,
+    },
+    {
+        "tabla": "oferta_actividad", "archivo": "ofertas", "predicado": "oferta_actividad", "aridad": 3,
+        "claves": ["id_oferta", "id_actividad"],
+        "columnas": "id_oferta, id_actividad, nivel_requerido",
+        "formato": _hecho_oferta_actividad,
+    },
+    {
+        "tabla": "postulaciones", "archivo": "postulaciones", "predicado": "postulacion", "aridad": 3,
+        "claves": ["dni", "id_oferta"],
+        "columnas": "dni, id_oferta, estado",
+        "formato": _hecho_postulacion,
+    },
+]
+
+# relaciones.pl no sale de una fila por hecho (se combina con lo aprendido en
+# Prolog): el registro de cambios solo avisa que la tabla se modificó
+TABLA_RELACIONES = "relaciones_aprendidas"
@@ -1,127 +1,38 @@
 import os
-import unicodedata
-import requests
+import time
+import shutil
+from itertools import chain
 from sqlalchemy import text
 from app.database import SessionLocal
+from app.prolog import cliente
+from app.prolog import archivos_hechos, cambios_hechos, publicacion_hechos
+from app.prolog.formato_hechos import TABLAS, TABLA_RELACIONES, hecho_relacion
 
-"""Limpia y formatea texto para Prolog: normaliza acentos y capitaliza"""
-def limpiar_y_formatear(texto):
-    if texto is None:
-        return ""
-    texto = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode()
-    texto = " ".join([t.capitalize() for t in texto.split()])
-    return texto
 
-"""
-    Función principal que genera archivos .pl para Prolog extrayendo datos de PostgreSQL
-    y combinando con relaciones aprendidas del motor Prolog existente
-"""
-def generar_hechos():
-
-    db = SessionLocal()
-    
-    # RUTAS - escribir en volumen Y en directorio del código
-    rutas_hechos = [
-        "/app/prolog_data/hechos.pl",      # ← Volumen compartido (funcionalidad)
-        "/app/app/prolog/hechos.pl"        # ← para ver en local
-    ]
-    
-    rutas_ofertas = [
-        "/app/prolog_data/ofertas.pl",     # ← Volumen compartido  
-        "/app/app/prolog/ofertas.pl"       # ← para ver en local
-    ]
-    
-    rutas_relaciones = [
-        "/app/prolog_data/relaciones.pl",  # ← Volumen compartido
-        "/app/app/prolog/relaciones.pl"    # ← para ver en local
-    ]
-    
-    rutas_postulaciones = [
-        "/app/prolog_data/postulaciones.pl",  # ← Volumen compartido
-        "/app/app/prolog/postulaciones.pl"    # ← para ver en local
-    ]
-
-    lineas_hechos = []
-    lineas_ofertas = []
-    lineas_relaciones = []
-    lineas_postulaciones = []
-
-    # -------------------------
-    # PERSONA - Extrae datos de personas para Prolog
-    # -------------------------
-    personas = db.execute(text("""
-        SELECT dni, nombre, apellido, ciudad, provincia
-        FROM persona
-    """)).fetchall()
-
-    for p in personas:
-        lineas_hechos.append(
-            f'persona({p.dni}, "{limpiar_y_formatear(p.nombre)}", "{limpiar_y_formatear(p.apellido)}", '
-            f'"{limpiar_y_formatear(p.ciudad)}", "{limpiar_y_formatear(p.provincia)}").'
-        )
-
-    # -------------------------
-    # PERSONA_ACTIVIDAD - Habilidades y experiencia de personas
-    # -------------------------
-    pa = db.execute(text("""
-        SELECT dni, id_actividad, nivel_experiencia, años_experiencia
-        FROM persona_actividad
-    """)).fetchall()
-
-    for a in pa:
-        nivel = limpiar_y_formatear(a.nivel_experiencia).lower()
-        lineas_hechos.append(
-            f'persona_actividad({a.dni}, {a.id_actividad}, "{nivel}", {a.años_experiencia}).'
-        )
+# Clave del advisory lock que serializa las generaciones entre workers: la
+# marca de agua y el snapshot vigente se leen y se publican juntos
+_LOCK_GENERACION = 72519303
 
-    # -------------------------
-    # ACTIVIDAD - Catálogo de habilidades disponibles
-    # -------------------------
-    actividades = db.execute(text("""
-        SELECT id_actividad, nombre, area, especialidad, descripcion
-        FROM actividad
-    """)).fetchall()
 
-    for act in actividades:
-        lineas_hechos.append(
-            f'actividad({act.id_actividad}, "{limpiar_y_formatear(act.nombre)}", '
-            f'"{limpiar_y_formatear(act.area)}", "{limpiar_y_formatear(act.especialidad)}", '
-            f'"{limpiar_y_formatear(act.descripcion)}").'
-        )
+def _clave(fila, spec):
+    return tuple(getattr(fila, c) for c in spec["claves"])
 
-    # -------------------------
-    # OFERTAS - Ofertas de empleo activas
-    # -------------------------
-    ofertas = db.execute(text("""
-        SELECT id_oferta, id_empresa, titulo, activa
-        FROM oferta_empleo
-    """)).fetchall()
 
-    for o in ofertas:
-        activa_atom = "true" if o.activa else "false"
-        lineas_ofertas.append(
-            f'oferta({o.id_oferta}, {o.id_empresa}, "{limpiar_y_formatear(o.titulo)}", {activa_atom}).'
-        )
+def _patron_retract(spec, clave):
+    """Patrón para retractall/1: claves fijas y resto de argumentos libres"""
+    libres = ["_"] * (spec["aridad"] - len(clave))
+    args = ", ".join([str(v) for v in clave] + libres)
+    return f'{spec["predicado"]}({args})'
 
-    # -------------------------
-    # OFERTA_ACTIVIDAD - Habilidades requeridas por oferta
-    # -------------------------
-    oa = db.execute(text("""
-        SELECT id_oferta, id_actividad, nivel_requerido
-        FROM oferta_actividad
-    """)).fetchall()
 
-    for o in oa:
-        nivel = limpiar_y_formatear(o.nivel_requerido).lower()
-        lineas_ofertas.append(
-            f'oferta_actividad({o.id_oferta}, {o.id_actividad}, "{nivel}").'
-        )
+# -------------------------
+# RELACIONES APRENDIDAS - BIDIRECCIONAL (PostgreSQL + Prolog)
+# Combina relaciones históricas de BD con aprendizaje actual de Prolog.
+# En modo incremental solo se recalcula si cambios_hechos anotó cambios en
+# relaciones_aprendidas, y solo se envía a Prolog si el contenido cambió.
+# -------------------------
+def _lineas_relaciones(db):
 
-    # -------------------------
-    # RELACIONES APRENDIDAS - BIDIRECCIONAL (PostgreSQL + Prolog)
-    # Combina relaciones históricas de BD con aprendizaje actual de Prolog
-    # -------------------------
-    
     # 1. Obtener relaciones de PostgreSQL (conocimiento histórico)
     relaciones_sql = db.execute(text("""
         SELECT habilidad_base, habilidad_objetivo, confianza, frecuencia, fuente
@@ -132,8 +43,7 @@ def generar_hechos():
     # 2. Obtener relaciones de Prolog (aprendizaje actual)
     relaciones_prolog = []
     try:
-        PROLOG_URL = os.getenv("PROLOG_URL", "http://prolog-engine:4000")
-        response = requests.get(f"{PROLOG_URL}/relaciones_aprendidas", timeout=5)
+        response = cliente.get("relaciones_aprendidas")
         if response.status_code == 200:
             data = response.json()
             relaciones_prolog = data.get('relaciones', [])
@@ -145,7 +55,7 @@ def generar_hechos():
 
     # 3. Combinar relaciones (evitar duplicados, mantener mayor confianza)
     relaciones_combinadas = {}
-    
+
     # Agregar relaciones de PostgreSQL
     for rel in relaciones_sql:
         clave = f"{rel.habilidad_base}->{rel.habilidad_objetivo}"
@@ -156,12 +66,12 @@ def generar_hechos():
             'frecuencia': rel.frecuencia,
             'fuente': 'postgresql'
         }
-    
+
     # Agregar/actualizar con relaciones de Prolog (mantener mayor confianza)
     for rel in relaciones_prolog:
         clave = f"{rel['habilidad_base']}->{rel['habilidad_objetivo']}"
         confianza_prolog = rel['confianza']
-        
+
         if clave in relaciones_combinadas:
             # Mantener la relación con mayor confianza
             if confianza_prolog > relaciones_combinadas[clave]['confianza']:
@@ -181,12 +91,7 @@ def generar_hechos():
             }
 
     # 4. Generar líneas para el archivo
-    for rel in relaciones_combinadas.values():
-        lineas_relaciones.append(
-            f"relacion_co_ocurrencia('{limpiar_y_formatear(rel['base'])}', "
-            f"'{limpiar_y_formatear(rel['objetivo'])}', {rel['confianza']}, "
-            f"{rel['frecuencia']})."
-        )
+    lineas_relaciones = [hecho_relacion(rel) for rel in relaciones_combinadas.values()]
 
     # Si no hay relaciones, agregar algunas por defecto
     if not lineas_relaciones:
@@ -197,129 +102,246 @@ def generar_hechos():
         ])
 
     print(f"🔗 Relaciones combinadas: {len(relaciones_sql)} PostgreSQL + {len(relaciones_prolog)} Prolog = {len(lineas_relaciones)} total")
+    return lineas_relaciones
 
-    # -------------------------
-    # POSTULACIONES - Historial de postulaciones
-    # -------------------------
-    postulaciones = db.execute(text("""
-        SELECT dni, id_oferta, estado
-        FROM postulaciones
-    """)).fetchall()
-
-    for post in postulaciones:
-        lineas_postulaciones.append(
-            f'postulacion({post.dni}, {post.id_oferta}, "{post.estado}").'
-        )
 
-    # -------------------------
-    # EMPRESA (opcional, para búsquedas semánticas)
-    # -------------------------
-    empresas = db.execute(text("""
-        SELECT id_empresa, nombre, direccion, ciudad, provincia
-        FROM empresa
-        WHERE activa = true
-    """)).fetchall()
+def _lineas_tabla(db, spec):
+    """Generador de hechos de una tabla"""
+    where = f' WHERE {spec["vigente"]}' if spec.get("vigente") else ""
+    for fila in cambios_hechos.filas(db, f'SELECT {spec["columnas"]} FROM {spec["tabla"]}{where}'):
+        yield spec["formato"](fila)
 
-    for emp in empresas:
-        lineas_hechos.append(
-            f'empresa({emp.id_empresa}, "{limpiar_y_formatear(emp.nombre)}", '
-            f'"{limpiar_y_formatear(emp.direccion)}", "{limpiar_y_formatear(emp.ciudad)}", '
-            f'"{limpiar_y_formatear(emp.provincia)}").'
-        )
-    
-    # -------------------------
-    # EMPRESA_ACTIVIDAD (opcional)
-    # -------------------------
-    ea = db.execute(text("""
-        SELECT id_empresa, id_actividad, especializacion
-        FROM empresa_actividad
-    """)).fetchall()
 
-    for emp_act in ea:
-        lineas_hechos.append(
-            f'empresa_actividad({emp_act.id_empresa}, {emp_act.id_actividad}, '
-            f'"{limpiar_y_formatear(emp_act.especializacion)}").'
-        )
+def _rutas():
+    return {nombre: archivos_hechos.ruta_vigente(f"{nombre}.pl") for nombre in archivos_hechos.ARCHIVOS}
 
-    # -------------------------
-    # ESCRIBIR EN TODAS LAS RUTAS
-    # -------------------------
-    contenido_hechos = "\n".join(lineas_hechos)
-    contenido_ofertas = "\n".join(lineas_ofertas)
-    contenido_relaciones = "\n".join(lineas_relaciones)
-    contenido_postulaciones = "\n".join(lineas_postulaciones)
 
-    # Escribir hechos.pl
-    for ruta in rutas_hechos:
-        try:
-            os.makedirs(os.path.dirname(ruta), exist_ok=True)
-            with open(ruta, "w", encoding="utf-8") as f:
-                f.write(contenido_hechos)
-            print(f"✅ hechos.pl generado en: {ruta}")
-        except Exception as e:
-            print(f"⚠️  No se pudo escribir en {ruta}: {e}")
-
-    # Escribir ofertas.pl
-    for ruta in rutas_ofertas:
-        try:
-            os.makedirs(os.path.dirname(ruta), exist_ok=True)
-            with open(ruta, "w", encoding="utf-8") as f:
-                f.write(contenido_ofertas)
-            print(f"✅ ofertas.pl generado en: {ruta}")
-        except Exception as e:
-            print(f"⚠️  No se pudo escribir en {ruta}: {e}")
+def _generar_completo(db, hwm, marca, version):
+    """
+    Regeneración total: vuelca todas las tablas en un snapshot nuevo. Las
+    filas van de la base al archivo sin acumularse. Es la única generación
+    que recorre las tablas enteras (y la que se usa si no hay registro de
+    cambios, si una tabla se vació con TRUNCATE o si la marca de agua no
+    sirve). Si el contenido coincide con el vigente no se recarga Prolog
+    (solo se le envía la versión); si cambió una parte, solo esos archivos.
+    """
+    conteos = {}
+    hashes = {}
+    snapshot = archivos_hechos.nuevo_snapshot()
+    try:
+        for nombre in ("hechos", "ofertas", "postulaciones"):
+            conteos[nombre], hashes[nombre] = archivos_hechos.escribir(snapshot, nombre, chain.from_iterable(
+                _lineas_tabla(db, spec)
+                for spec in TABLAS if spec["archivo"] == nombre
+            ))
+        conteos["relaciones"], hashes["relaciones"] = archivos_hechos.escribir(
+            snapshot, "relaciones", _lineas_relaciones(db)
+        )
+    except Exception:
+        shutil.rmtree(snapshot, ignore_errors=True)
+        raise
+
+    print(f"📊 Estadísticas: {conteos['hechos']} hechos, {conteos['ofertas']} ofertas, "
+          f"{conteos['relaciones']} relaciones, {conteos['postulaciones']} postulaciones")
+
+    resultado = {
+        "modo": "completo",
+        "reglas_hechos": conteos["hechos"],
+        "reglas_ofertas": conteos["ofertas"],
+        "reglas_relaciones": conteos["relaciones"],
+        "reglas_postulaciones": conteos["postulaciones"],
+        "relaciones_combinadas": conteos["relaciones"]
+    }
 
-    # Escribir relaciones.pl
-    for ruta in rutas_relaciones:
-        try:
-            os.makedirs(os.path.dirname(ruta), exist_ok=True)
-            with open(ruta, "w", encoding="utf-8") as f:
-                f.write(contenido_relaciones)
-            print(f"✅ relaciones.pl generado en: {ruta}")
-        except Exception as e:
-            print(f"⚠️  No se pudo escribir en {ruta}: {e}")
+    # Comparar contenido con el snapshot vigente: solo se publica y se recarga
+    # lo que cambió (si nada cambió, Prolog ya tiene exactamente estos hechos)
+    # (un archivo con operaciones en el diario no coincide con lo que hay en
+    # memoria aunque su hash sea igual: se recarga igual)
+    anteriores = archivos_hechos.manifiesto_vigente()
+    cambiados = [
+        n for n in archivos_hechos.ARCHIVOS
+        if hashes[n] != anteriores.get(n) or n in anteriores.get("diario_archivos", [])
+    ]
+    recarga_pendiente = marca["recarga_pendiente"]
 
-    # Escribir postulaciones.pl
-    for ruta in rutas_postulaciones:
-        try:
-            os.makedirs(os.path.dirname(ruta), exist_ok=True)
-            with open(ruta, "w", encoding="utf-8") as f:
-                f.write(contenido_postulaciones)
-            print(f"✅ postulaciones.pl generado en: {ruta}")
-        except Exception as e:
-            print(f"⚠️  No se pudo escribir en {ruta}: {e}")
+    if not cambiados and not recarga_pendiente:
+        shutil.rmtree(snapshot, ignore_errors=True)
+        publicacion_hechos.guardar_marca(hwm)
+        print("✅ Contenido idéntico al snapshot vigente: no se recarga Prolog")
+        return {**_rutas(), **resultado, "prolog": publicacion_hechos.enviar_version(version), "recargados": []}
 
-    db.close()
+    publicacion_hechos.publicar(snapshot, {**hashes, "id": os.path.basename(snapshot)})
 
-    print("🎯 Todos los archivos Prolog generados en las rutas configuradas")
-    print(f"📊 Estadísticas: {len(lineas_hechos)} hechos, {len(lineas_ofertas)} ofertas, "
-          f"{len(lineas_relaciones)} relaciones, {len(lineas_postulaciones)} postulaciones")
+    # SOLO RECARGAR (NO UPLOAD NECESARIO) - acotado a los archivos cambiados
+    parcial = anteriores and cambiados and len(cambiados) < len(archivos_hechos.ARCHIVOS) and not recarga_pendiente
+    if not parcial:
+        cambiados = list(archivos_hechos.ARCHIVOS)
 
-    # SOLO RECARGAR (NO UPLOAD NECESARIO)
+    estado_prolog = "ok"
     try:
-        PROLOG_URL = os.getenv("PROLOG_URL", "http://prolog-engine:4000")
-        
-        print("🔄 Solicitando recarga de hechos en Prolog...")
-        resp = requests.post(f"{PROLOG_URL}/reload_hechos", timeout=10)
-        resp.raise_for_status()
+        print(f"🔄 Solicitando recarga de hechos en Prolog: {', '.join(cambiados)}")
+        publicacion_hechos.recargar(cambiados if parcial else None, version)
+        publicacion_hechos.guardar_marca(hwm)
         print("✅ Recarga de hechos exitosa")
 
     except Exception as e:
         print(f"❌ ERROR recargando hechos en Prolog: {e}")
+        # Los archivos están al día pero la memoria de Prolog no: la próxima
+        # generación será completa y recargará todo
+        publicacion_hechos.guardar_marca(hwm, recarga_pendiente=True)
+        estado_prolog = "error"
+
+    return {**_rutas(), **resultado, "prolog": estado_prolog, "recargados": cambiados}
+
+
+def _operaciones_tablas(db, registrados):
+    """
+    retractall/assertz de las claves anotadas: busca las filas por clave;
+    las que ya no están (o no cumplen "vigente") son borrados.
+    Devuelve (operaciones, archivos tocados).
+    """
+    operaciones = []
+    archivos_tocados = set()
+
+    for spec in TABLAS:
+        claves = registrados[spec["tabla"]]
+        if not claves:
+            continue
+        vigentes = {}
+        for fila in cambios_hechos.filas_por_clave(db, spec, claves):
+            vigentes.setdefault(_clave(fila, spec), []).append(spec["formato"](fila))
+
+        archivos_tocados.add(spec["archivo"])
+        for clave in sorted(claves):
+            operaciones.append(f"retractall({_patron_retract(spec, clave)}).")
+            operaciones.extend(f"assertz({hecho[:-1]})." for hecho in vigentes.get(clave, []))
+
+    return operaciones, archivos_tocados
+
+
+def _generar_delta(db, hwm, registrados, version):
+    """
+    Regeneración incremental: para las claves anotadas en cambios_hechos
+    desde la marca de agua arma las operaciones retractall/assertz, publica
+    un snapshot nuevo (archivos enlazados + segmento de diario) y las aplica
+    en Prolog. Sin cambios no se publica nada: solo se avanza la marca y se
+    informa la versión.
+    """
+    operaciones, archivos_tocados = _operaciones_tablas(db, registrados)
+    anteriores = archivos_hechos.manifiesto_vigente()
+
+    # Relaciones: solo si se escribió relaciones_aprendidas y el archivo
+    # resultante cambió (se reemplazan todas: la tabla es chica)
+    lineas_relaciones = None
+    if registrados[TABLA_RELACIONES]:
+        lineas_relaciones = _lineas_relaciones(db)
+        if archivos_hechos.hash_lineas(lineas_relaciones) == anteriores.get("relaciones"):
+            lineas_relaciones = None
+    operaciones_relaciones = []
+    if lineas_relaciones is not None:
+        operaciones_relaciones.append("retractall(relacion_co_ocurrencia(_, _, _, _)).")
+        operaciones_relaciones.extend(
+            f"assertz({l[:-1]})." for l in lineas_relaciones if not l.startswith("%")
+        )
+
+    if operaciones or operaciones_relaciones:
+        snapshot = archivos_hechos.nuevo_snapshot()
+        try:
+            manifiesto = archivos_hechos.escribir_hechos_delta(snapshot, anteriores, operaciones, archivos_tocados)
+            if lineas_relaciones is not None:
+                _, manifiesto["relaciones"] = archivos_hechos.escribir(snapshot, "relaciones", lineas_relaciones)
+            else:
+                manifiesto["relaciones"] = archivos_hechos.reutilizar(snapshot, "relaciones", anteriores)
+        except Exception:
+            shutil.rmtree(snapshot, ignore_errors=True)
+            raise
+        publicacion_hechos.publicar(snapshot, {**manifiesto, "id": os.path.basename(snapshot)})
+
+    operaciones += operaciones_relaciones
+    print(f"🧩 Delta generado: {len(operaciones)} operaciones")
+
+    estado_prolog = "ok"
+    if not operaciones:
+        print("✅ Sin cambios desde la última generación")
+        publicacion_hechos.guardar_marca(hwm)
+        estado_prolog = publicacion_hechos.enviar_version(version)
+    else:
+        try:
+            print("🔄 Aplicando delta de hechos en Prolog...")
+            publicacion_hechos.enviar_delta(operaciones, version)
+            publicacion_hechos.guardar_marca(hwm)
+            print("✅ Delta aplicado")
+        except Exception as e:
+            print(f"❌ ERROR aplicando delta en Prolog: {e}")
+            # Los archivos ya están al día pero la memoria de Prolog no:
+            # la próxima generación será completa (con recarga)
+            publicacion_hechos.guardar_marca(None, recarga_pendiente=True)
+            estado_prolog = "error"
 
     return {
-        "hechos": rutas_hechos,
-        "ofertas": rutas_ofertas,
-        "relaciones": rutas_relaciones,
-        "postulaciones": rutas_postulaciones,
-        "reglas_hechos": len(lineas_hechos),
-        "reglas_ofertas": len(lineas_ofertas),
-        "reglas_relaciones": len(lineas_relaciones),
-        "reglas_postulaciones": len(lineas_postulaciones),
-        "relaciones_combinadas": len(lineas_relaciones)
+        **_rutas(),
+        "modo": "incremental",
+        "operaciones": len(operaciones),
+        "prolog": estado_prolog,
     }
 
 
+"""
+    Función principal que genera archivos .pl para Prolog extrayendo datos de PostgreSQL
+    y combinando con relaciones aprendidas del motor Prolog existente.
+
+    Con incremental=True solo se leen las filas cuyas claves anotó
+    cambios_hechos desde la marca de agua guardada junto al snapshot vigente
+    (ver publicacion_hechos) y se envía a Prolog el delta de hechos
+    (retractall/assertz) en lugar de recargar todo. Sin registro de cambios,
+    sin marca válida o si la memoria de Prolog quedó atrás se hace una
+    generación completa.
+
+    version: versión de datos que queda cargada en Prolog (ver app.versiones).
+    El resultado incluye "prolog": "ok" | "error" según la recarga/delta.
+"""
+def generar_hechos(incremental: bool = False, version: int = None):
+
+    db = SessionLocal()
+
+    try:
+        # Una generación a la vez (entre workers); el lock se libera al cerrar
+        db.execute(text(f"SELECT pg_advisory_xact_lock({_LOCK_GENERACION})"))
+
+        # La marca de agua se toma ANTES de leer: lo escrito durante la
+        # generación se vuelve a leer en la próxima (es idempotente)
+        hwm = cambios_hechos.leer_hwm(db)
+        marca = publicacion_hechos.leer_marca()
+
+        usar_delta = (
+            incremental
+            and cambios_hechos.registro_activo()
+            and marca["hwm"] is not None
+            and not marca["recarga_pendiente"]
+            # Una base restaurada puede tener txids menores que la marca
+            and marca["hwm"] <= hwm
+            # Las anotaciones viejas se purgan: pasado este plazo pueden faltar
+            and time.time() - marca["generado"] < cambios_hechos.CAMBIOS_HECHOS_RETENCION / 2
+        )
+        if usar_delta:
+            registrados = cambios_hechos.leer_cambios(db, marca["hwm"])
+            if registrados is None:
+                print("⚠️ Se vació una tabla (TRUNCATE): se regenera todo")
+                usar_delta = False
+
+        if usar_delta:
+            resultado = _generar_delta(db, hwm, registrados, version)
+        else:
+            resultado = _generar_completo(db, hwm, marca, version)
+    finally:
+        db.close()
+
+    if cambios_hechos.registro_activo():
+        cambios_hechos.purgar_cambios()
+
+    return resultado
+
+
 # Para ejecutar directamente si es necesario
 if __name__ == "__main__":
-    generar_hechos()
\ No newline at end of file
+    generar_hechos()
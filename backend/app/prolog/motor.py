@@ -1,8 +1,8 @@
-import os
+import json
+import httpx
 import requests
-
-# URL del servicio Prolog (default: http://prolog-engine:4000)
-PROLOG_URL = os.getenv("PROLOG_URL", "http://prolog-engine:4000")
+from app.prolog import cliente, expansion
+from app.prolog.cliente import PROLOG_URL
 
 class MotorProlog:
     """
@@ -14,7 +14,7 @@ el sistema de matching y recomendaciones inteligentes
         """Sube hechos Prolog al motor para su procesamiento"""
         files = {"file": ("hechos.pl", archivo_texto, "text/plain")}
         try:
-            r = requests.post(f"{PROLOG_URL}/upload_hechos", files=files, timeout=10)
+            r = cliente.post("upload_hechos", files=files)
             r.raise_for_status()
             return r.json()
         except Exception as e:
@@ -24,23 +24,22 @@ el sistema de matching y recomendaciones inteligentes
     def consultar(predicado: str):
         """Ejecuta una consulta Prolog personalizada"""
         try:
-            r = requests.post(f"{PROLOG_URL}/consultar", json={"query": predicado}, timeout=10)
+            r = cliente.post("consultar", json={"query": predicado})
             r.raise_for_status()
             return r.json()
         except Exception as e:
             return {"status": "error", "detalle": str(e)}
         
     def __init__(self):
-        """Inicializa el cliente con la URL del servicio Prolog"""
-        self.prolog_url = os.getenv("PROLOG_URL", "http://prolog-engine:4000")
+        """Las llamadas van por el pool compartido de app.prolog.cliente"""
+        self.prolog_url = PROLOG_URL
 
     def buscar_recomendaciones(self, dni: int):
         """Consulta al microservicio Prolog para obtener recomendaciones."""
         try:
-            url = f"{self.prolog_url}/matching?dni={dni}"
-            print(f"🔍 Llamando a Prolog: {url}")
+            print(f"🔍 Llamando a Prolog: {self.prolog_url}/matching?dni={dni}")
             
-            r = requests.get(url, timeout=10)
+            r = cliente.get("matching", params={"dni": dni})
             r.raise_for_status()
             
             resultado = r.json()
@@ -73,13 +72,42 @@ el sistema de matching y recomendaciones inteligentes
                 "recomendaciones": []
             }
             
+    def buscar_recomendaciones_lote(self, dnis: list):
+        """
+        Recomendaciones para muchas personas en un solo pedido a Prolog.
+        Generador: produce un resultado por DNI a medida que llega (NDJSON).
+        """
+        respondidos = 0
+        try:
+            print(f"🔍 Llamando a Prolog: {self.prolog_url}/matching_lote ({len(dnis)} DNIs)")
+
+            with cliente.post("matching_lote", json={"dnis": list(dnis)}, stream=True) as r:
+                r.raise_for_status()
+                # Prolog responde en el mismo orden en que recibe los DNIs
+                for linea in r.iter_lines():
+                    if linea:
+                        yield json.loads(linea)
+                        respondidos += 1
+
+        except Exception as e:
+            print(f"💥 Error llamando a Prolog: {e}")
+            # Los DNIs que no llegaron a responderse se informan con error
+            for dni in dnis[respondidos:]:
+                yield {
+                    "status": "error",
+                    "message": f"Error en el servicio de matching: {e}",
+                    "dni": dni,
+                    "recomendaciones": []
+                }
+
     def buscar_por_habilidades(self, actividades: list, nivel_minimo: int):
         """Buscar candidatos por habilidades específicas"""
         try:
             actividades_str = str(actividades).replace(" ", "")
-            url = f"{self.prolog_url}/buscar_por_habilidades?actividades={actividades_str}&nivel_minimo={nivel_minimo}"
-            
-            r = requests.get(url, timeout=10)
+            r = cliente.get(
+                "buscar_por_habilidades",
+                params={"actividades": actividades_str, "nivel_minimo": nivel_minimo}
+            )
             r.raise_for_status()
             return r.json()
         except Exception as e:
@@ -92,8 +120,7 @@ el sistema de matching y recomendaciones inteligentes
             if ciudad: params["ciudad"] = ciudad
             if provincia: params["provincia"] = provincia
             
-            url = f"{self.prolog_url}/buscar_por_ubicacion"
-            r = requests.get(url, params=params, timeout=10)
+            r = cliente.get("buscar_por_ubicacion", params=params)
             r.raise_for_status()
             return r.json()
         except Exception as e:
@@ -102,8 +129,7 @@ el sistema de matching y recomendaciones inteligentes
     def ofertas_por_empresa(self, id_empresa: int):
         """Buscar ofertas por empresa"""
         try:
-            url = f"{self.prolog_url}/ofertas_por_empresa?id_empresa={id_empresa}"
-            r = requests.get(url, timeout=10)
+            r = cliente.get("ofertas_por_empresa", params={"id_empresa": id_empresa})
             r.raise_for_status()
             return r.json()
         except Exception as e:
@@ -112,8 +138,7 @@ el sistema de matching y recomendaciones inteligentes
     def matching_avanzado(self, dni: int, id_oferta: int):
         """Verificar matching específico entre persona y oferta"""
         try:
-            url = f"{self.prolog_url}/matching_avanzado?dni={dni}&id_oferta={id_oferta}"
-            r = requests.get(url, timeout=10)
+            r = cliente.get("matching_avanzado", params={"dni": dni, "id_oferta": id_oferta})
             r.raise_for_status()
             return r.json()
         except Exception as e:
@@ -122,10 +147,9 @@ el sistema de matching y recomendaciones inteligentes
     def recomendaciones_habilidades(self, dni: int):
         """Obtener recomendaciones de habilidades inteligentes"""
         try:
-            url = f"{self.prolog_url}/recomendaciones_habilidades?dni={dni}"
             print(f"🔍 Buscando recomendaciones para DNI: {dni}")
             
-            r = requests.get(url, timeout=10)
+            r = cliente.get("recomendaciones_habilidades", params={"dni": dni})
             r.raise_for_status()
             
             resultado = r.json()
@@ -150,26 +174,222 @@ el sistema de matching y recomendaciones inteligentes
                 "recomendaciones": []
             }
         
+    # Estos tres lanzan la excepción si Prolog falla: el llamador decide el error HTTP
+    def aprender(self):
+        """Ejecuta el aprendizaje de relaciones (co-ocurrencias) en Prolog"""
+        r = cliente.post("aprender")
+        r.raise_for_status()
+        return r.json()
+
+    def relaciones_aprendidas(self):
+        """Relaciones aprendidas que tiene cargadas el motor"""
+        r = cliente.get("relaciones_aprendidas")
+        r.raise_for_status()
+        return r.json()
+
+    def buscar_semantica(self, consulta: str):
+        """Búsqueda semántica de actividades en Prolog"""
+        r = cliente.get("buscar_semantica", params={"consulta": consulta})
+        r.raise_for_status()
+        return r.json()
+
     @staticmethod
     def expandir(palabras):
         """
-        Envía las palabras al servicio Prolog para obtener expansión semántica.
-        Si Prolog no responde o no existe, devuelve las palabras originales.
+        Expansión semántica de palabras (ver app/prolog/expansion.py): caché por
+        palabra y, si Prolog no responde, expansión local con relaciones_aprendidas.
+        Nunca falla: en el peor caso devuelve las palabras originales.
         """
+        return expansion.expandir(palabras)
+
+
+
+class MotorPrologAsync:
+    """
+    Variante asíncrona de MotorProlog (mismos métodos y respuestas) para
+    rutas `async def`: las llamadas se esperan con await sobre httpx y no
+    bloquean el event loop mientras Prolog responde.
+    """
+
+    def __init__(self):
+        self.prolog_url = PROLOG_URL
+
+    @staticmethod
+    async def cargar_hechos(archivo_texto: str):
+        """Sube hechos Prolog al motor para su procesamiento"""
+        files = {"file": ("hechos.pl", archivo_texto, "text/plain")}
+        try:
+            r = await cliente.post_async("upload_hechos", files=files)
+            r.raise_for_status()
+            return r.json()
+        except Exception as e:
+            return {"status": "error", "detalle": str(e)}
+
+    @staticmethod
+    async def consultar(predicado: str):
+        """Ejecuta una consulta Prolog personalizada"""
+        try:
+            r = await cliente.post_async("consultar", json={"query": predicado})
+            r.raise_for_status()
+            return r.json()
+        except Exception as e:
+            return {"status": "error", "detalle": str(e)}
+
+    async def buscar_recomendaciones(self, dni: int):
+        """Consulta al microservicio Prolog para obtener recomendaciones."""
+        try:
+            print(f"🔍 Llamando a Prolog: {self.prolog_url}/matching?dni={dni}")
+            r = await cliente.get_async("matching", params={"dni": dni})
+            r.raise_for_status()
+
+            resultado = r.json()
+            print(f"✅ Respuesta de Prolog: {len(resultado.get('recomendaciones', []))} recomendaciones")
+            return resultado
+
+        except httpx.ConnectError as e:
+            print(f"❌ Error de conexión con Prolog: {e}")
+            return {
+                "status": "error",
+                "message": f"No se pudo conectar con el servicio de matching: {e}",
+                "dni": dni,
+                "recomendaciones": []
+            }
+        except httpx.TimeoutException as e:
+            print(f"❌ Timeout llamando a Prolog: {e}")
+            return {
+                "status": "error",
+                "message": "El servicio de matching no respondió a tiempo",
+                "dni": dni,
+                "recomendaciones": []
+            }
+        except Exception as e:
+            print(f"💥 Error llamando a Prolog: {e}")
+            return {
+                "status": "error",
+                "message": f"Error en el servicio de matching: {e}",
+                "dni": dni,
+                "recomendaciones": []
+            }
+
+    async def buscar_recomendaciones_lote(self, dnis: list):
+        """Generador asíncrono: un resultado por DNI a medida que llega (NDJSON)"""
+        respondidos = 0
+        try:
+            print(f"🔍 Llamando a Prolog: {self.prolog_url}/matching_lote ({len(dnis)} DNIs)")
+            async with cliente.stream_async("POST", "matching_lote", json={"dnis": list(dnis)}) as r:
+                r.raise_for_status()
+                async for linea in r.aiter_lines():
+                    if linea:
+                        yield json.loads(linea)
+                        respondidos += 1
+
+        except Exception as e:
+            print(f"💥 Error llamando a Prolog: {e}")
+            for dni in dnis[respondidos:]:
+                yield {
+                    "status": "error",
+                    "message": f"Error en el servicio de matching: {e}",
+                    "dni": dni,
+                    "recomendaciones": []
+                }
+
+    async def buscar_por_habilidades(self, actividades: list, nivel_minimo: int):
+        """Buscar candidatos por habilidades específicas"""
         try:
-            resp = requests.post(
-                f"{PROLOG_URL}/expandir",
-                json={"palabras": palabras},
-                timeout=2
+            actividades_str = str(actividades).replace(" ", "")
+            r = await cliente.get_async(
+                "buscar_por_habilidades",
+                params={"actividades": actividades_str, "nivel_minimo": nivel_minimo}
             )
+            r.raise_for_status()
+            return r.json()
+        except Exception as e:
+            return {"error": str(e)}
+
+    async def buscar_por_ubicacion(self, ciudad: str = "", provincia: str = ""):
+        """Buscar candidatos por ubicación"""
+        try:
+            params = {}
+            if ciudad: params["ciudad"] = ciudad
+            if provincia: params["provincia"] = provincia
 
-            if resp.status_code == 200:
-                data = resp.json()
-                return data.get("expandidas", palabras)
+            r = await cliente.get_async("buscar_por_ubicacion", params=params)
+            r.raise_for_status()
+            return r.json()
+        except Exception as e:
+            return {"error": str(e)}
 
-            print("⚠️ Prolog devolvió un código inesperado:", resp.status_code)
-            return palabras
+    async def ofertas_por_empresa(self, id_empresa: int):
+        """Buscar ofertas por empresa"""
+        try:
+            r = await cliente.get_async("ofertas_por_empresa", params={"id_empresa": id_empresa})
+            r.raise_for_status()
+            return r.json()
+        except Exception as e:
+            return {"error": str(e)}
 
+    async def matching_avanzado(self, dni: int, id_oferta: int):
+        """Verificar matching específico entre persona y oferta"""
+        try:
+            r = await cliente.get_async("matching_avanzado", params={"dni": dni, "id_oferta": id_oferta})
+            r.raise_for_status()
+            return r.json()
         except Exception as e:
-            print("⚠️ Prolog /expandir no respondió:", str(e))
-            return palabras
+            return {"error": str(e)}
+
+    async def recomendaciones_habilidades(self, dni: int):
+        """Obtener recomendaciones de habilidades inteligentes"""
+        try:
+            print(f"🔍 Buscando recomendaciones para DNI: {dni}")
+            r = await cliente.get_async("recomendaciones_habilidades", params={"dni": dni})
+            r.raise_for_status()
+
+            resultado = r.json()
+            print(f"✅ Recomendaciones obtenidas: {len(resultado.get('recomendaciones', []))}")
+            return resultado
+
+        except httpx.ConnectError as e:
+            print(f"❌ Error de conexión con Prolog: {e}")
+            return {
+                "status": "error",
+                "message": f"No se pudo conectar con el servicio de recomendaciones: {e}",
+                "dni": dni,
+                "recomendaciones": []
+            }
+        except Exception as e:
+            print(f"💥 Error obteniendo recomendaciones: {e}")
+            return {
+                "status": "error",
+                "message": f"Error en el servicio de recomendaciones: {e}",
+                "dni": dni,
+                "recomendaciones": []
+            }
+
+    # Estos tres lanzan la excepción si Prolog falla: el llamador decide el error HTTP
+    async def aprender(self):
+        """Ejecuta el aprendizaje de relaciones (co-ocurrencias) en Prolog"""
+        r = await cliente.post_async("aprender")
+        r.raise_for_status()
+        return r.json()
+
+    async def relaciones_aprendidas(self):
+        """Relaciones aprendidas que tiene cargadas el motor"""
+        r = await cliente.get_async("relaciones_aprendidas")
+        r.raise_for_status()
+        return r.json()
+
+    async def buscar_semantica(self, consulta: str):
+        """Búsqueda semántica de actividades en Prolog"""
+        r = await cliente.get_async("buscar_semantica", params={"consulta": consulta})
+        r.raise_for_status()
+        return r.json()
+
+    @staticmethod
+    async def expandir(palabras):
+        """Expansión semántica de palabras (misma caché y respaldo local que MotorProlog.expandir)"""
+        return await expansion.expandir_async(palabras)
+
+
+# Instancias compartidas (sin estado propio: todo va por el pool de conexiones)
+motor_prolog = MotorProlog()
+motor_prolog_async = MotorPrologAsync()
@@ -0,0 +1,162 @@
+"""
+Publicación de los snapshots de hechos y aviso al motor Prolog.
+
+  - publicar(): apunta el enlace "actual" al snapshot con un rename atómico
+    (Prolog nunca lee un archivo a medias); sin enlaces simbólicos copia a la
+    ruta plana, archivo por archivo.
+  - Marca de agua (marca_agua.json, junto al enlace "actual"): txid hasta el
+    que los hechos publicados reflejan la base, cuándo se generaron y si la
+    memoria de Prolog quedó atrás (recarga_pendiente). Guarda el id del
+    manifiesto publicado: si no coincide (otro proceso publicó sin
+    actualizarla, o se borró el volumen) la próxima generación es completa.
+    Al estar en el volumen sobrevive a reinicios y la comparten los workers.
+  - recargar() / enviar_delta() / enviar_version(): llamadas al motor.
+"""
+import os
+import json
+import time
+import shutil
+from app.prolog import cliente
+from app.prolog import archivos_hechos as archivos
+
+
+# Copia de los archivos para ver en local
+DIRECTORIO_LOCAL = "/app/app/prolog"
+
+SNAPSHOTS_CONSERVADOS = int(os.getenv("PROLOG_SNAPSHOTS_CONSERVADOS", "3"))
+
+
+def publicar(snapshot, manifiesto):
+    """
+    Publica el snapshot: escribe su manifiesto y apunta "actual" a él con un
+    rename atómico del enlace simbólico. Luego copia a local y limpia viejos.
+    """
+    with open(os.path.join(snapshot, "manifiesto.json"), "w", encoding="utf-8") as f:
+        json.dump(manifiesto, f)
+
+    enlace = archivos.enlace_actual()
+    temporal = f"{enlace}.tmp"
+    try:
+        if os.path.lexists(temporal):
+            os.remove(temporal)
+        os.symlink(os.path.relpath(snapshot, archivos.DIRECTORIO_DATOS), temporal)
+        os.replace(temporal, enlace)
+    except OSError as e:
+        # Sin enlaces simbólicos (p. ej. volúmenes en Windows): se publica en
+        # la ruta plana, archivo por archivo y cada uno con rename atómico
+        print(f"⚠️  No se pudo publicar con enlace simbólico ({e}), se usa ruta plana")
+        diario = manifiesto.get("diario", [])
+        for archivo in diario + [f"{n}.pl" for n in archivos.ARCHIVOS] + ["manifiesto.json"]:
+            temporal = os.path.join(archivos.DIRECTORIO_DATOS, f"{archivo}.tmp")
+            shutil.copyfile(os.path.join(snapshot, archivo), temporal)
+            os.replace(temporal, os.path.join(archivos.DIRECTORIO_DATOS, archivo))
+        # Segmentos de diario ya compactados en los archivos
+        for archivo in os.listdir(archivos.DIRECTORIO_DATOS):
+            if archivos.PATRON_DIARIO.match(archivo) and archivo not in diario:
+                os.remove(os.path.join(archivos.DIRECTORIO_DATOS, archivo))
+
+    print(f"📦 Snapshot publicado: {snapshot}")
+
+    for nombre in archivos.ARCHIVOS:
+        ruta = os.path.join(DIRECTORIO_LOCAL, f"{nombre}.pl")
+        try:
+            os.makedirs(DIRECTORIO_LOCAL, exist_ok=True)
+            shutil.copyfile(os.path.join(snapshot, f"{nombre}.pl"), ruta)
+        except Exception as e:
+            print(f"⚠️  No se pudo escribir en {ruta}: {e}")
+
+    limpiar_snapshots()
+
+
+def limpiar_snapshots():
+    """Conserva los últimos SNAPSHOTS_CONSERVADOS (y siempre el vigente)"""
+    vigente = os.path.realpath(archivos.enlace_actual())
+    directorio = archivos.directorio_snapshots()
+    for nombre in sorted(os.listdir(directorio))[:-SNAPSHOTS_CONSERVADOS]:
+        ruta = os.path.join(directorio, nombre)
+        if os.path.realpath(ruta) != vigente:
+            shutil.rmtree(ruta, ignore_errors=True)
+
+
+# -------------------------
+# MARCA DE AGUA
+# -------------------------
+def _ruta_marca():
+    return os.path.join(archivos.DIRECTORIO_DATOS, "marca_agua.json")
+
+
+def leer_marca():
+    """
+    Marca de agua de los hechos publicados: {hwm, generado, recarga_pendiente}.
+    Sin marca, o si no corresponde al manifiesto vigente, hwm es None.
+    """
+    try:
+        with open(_ruta_marca(), "r", encoding="utf-8") as f:
+            marca = json.load(f)
+    except (OSError, ValueError):
+        marca = None
+
+    if not marca or marca.get("snapshot") != archivos.manifiesto_vigente().get("id"):
+        return {"hwm": None, "generado": 0.0, "recarga_pendiente": True}
+    return marca
+
+
+def guardar_marca(hwm, recarga_pendiente=False):
+    """Guarda la marca de agua del manifiesto vigente (rename atómico)"""
+    marca = {
+        "hwm": hwm,
+        "generado": time.time(),
+        "recarga_pendiente": recarga_pendiente,
+        "snapshot": archivos.manifiesto_vigente().get("id"),
+    }
+    temporal = f"{_ruta_marca()}.tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(marca, f)
+    os.replace(temporal, _ruta_marca())
+
+
+# -------------------------
+# MOTOR PROLOG
+# -------------------------
+def _parametros_version(version):
+    return {"version": version} if version is not None else None
+
+
+def recargar(cambiados, version=None):
+    """
+    Recarga en Prolog los archivos indicados (None: todos) desde el snapshot
+    vigente. Lanza excepción si Prolog no respondió bien.
+    """
+    params = _parametros_version(version) or {}
+    if cambiados is not None:
+        params["archivos"] = ",".join(cambiados)
+    resp = cliente.post("reload_hechos", params=params)
+    resp.raise_for_status()
+
+
+def enviar_delta(operaciones, version=None):
+    """Aplica las operaciones retractall/assertz en memoria del motor Prolog"""
+    resp = cliente.post(
+        "aplicar_delta",
+        params=_parametros_version(version),
+        data="\n".join(operaciones).encode("utf-8"),
+        headers={"Content-Type": "text/plain; charset=utf-8"}
+    )
+    resp.raise_for_status()
+    return resp.json()
+
+
+def enviar_version(version):
+    """
+    Generación sin cambios: Prolog ya tiene estos hechos, pero se le informa
+    la versión de datos que reflejan (si no, /status sigue mostrando la vieja)
+    """
+    if version is None:
+        return "ok"
+    try:
+        resp = cliente.post("version_hechos", params=_parametros_version(version))
+        resp.raise_for_status()
+        return "ok"
+    except Exception as e:
+        print(f"❌ ERROR registrando la versión de hechos en Prolog: {e}")
+        return "error"
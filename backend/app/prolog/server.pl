@@ -18,6 +18,10 @@
 :- dynamic relacion_co_ocurrencia/4.
 :- dynamic postulacion/3.
 
+% Versión de datos del backend que reflejan los hechos cargados
+:- dynamic version_hechos/1.
+version_hechos(0).
+
 
 % -----------------------------
 % VERIFICACIÓN DE DATOS MÍNIMOS
@@ -64,7 +68,9 @@ start_server :-
     format("   GET  /status~n"),
     format("   POST /reload_hechos~n"),
     format("   POST /upload_hechos~n"),
+    format("   POST /aplicar_delta~n"),
     format("   GET  /matching?dni=DNI~n"),
+    format("   POST /matching_lote~n"),
     format("   GET  /datos_cargados~n"),
     format("   GET  /buscar_por_habilidades?actividades=LISTA&nivel_minimo=NIVEL~n"),
     format("   GET  /buscar_por_ubicacion?ciudad=CIUDAD&provincia=PROVINCIA~n"),
@@ -101,27 +107,48 @@ recargar_hechos :-
     recargar_hechos_forzado.
 
 recargar_hechos_forzado :-
-    format(user_error, "🗑️  Eliminando predicados existentes~n", []),
-    retractall(persona(_,_,_,_,_)),
-    retractall(persona_actividad(_,_,_,_)),
-    retractall(oferta(_,_,_,_)),
-    retractall(oferta_actividad(_,_,_)),
-    retractall(actividad(_,_,_,_,_)),
-    retractall(empresa(_,_,_,_,_)),
-    retractall(empresa_actividad(_,_,_)),
-    retractall(relacion_co_ocurrencia(_,_,_,_)),
-    retractall(postulacion(_,_,_)),
+    recargar_archivos([hechos, ofertas, relaciones, postulaciones]).
+
+% -----------------------------
+% ARCHIVOS DE DATOS (SNAPSHOT VIGENTE)
+% El backend publica cada generación en /app/data/snapshots/<id> y apunta
+% /app/data/actual a ella; si no hay enlace se usan las rutas planas.
+% -----------------------------
+directorio_datos(Dir) :-
+    (   exists_directory('/app/data/actual')
+    ->  Dir = '/app/data/actual'
+    ;   Dir = '/app/data'
+    ).
+
+archivo_datos(Nombre, Ruta) :-
+    directorio_datos(Dir),
+    format(atom(Ruta), '~w/~w.pl', [Dir, Nombre]).
+
+% Predicados definidos por cada archivo de datos
+predicados_archivo(hechos, [persona(_,_,_,_,_), persona_actividad(_,_,_,_), actividad(_,_,_,_,_),
+                            empresa(_,_,_,_,_), empresa_actividad(_,_,_)]).
+predicados_archivo(ofertas, [oferta(_,_,_,_), oferta_actividad(_,_,_)]).
+predicados_archivo(relaciones, [relacion_co_ocurrencia(_,_,_,_)]).
+predicados_archivo(postulaciones, [postulacion(_,_,_)]).
+
+% Recarga solo los archivos indicados (los demás hechos quedan intactos)
+recargar_archivos(Archivos) :-
+    format(user_error, "🗑️  Eliminando predicados de: ~w~n", [Archivos]),
+    forall(( member(Archivo, Archivos),
+             predicados_archivo(Archivo, Predicados),
+             member(Predicado, Predicados) ),
+           retractall(Predicado)),
     
     format(user_error, "📥 Cargando archivos de datos...~n", []),
     
-    % Cargar todos los archivos disponibles
-    cargar_si_existe('/app/data/hechos.pl'),
-    cargar_si_existe('/app/data/ofertas.pl'),
-    cargar_si_existe('/app/data/relaciones.pl'),
-    cargar_si_existe('/app/data/postulaciones.pl'),
+    forall(member(Archivo, Archivos),
+           ( archivo_datos(Archivo, Ruta), cargar_si_existe(Ruta) )),
+    aplicar_diario,
     
-    % Ejecutar aprendizaje automático si hay datos suficientes
-    (   datos_suficientes_cargados
+    % El aprendizaje depende de personas/actividades: solo si cambiaron
+    (   \+ member(hechos, Archivos)
+    ->  true
+    ;   datos_suficientes_cargados
     ->  format(user_error, "🎓 Ejecutando aprendizaje automático...~n", []),
         (   catch(aprender_co_ocurrencia, Error, 
             format(user_error, "❌ Error en aprendizaje: ~w~n", [Error]))
@@ -136,6 +163,21 @@ recargar_hechos_forzado :-
     format(user_error, "✅ Recarga completada~n", []).
 
 
+% Diario del snapshot: deltas publicados después de escribir los archivos
+% (diario-NNNNNN.pl, una operación retractall/assertz por línea). Se aplican
+% en orden; reaplicarlos sobre hechos que ya los tienen deja lo mismo.
+aplicar_diario :-
+    directorio_datos(Dir),
+    format(atom(Patron), '~w/diario-*.pl', [Dir]),
+    expand_file_name(Patron, Encontrados),
+    msort(Encontrados, Segmentos),
+    forall(member(Segmento, Segmentos),
+           ( setup_call_cleanup(
+                 open(Segmento, read, Stream, [encoding(utf8)]),
+                 aplicar_operaciones(Stream, 0, Total),
+                 close(Stream)),
+             format(user_error, "🧩 ~w: ~d operaciones~n", [Segmento, Total]) )).
+
 % -----------------------------
 % CONTAR DATOS CARGADOS
 % -----------------------------
@@ -159,21 +201,84 @@ contar_datos :-
 :- http_handler(root(status), handle_status, []).
 
 handle_status(_Req) :-
+    version_hechos(VersionHechos),
     reply_json_dict(_{
         status: "ok", 
         service: "prolog-engine", 
         version: "2.0",
+        version_hechos: VersionHechos,
         timestamp: "now"
     }).
 
+% Registra la versión de datos enviada por el backend (?version=N)
+registrar_version_hechos(Request) :-
+    http_parameters(Request, [version(Version, [integer, optional(true)])]),
+    (   integer(Version)
+    ->  retractall(version_hechos(_)),
+        assertz(version_hechos(Version))
+    ;   true
+    ).
+
+% -----------------------------
+% ENDPOINT: VERSION HECHOS
+% El backend generó y los hechos no cambiaron: solo se registra la versión
+% -----------------------------
+:- http_handler(root(version_hechos), handle_version_hechos, [method(post)]).
+
+handle_version_hechos(Request) :-
+    registrar_version_hechos(Request),
+    version_hechos(Version),
+    reply_json_dict(_{status: "ok", version_hechos: Version}).
+
 % -----------------------------
 % ENDPOINT: RELOAD HECHOS
 % -----------------------------
 :- http_handler(root(reload_hechos), handle_reload_hechos, []).
 
-handle_reload_hechos(_Request) :-
-    recargar_hechos,
-    reply_json_dict(_{status: "ok", reloaded: true}).
+handle_reload_hechos(Request) :-
+    http_parameters(Request, [archivos(ArchivosAtom, [optional(true)])]),
+    (   atom(ArchivosAtom)
+    ->  atomic_list_concat(Pedidos, ',', ArchivosAtom),
+        include([A]>>predicados_archivo(A, _), Pedidos, Archivos),
+        recargar_archivos(Archivos)
+    ;   recargar_hechos
+    ),
+    registrar_version_hechos(Request),
+    version_hechos(Version),
+    reply_json_dict(_{status: "ok", reloaded: true, version_hechos: Version}).
+
+% -----------------------------
+% ENDPOINT: APLICAR DELTA DE HECHOS
+% Recibe una operación por línea: retractall(Hecho). o assertz(Hecho).
+% generadas por el backend en modo incremental (sin recargar archivos)
+% -----------------------------
+:- http_handler(root(aplicar_delta), handle_aplicar_delta, [method(post)]).
+
+handle_aplicar_delta(Request) :-
+    http_read_data(Request, Data, [to(string)]),
+    setup_call_cleanup(
+        open_string(Data, Stream),
+        aplicar_operaciones(Stream, 0, Total),
+        close(Stream)
+    ),
+    registrar_version_hechos(Request),
+    version_hechos(Version),
+    format(user_error, "🧩 Delta aplicado: ~d operaciones~n", [Total]),
+    reply_json_dict(_{status: "ok", operaciones: Total, version_hechos: Version}).
+
+aplicar_operaciones(Stream, N, Total) :-
+    read_term(Stream, Term, []),
+    (   Term == end_of_file
+    ->  Total = N
+    ;   aplicar_operacion(Term),
+        N1 is N + 1,
+        aplicar_operaciones(Stream, N1, Total)
+    ).
+
+aplicar_operacion(retractall(Hecho)) :- !, retractall(Hecho).
+aplicar_operacion(assertz(Hecho)) :- !, assertz(Hecho).
+aplicar_operacion(Term) :-
+    format(user_error, "⚠️  Operación de delta ignorada: ~q~n", [Term]).
 
 % -----------------------------
 % ENDPOINT: UPLOAD HECHOS (MEJORADO)
@@ -219,8 +324,7 @@ handle_matching(Request) :-
     http_parameters(Request, [dni(DniAtom, [])]),
     atom_number(DniAtom, DNI),
     
-    % SIEMPRE verificar y cargar datos actualizados
-    recargar_hechos,
+    % Los hechos los mantiene al día el backend (reload_hechos / aplicar_delta)
     
     findall(
         _{oferta: ID, titulo: T, puntaje: P},
@@ -238,6 +342,33 @@ match(DNI, ID_Oferta, Titulo, Puntaje) :-
     recomendacion(DNI, ID_Oferta, Puntaje),
     oferta(ID_Oferta, _, Titulo, true).
 
+% -----------------------------
+% ENDPOINT: MATCHING POR LOTE
+% -----------------------------
+% POST {"dnis": [DNI, ...]} -> una línea JSON por DNI (NDJSON), enviada en
+% cuanto se calcula (transferencia chunked) para no armar toda la respuesta
+:- http_handler(root(matching_lote), handle_matching_lote, [method(post)]).
+
+handle_matching_lote(Request) :-
+    http_read_json_dict(Request, Dict),
+    (   get_dict(dnis, Dict, DNIs), is_list(DNIs)
+    ->  format('Content-type: application/x-ndjson; charset=UTF-8~n'),
+        format('Transfer-encoding: chunked~n~n'),
+        forall(member(DNI, DNIs),
+               (   findall(
+                       _{oferta: ID, titulo: T, puntaje: P},
+                       match(DNI, ID, T, P),
+                       Resultados
+                   ),
+                   json_write_dict(current_output,
+                                   _{status: "ok", dni: DNI, recomendaciones: Resultados},
+                                   [width(0)]),
+                   nl,
+                   flush_output
+               ))
+    ;   reply_json_dict(_{status: "error", message: "Falta 'dnis'"}, [status(400)])
+    ).
+
 % -----------------------------
 % ENDPOINT: VERIFICAR DATOS CARGADOS
 % -----------------------------
@@ -271,8 +402,7 @@ handle_buscar_por_habilidades(Request) :-
         nivel_minimo(NivelMinAtom, [])
     ]),
     
-    % SIEMPRE verificar y cargar datos actualizados
-    recargar_hechos,
+    % Los hechos los mantiene al día el backend (reload_hechos / aplicar_delta)
     
     atom_to_term(ActividadesAtom, ActividadesList, _),
     atom_to_term(NivelMinAtom, NivelMin, _),
@@ -436,8 +566,7 @@ handle_recomendaciones_habilidades(Request) :-
     http_parameters(Request, [dni(DniAtom, [])]),
     atom_number(DniAtom, DNI),
     
-    % SIEMPRE verificar y cargar datos actualizados
-    recargar_hechos,
+    % Los hechos los mantiene al día el backend (reload_hechos / aplicar_delta)
     
     (   catch(recomendaciones_habilidades(DNI, Recomendaciones), Error,
         (format(user_error, "❌ Error en recomendaciones: ~w~n", [Error]),
@@ -675,25 +804,27 @@ handle_expandir(Request) :-
 
     % Convertir lista de strings en una sola consulta
     atomic_list_concat(Lista, ' ', Consulta),
-
-    % Llamar al motor semántico
-    (   catch(buscar_semantica(Consulta, Resultados), _, Resultados = [])
-    ->  true
-    ;   Resultados = []
-    ),
-
-    % Extraer nombres de actividades recomendadas
-    findall(Nombre,
-        member([_, _, Nombre, _], Resultados),
-        ExpandidasEncontradas
-    ),
+    expansiones_consulta(Consulta, ExpandidasEncontradas),
 
     % Fusionar lista original + nuevas palabras
     append(Lista, ExpandidasEncontradas, Mezcla),
     sort(Mezcla, ExpandidasUnicas),
 
-    reply_json_dict(_{
-        status: "ok",
-        palabras: Lista,
-        expandidas: ExpandidasUnicas
-    }).
+    % Con por_palabra: true, además la expansión de cada palabra por separado
+    % (el backend la guarda en su caché por palabra)
+    (   get_dict(por_palabra, Dict, true)
+    ->  findall(_{palabra: P, expandidas: E},
+            ( member(P, Lista), expansiones_consulta(P, E) ),
+            PorPalabra),
+        Respuesta = _{status: "ok", palabras: Lista, expandidas: ExpandidasUnicas, por_palabra: PorPalabra}
+    ;   Respuesta = _{status: "ok", palabras: Lista, expandidas: ExpandidasUnicas}
+    ),
+    reply_json_dict(Respuesta).
+
+% Nombres de actividades que buscar_semantica/2 encuentra para la consulta
+expansiones_consulta(Consulta, Expandidas) :-
+    (   catch(buscar_semantica(Consulta, Resultados), _, Resultados = [])
+    ->  true
+    ;   Resultados = []
+    ),
+    findall(Nombre, member([_, _, Nombre, _], Resultados), Expandidas).
@@ -1,10 +1,13 @@
+import os
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from app.paginacion import Pagina, CURSOR, LIMITE, paginar, pagina
 from .models import RelacionAprendida
 from pydantic import BaseModel
 from typing import List, Optional
-import requests
+from app.prolog import cliente
 
 router = APIRouter(tags=["relaciones-aprendidas"])
 
@@ -27,33 +30,37 @@ class RelacionAprendidaResponse(RelacionAprendidaBase):
         from_attributes = True
 
 # Endpoints CRUD
-@router.get("/", response_model=List[RelacionAprendidaResponse])
+@router.get("/", response_model=Pagina[RelacionAprendidaResponse])
 async def listar_relaciones(
-    skip: int = 0, 
-    limit: int = 100, 
+    cursor: Optional[str] = CURSOR,
+    limit: int = LIMITE,
     solo_activas: bool = True,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Listar relaciones aprendidas"""
+    """Listar relaciones aprendidas, paginadas por cursor en orden de id"""
     try:
-        query = db.query(RelacionAprendida)
+        query = select(RelacionAprendida)
         if solo_activas:
-            query = query.filter(RelacionAprendida.activo == True)
-        
-        relaciones = query.offset(skip).limit(limit).all()
-        return relaciones
+            query = query.where(RelacionAprendida.activo == True)
+        
+        relaciones = (await db.execute(
+            paginar(query, [RelacionAprendida.id], cursor, limit)
+        )).scalars().all()
+        return pagina(relaciones, [RelacionAprendida.id], limit)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(500, f"Error al obtener relaciones: {str(e)}")
 
 @router.post("/", response_model=RelacionAprendidaResponse)
-async def crear_relacion(relacion: RelacionAprendidaCreate, db: Session = Depends(get_db)):
+async def crear_relacion(relacion: RelacionAprendidaCreate, db: AsyncSession = Depends(get_async_db)):
     """Crear una nueva relación aprendida"""
     try:
         # Verificar si ya existe
-        existente = db.query(RelacionAprendida).filter(
+        existente = (await db.execute(select(RelacionAprendida).where(
             RelacionAprendida.habilidad_base == relacion.habilidad_base,
             RelacionAprendida.habilidad_objetivo == relacion.habilidad_objetivo
-        ).first()
+        ))).scalars().first()
         
         if existente:
             # Actualizar existente
@@ -66,36 +73,37 @@ async def crear_relacion(relacion: RelacionAprendidaCreate, db: Session = Depend
             nueva_relacion = RelacionAprendida(**relacion.dict())
             db.add(nueva_relacion)
         
-        db.commit()
+        await db.commit()
         if existente:
-            db.refresh(existente)
+            await db.refresh(existente)
             return existente
         else:
-            db.refresh(nueva_relacion)
+            await db.refresh(nueva_relacion)
             return nueva_relacion
             
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(500, f"Error al crear relación: {str(e)}")
 
 @router.post("/prolog/sincronizar")
-async def sincronizar_relaciones_prolog(db: Session = Depends(get_db)):
+async def sincronizar_relaciones_prolog(db: AsyncSession = Depends(get_async_db)):
     """Sincronizar relaciones desde Prolog a PostgreSQL"""
     try:
-        PROLOG_URL = "http://prolog-engine:4000"
-        
-        # Obtener relaciones de Prolog
-        response = requests.get(f"{PROLOG_URL}/relaciones_aprendidas", timeout=10)
+        # Obtener relaciones de Prolog (sin bloquear el event loop)
+        response = await cliente.get_async("relaciones_aprendidas")
         if response.status_code != 200:
             raise HTTPException(500, "Error obteniendo relaciones de Prolog")
         
         data = response.json()
         relaciones_prolog = data.get('relaciones', [])
+
+        # Estas relaciones ya están cargadas en Prolog: no lo desactualizan
+        db.info["sin_versionar_conocimiento"] = True
         
         # Limpiar relaciones existentes de co_ocurrencia
-        db.query(RelacionAprendida).filter(
+        await db.execute(delete(RelacionAprendida).where(
             RelacionAprendida.fuente == 'co_ocurrencia'
-        ).delete()
+        ))
         
         # Insertar nuevas relaciones
         for rel in relaciones_prolog:
@@ -108,7 +116,7 @@ async def sincronizar_relaciones_prolog(db: Session = Depends(get_db)):
             )
             db.add(nueva_relacion)
         
-        db.commit()
+        await db.commit()
         
         return {
             "message": f"{len(relaciones_prolog)} relaciones sincronizadas desde Prolog",
@@ -116,25 +124,20 @@ async def sincronizar_relaciones_prolog(db: Session = Depends(get_db)):
         }
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(500, f"Error sincronizando relaciones: {str(e)}")
 
 @router.post("/prolog/ejecutar-aprendizaje")
-async def ejecutar_aprendizaje_prolog(db: Session = Depends(get_db)):
+async def ejecutar_aprendizaje_prolog(db: AsyncSession = Depends(get_async_db)):
     """Ejecutar aprendizaje automático en Prolog y sincronizar resultados"""
     try:
-        PROLOG_URL = "http://prolog-engine:4000"
-        
         # Ejecutar aprendizaje
-        response_aprender = requests.post(f"{PROLOG_URL}/aprender", timeout=30)
+        response_aprender = await cliente.post_async("aprender")
         if response_aprender.status_code != 200:
             raise HTTPException(500, "Error ejecutando aprendizaje en Prolog")
         
         # Sincronizar relaciones
-        response_sincronizar = requests.post(
-            f"{PROLOG_URL}/relaciones-aprendidas/prolog/sincronizar",
-            timeout=10
-        )
+        response_sincronizar = await cliente.post_async("relaciones-aprendidas/prolog/sincronizar")
         
         return {
             "message": "Aprendizaje ejecutado y relaciones sincronizadas",
@@ -146,7 +149,7 @@ async def ejecutar_aprendizaje_prolog(db: Session = Depends(get_db)):
         raise HTTPException(500, f"Error en proceso de aprendizaje: {str(e)}")
     
 @router.post("/sincronizar-manual")
-async def sincronizar_manual(db: Session = Depends(get_db)):
+async def sincronizar_manual(db: AsyncSession = Depends(get_async_db)):
     """Sincronizar relaciones desde archivo local (cuando falla la automática)"""
     try:
         # Ruta del archivo generado por Prolog
@@ -188,10 +191,10 @@ async def sincronizar_manual(db: Session = Depends(get_db)):
         # Guardar en base de datos
         for rel in relaciones:
             # Verificar si ya existe
-            existente = db.query(RelacionAprendida).filter(
+            existente = (await db.execute(select(RelacionAprendida).where(
                 RelacionAprendida.habilidad_base == rel["habilidad_base"],
                 RelacionAprendida.habilidad_objetivo == rel["habilidad_objetivo"]
-            ).first()
+            ))).scalars().first()
             
             if existente:
                 # Actualizar existente
@@ -211,7 +214,7 @@ async def sincronizar_manual(db: Session = Depends(get_db)):
             
             relaciones_procesadas += 1
         
-        db.commit()
+        await db.commit()
         
         return {
             "message": f"Sincronización manual completada",
@@ -220,5 +223,5 @@ async def sincronizar_manual(db: Session = Depends(get_db)):
         }
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(500, f"Error en sincronización manual: {str(e)}")
\ No newline at end of file
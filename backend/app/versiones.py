@@ -0,0 +1,163 @@
+"""
+Versionado de datos del backend.
+
+Cada commit que escribe en una tabla incrementa la versión de esa tabla y,
+si la tabla forma parte de la base de conocimiento de Prolog, la versión
+global de datos. Las versiones son monótonas y viven en memoria del proceso:
+sirven para saber si un derivado (hechos de Prolog, cachés) quedó viejo sin
+tener que consultar la base.
+
+Qué escrituras se ven: toda sentencia INSERT / UPDATE / DELETE / TRUNCATE
+que este proceso ejecuta por un Engine de SQLAlchemy (sync o async, ORM,
+query.delete()/update(), Core o text()) se detecta en after_cursor_execute
+por la tabla que nombra. Se versiona al confirmar:
+  - dentro de una Session, en after_commit (la escritura ya es visible)
+  - en conexiones sin Session (engine.begin(), conn.commit()), al confirmar
+    y otra vez al devolver la conexión al pool, para que la última versión
+    siempre sea posterior al commit
+Un rollback descarta lo pendiente.
+
+Qué no se ve: escrituras de otros procesos (otros workers, psql, el propio
+motor Prolog si escribiera directo en la base) ni las que hacen triggers o
+funciones del lado del servidor sobre otras tablas. El aprendizaje de
+Prolog (/aprender) no escribe en la base: manda las relaciones a
+/relaciones-aprendidas/prolog/sincronizar, que las guarda por la Session
+de este backend y sí se versiona. Para el resto, registrar_escritura().
+"""
+import re
+import threading
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import Pool
+
+
+# Tablas que se exportan a los archivos .pl del motor Prolog
+TABLAS_CONOCIMIENTO = {
+    "persona",
+    "persona_actividad",
+    "actividad",
+    "empresa",
+    "empresa_actividad",
+    "oferta_empleo",
+    "oferta_actividad",
+    "relaciones_aprendidas",
+    "postulaciones",
+}
+
+_lock = threading.Lock()
+_version_datos = 0
+_versiones_tabla = {}
+
+
+def version_datos() -> int:
+    """Versión actual de la base de conocimiento (tablas exportadas a Prolog)"""
+    return _version_datos
+
+
+def version_tabla(nombre: str) -> int:
+    """Versión actual de una tabla puntual (0 si nunca se escribió)"""
+    return _versiones_tabla.get(nombre, 0)
+
+
+def registrar_escritura(*tablas, conocimiento: bool = True):
+    """
+    Incrementa las versiones de las tablas indicadas.
+    Se llama automáticamente al confirmar; usar a mano solo para escrituras
+    que no pasan por un Engine de este proceso.
+    """
+    global _version_datos
+    with _lock:
+        for tabla in tablas:
+            _versiones_tabla[tabla] = _versiones_tabla.get(tabla, 0) + 1
+        if conocimiento and TABLAS_CONOCIMIENTO.intersection(tablas):
+            _version_datos += 1
+
+
+# Tabla que modifica una sentencia: primera palabra INSERT INTO / UPDATE /
+# DELETE FROM / TRUNCATE [TABLE] [ONLY], con o sin esquema y comillas
+_PATRON_DML = re.compile(
+    r'(?<!DO )(?<!FOR )\b(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM|TRUNCATE(?:\s+TABLE)?)\s+'
+    r'(?:ONLY\s+)?(?:"?\w+"?\.)?"?(\w+)"?',
+    re.IGNORECASE,
+)
+_INICIOS_DML = ("INSERT", "UPDATE", "DELETE", "TRUNCA", "WITH")
+
+
+def tablas_escritas(sentencia: str) -> set:
+    """Tablas que modifica una sentencia SQL (vacío si es de solo lectura)"""
+    inicio = sentencia.lstrip()[:6].upper()
+    if not inicio.startswith(_INICIOS_DML):
+        return set()
+    if inicio.startswith("WITH"):
+        # CTE con escrituras: WITH x AS (DELETE FROM ... RETURNING ...) ...
+        return {t.lower() for t in _PATRON_DML.findall(sentencia)}
+    m = _PATRON_DML.match(sentencia.lstrip())
+    return {m.group(1).lower()} if m else set()
+
+
+# -------------------------
+# EVENTOS DE CONEXIÓN (aplican a todo Engine y a todo pool)
+# -------------------------
+# En conn.info (que acompaña a la conexión del pool):
+#   - "tablas_modificadas": tablas escritas en la transacción en curso
+#   - "info_sesion": session.info de la Session que usa la conexión
+#   - "tablas_confirmadas": confirmadas sin Session, a versionar otra vez al devolverla
+@event.listens_for(Engine, "after_cursor_execute")
+def _registrar_sentencia(conn, cursor, statement, parameters, context, executemany):
+    tablas = tablas_escritas(statement)
+    if tablas:
+        conn.info.setdefault("tablas_modificadas", set()).update(tablas)
+
+
+@event.listens_for(Engine, "commit")
+def _registrar_commit(conn):
+    tablas = conn.info.pop("tablas_modificadas", None)
+    info_sesion = conn.info.pop("info_sesion", None)
+    if not tablas:
+        return
+    if info_sesion is not None:
+        # La Session versiona en after_commit, cuando el commit ya terminó
+        info_sesion.setdefault("tablas_modificadas", set()).update(tablas)
+    else:
+        registrar_escritura(*tablas)
+        conn.info.setdefault("tablas_confirmadas", set()).update(tablas)
+
+
+@event.listens_for(Engine, "rollback")
+def _descartar_conexion(conn):
+    conn.info.pop("tablas_modificadas", None)
+    conn.info.pop("info_sesion", None)
+
+
+@event.listens_for(Pool, "checkin")
+def _devolver_conexion(dbapi_connection, connection_record):
+    tablas = connection_record.info.pop("tablas_confirmadas", None)
+    if tablas:
+        registrar_escritura(*tablas)
+    # Lo no confirmado al devolverla se deshizo con el reset del pool
+    connection_record.info.pop("tablas_modificadas", None)
+    connection_record.info.pop("info_sesion", None)
+
+
+# -------------------------
+# EVENTOS DE SESIÓN (aplican a toda Session de SQLAlchemy)
+# -------------------------
+@event.listens_for(Session, "after_begin")
+def _vincular_conexion(session, transaction, connection):
+    connection.info["info_sesion"] = session.info
+
+
+@event.listens_for(Session, "after_commit")
+def _confirmar(session):
+    tablas = session.info.pop("tablas_modificadas", None)
+    if tablas:
+        # Escrituras que ya reflejan el estado de Prolog (p. ej. relaciones
+        # sincronizadas desde el propio motor) no lo dejan desactualizado
+        conocimiento = not session.info.get("sin_versionar_conocimiento", False)
+        registrar_escritura(*tablas, conocimiento=conocimiento)
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar(session):
+    session.info.pop("tablas_modificadas", None)
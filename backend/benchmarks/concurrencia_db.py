@@ -0,0 +1,113 @@
+"""
+Benchmark: throughput de pedidos concurrentes con sesión sincrónica vs asíncrona.
+
+Compara dos versiones del mismo handler `async def`:
+  - antes:   usa Session (get_db) -> cada consulta bloquea el event loop
+  - despues: usa AsyncSession (get_async_db) -> las consultas se esperan con await
+
+Cada pedido ejecuta una consulta con latencia fija (pg_sleep) contra la base
+configurada en app.database, así se mide la serialización y no el costo de
+la consulta. Los pedidos se hacen en proceso (ASGI, sin red).
+
+Uso (desde backend/, con la base levantada):
+    python -m benchmarks.concurrencia_db --pedidos 200 --concurrencia 20 --latencia-ms 20
+
+Con --url se mide además una API ya desplegada (p. ej. antes y después del
+cambio) sobre rutas reales:
+    python -m benchmarks.concurrencia_db --url http://localhost:8000 --ruta /api/ofertas/
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.database import get_db, get_async_db
+
+
+def crear_app(latencia: float) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/antes")
+    async def antes(db: Session = Depends(get_db)):
+        db.execute(text("SELECT pg_sleep(:s)"), {"s": latencia})
+        return {"ok": True}
+
+    @app.get("/despues")
+    async def despues(db: AsyncSession = Depends(get_async_db)):
+        await db.execute(text("SELECT pg_sleep(:s)"), {"s": latencia})
+        return {"ok": True}
+
+    return app
+
+
+async def medir(cliente: httpx.AsyncClient, ruta: str, pedidos: int, concurrencia: int):
+    semaforo = asyncio.Semaphore(concurrencia)
+    latencias = []
+    errores = 0
+
+    async def uno():
+        nonlocal errores
+        async with semaforo:
+            inicio = time.perf_counter()
+            r = await cliente.get(ruta)
+            latencias.append(time.perf_counter() - inicio)
+            if r.status_code != 200:
+                errores += 1
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(uno() for _ in range(pedidos)))
+    total = time.perf_counter() - inicio
+
+    latencias.sort()
+    return {
+        "ruta": ruta,
+        "pedidos": pedidos,
+        "errores": errores,
+        "segundos": round(total, 3),
+        "pedidos_por_segundo": round(pedidos / total, 1),
+        "p50_ms": round(statistics.median(latencias) * 1000, 1),
+        "p95_ms": round(latencias[int(len(latencias) * 0.95) - 1] * 1000, 1),
+    }
+
+
+def imprimir(resultado):
+    print(
+        f"{resultado['ruta']:<30} {resultado['pedidos_por_segundo']:>8} ped/s   "
+        f"p50 {resultado['p50_ms']:>7} ms   p95 {resultado['p95_ms']:>7} ms   "
+        f"errores {resultado['errores']}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pedidos", type=int, default=200)
+    parser.add_argument("--concurrencia", type=int, default=20)
+    parser.add_argument("--latencia-ms", type=float, default=20)
+    parser.add_argument("--url", help="API desplegada a medir (opcional)")
+    parser.add_argument("--ruta", action="append", help="Ruta de la API desplegada (repetible)")
+    args = parser.parse_args()
+
+    print(f"📊 {args.pedidos} pedidos, concurrencia {args.concurrencia}")
+
+    app = crear_app(args.latencia_ms / 1000)
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench", timeout=None) as cliente:
+        await cliente.get("/despues")  # calentar el pool de conexiones
+        await cliente.get("/antes")
+        for ruta in ("/antes", "/despues"):
+            imprimir(await medir(cliente, ruta, args.pedidos, args.concurrencia))
+
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=None) as cliente:
+            for ruta in args.ruta or ["/api/ofertas/", "/api/actividades/"]:
+                imprimir(await medir(cliente, ruta, args.pedidos, args.concurrencia))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
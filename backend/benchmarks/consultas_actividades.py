@@ -0,0 +1,136 @@
+"""
+Benchmark y control de regresión: consultas SQL por pedido en las rutas de
+actividades de persona / empresa.
+
+Cuenta las sentencias que llegan a la base (evento before_cursor_execute del
+motor async) en cada pedido:
+  - GET  /actividades/persona/{dni}      -> 1 consulta, tenga las actividades que tenga
+  - GET  /actividades/empresa/{id}       -> 1 consulta
+  - POST /actividades/personas/lote      -> 1 consulta para todo el lote
+  - POST /actividades/empresas/lote      -> 1 consulta para todo el lote
+
+y compara con pedir las personas de a una. Si alguna ruta hace más consultas
+de las esperadas termina con código 1 (sirve como chequeo en CI).
+
+Uso (desde backend/, con la base levantada y datos cargados):
+    python -m benchmarks.consultas_actividades --personas 50
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import event, text
+
+from app.database import async_engine
+from app.actividades.routes import router as actividades_router
+
+
+# Consultas esperadas por pedido (las rutas no pueden superarlas)
+ESPERADAS = 1
+
+
+class ContadorConsultas:
+    def __init__(self):
+        self.total = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.total += 1
+
+
+async def pedir(cliente, contador, metodo, ruta, **kwargs):
+    """(respuesta, consultas, segundos) de un pedido"""
+    antes = contador.total
+    inicio = time.perf_counter()
+    r = await cliente.request(metodo, ruta, **kwargs)
+    segundos = time.perf_counter() - inicio
+    assert r.status_code == 200, f"{ruta}: {r.status_code} {r.text}"
+    return r.json(), contador.total - antes, segundos
+
+
+async def muestras(cantidad):
+    """DNIs con más actividades y empresas existentes"""
+    async with async_engine.connect() as conn:
+        dnis = (await conn.execute(text("""
+            SELECT p.dni FROM persona p
+            LEFT JOIN persona_actividad pa ON pa.dni = p.dni
+            GROUP BY p.dni ORDER BY count(pa.id_actividad) DESC, p.dni
+            LIMIT :n
+        """), {"n": cantidad})).scalars().all()
+        empresas = (await conn.execute(
+            text("SELECT id_empresa FROM empresa ORDER BY id_empresa LIMIT :n"), {"n": cantidad}
+        )).scalars().all()
+    return list(dnis), list(empresas)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--personas", type=int, default=50, help="personas / empresas a consultar")
+    args = parser.parse_args()
+
+    dnis, empresas = await muestras(args.personas)
+    if not dnis:
+        print("❌ No hay personas cargadas en la base")
+        sys.exit(1)
+
+    app = FastAPI()
+    app.include_router(actividades_router)
+
+    contador = ContadorConsultas()
+    event.listen(async_engine.sync_engine, "before_cursor_execute", contador)
+    errores = []
+
+    def controlar(nombre, consultas):
+        if consultas > ESPERADAS:
+            errores.append(f"{nombre}: {consultas} consultas (esperadas {ESPERADAS})")
+
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench", timeout=None) as cliente:
+        # De a una persona
+        consultas_total, segundos_total, actividades = 0, 0.0, 0
+        for dni in dnis:
+            datos, consultas, segundos = await pedir(cliente, contador, "GET", f"/actividades/persona/{dni}")
+            controlar(f"GET /actividades/persona/{dni} ({len(datos)} actividades)", consultas)
+            consultas_total += consultas
+            segundos_total += segundos
+            actividades += len(datos)
+        print(f"📊 {len(dnis)} personas, {actividades} actividades en total")
+        print(f"GET  persona/{{dni}} x{len(dnis):<5} {consultas_total:>5} consultas   {segundos_total * 1000:>8.1f} ms")
+
+        datos, consultas, segundos = await pedir(
+            cliente, contador, "POST", "/actividades/personas/lote", json={"dnis": dnis}
+        )
+        controlar("POST /actividades/personas/lote", consultas)
+        assert not datos["no_encontrados"], datos["no_encontrados"]
+        print(f"POST personas/lote       {consultas:>5} consultas   {segundos * 1000:>8.1f} ms")
+
+        if empresas:
+            consultas_total, segundos_total = 0, 0.0
+            for id_empresa in empresas:
+                _, consultas, segundos = await pedir(cliente, contador, "GET", f"/actividades/empresa/{id_empresa}")
+                controlar(f"GET /actividades/empresa/{id_empresa}", consultas)
+                consultas_total += consultas
+                segundos_total += segundos
+            print(f"GET  empresa/{{id}} x{len(empresas):<6} {consultas_total:>5} consultas   {segundos_total * 1000:>8.1f} ms")
+
+            _, consultas, segundos = await pedir(
+                cliente, contador, "POST", "/actividades/empresas/lote", json={"empresas": empresas}
+            )
+            controlar("POST /actividades/empresas/lote", consultas)
+            print(f"POST empresas/lote       {consultas:>5} consultas   {segundos * 1000:>8.1f} ms")
+
+    event.remove(async_engine.sync_engine, "before_cursor_execute", contador)
+    await async_engine.dispose()
+
+    if errores:
+        print("❌ Más consultas de las esperadas:")
+        for error in errores:
+            print(f"   {error}")
+        sys.exit(1)
+    print("✅ Una consulta por pedido en todas las rutas")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,105 @@
+"""
+Benchmark: logins por segundo y latencia del resto de la API durante una
+ráfaga de logins, con bcrypt en el event loop vs en el pool de procesos.
+
+  - antes:   verify_password directo en el handler async (bloquea el loop)
+  - despues: verify_password_async (pool de procesos acotado)
+
+Mientras corre la ráfaga se mide el retraso del event loop (cuánto tarda en
+despertar una tarea que duerme 10 ms): es la espera extra que sufre cualquier
+otra ruta del mismo worker. No necesita base de datos.
+
+Uso (desde backend/):
+    python -m benchmarks.login --logins 64 --concurrencia 16
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from app.autenticacion.security import (
+    get_password_hash, verify_password, verify_password_async,
+    iniciar_pool_hash, cerrar_pool_hash, BCRYPT_PROCESOS
+)
+
+
+PASSWORD = "contraseña-de-prueba"
+HASH = get_password_hash(PASSWORD)
+
+
+def crear_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/login_antes")
+    async def login_antes():
+        return {"ok": verify_password(PASSWORD, HASH)}
+
+    @app.post("/login_despues")
+    async def login_despues():
+        return {"ok": await verify_password_async(PASSWORD, HASH)}
+
+    return app
+
+
+async def rafaga(cliente, ruta, logins, concurrencia):
+    semaforo = asyncio.Semaphore(concurrencia)
+    retrasos = []
+    terminado = asyncio.Event()
+
+    async def login():
+        async with semaforo:
+            r = await cliente.post(ruta)
+            assert r.status_code == 200 and r.json()["ok"], r.text
+
+    async def monitor():
+        while not terminado.is_set():
+            inicio = time.perf_counter()
+            await asyncio.sleep(0.01)
+            retrasos.append(time.perf_counter() - inicio - 0.01)
+
+    tarea_monitor = asyncio.create_task(monitor())
+    await asyncio.sleep(0)
+    inicio = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    total = time.perf_counter() - inicio
+    terminado.set()
+    await tarea_monitor
+
+    retrasos.sort()
+    return {
+        "ruta": ruta,
+        "logins_por_segundo": round(logins / total, 1),
+        "retraso_p50_ms": round(statistics.median(retrasos) * 1000, 1),
+        "retraso_max_ms": round(retrasos[-1] * 1000, 1),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--concurrencia", type=int, default=16)
+    args = parser.parse_args()
+
+    print(f"📊 {args.logins} logins, concurrencia {args.concurrencia}, {BCRYPT_PROCESOS} procesos bcrypt")
+
+    iniciar_pool_hash()
+    # Calentar: que los procesos del pool ya estén levantados
+    await asyncio.gather(*(verify_password_async(PASSWORD, HASH) for _ in range(BCRYPT_PROCESOS)))
+
+    transporte = httpx.ASGITransport(app=crear_app())
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench", timeout=None) as cliente:
+        for ruta in ("/login_antes", "/login_despues"):
+            r = await rafaga(cliente, ruta, args.logins, args.concurrencia)
+            print(
+                f"{r['ruta']:<16} {r['logins_por_segundo']:>7} logins/s   "
+                f"retraso del loop p50 {r['retraso_p50_ms']:>7} ms   máx {r['retraso_max_ms']:>8} ms"
+            )
+
+    cerrar_pool_hash()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,183 @@
+"""
+Benchmark: listado de ofertas con sus actividades (y nombre de cada una).
+
+  - antes:   ofertas y después, por cada oferta, sus actividades y por cada
+             una su Actividad (lo que hacía la carga perezosa: 1 + N + N*M)
+  - despues: GET /ofertas/ real (actividades y nombres con carga anticipada),
+             siguiendo el cursor de página en página hasta juntar las pedidas
+y además GET /ofertas/empresa/{id}, que devuelve todas las ofertas de la
+empresa a la que se le cargan las de prueba.
+
+Carga --ofertas ofertas de prueba (título "bench-listado ...", cada una con
+--actividades actividades de las existentes), mide páginas de distintos
+tamaños contando las consultas que llegan a la base, compara la primera
+página con una de las últimas y al final las borra.
+
+Uso (desde backend/, con la base levantada y al menos una empresa y
+algunas actividades cargadas):
+    python -m benchmarks.ofertas_listado --ofertas 10000 --paginas 100 1000 10000
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import event, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import async_engine, get_async_db
+from app.actividades.models import Actividad
+from app.ofertas.models import OfertaEmpleo, OfertaActividad
+from app.ofertas.routes import router as ofertas_router
+from app.paginacion import LIMITE_MAXIMO, codificar_cursor
+
+
+PREFIJO = "bench-listado"
+NIVELES = ("PRINCIPIANTE", "INTERMEDIO", "AVANZADO", "EXPERTO")
+
+
+def crear_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(ofertas_router)
+
+    @app.get("/antes")
+    async def antes(limit: int, db: AsyncSession = Depends(get_async_db)):
+        ofertas = (await db.execute(
+            select(OfertaEmpleo).where(OfertaEmpleo.activa == True).limit(limit)
+        )).scalars().all()
+        resultado = []
+        for oferta in ofertas:
+            relaciones = (await db.execute(
+                select(OfertaActividad).where(OfertaActividad.id_oferta == oferta.id_oferta)
+            )).scalars().all()
+            actividades = []
+            for rel in relaciones:
+                actividad = await db.get(Actividad, rel.id_actividad)
+                actividades.append({"id_actividad": rel.id_actividad, "nombre_actividad": actividad.nombre})
+            resultado.append({"id_oferta": oferta.id_oferta, "actividades": actividades})
+        return resultado
+
+    return app
+
+
+async def todas_las_paginas(cliente, ruta, cantidad):
+    """Hasta `cantidad` ofertas siguiendo el cursor (páginas de hasta LIMITE_MAXIMO)"""
+    datos, cursor = [], None
+    while len(datos) < cantidad:
+        params = {"limit": min(cantidad - len(datos), LIMITE_MAXIMO)}
+        if cursor:
+            params["cursor"] = cursor
+        r = await cliente.get(ruta, params=params)
+        assert r.status_code == 200, r.text
+        pagina = r.json()
+        datos.extend(pagina["resultados"])
+        cursor = pagina["siguiente"]
+        if not cursor:
+            break
+    return datos
+
+
+async def profundidad(cliente, ids):
+    """Primera página vs una de las últimas: con cursor tardan lo mismo"""
+    for nombre, cursor in (("primera", None), ("profunda", codificar_cursor([ids[-101]]))):
+        params = {"limit": 100}
+        if cursor:
+            params["cursor"] = cursor
+        inicio = time.perf_counter()
+        for _ in range(20):
+            r = await cliente.get("/ofertas/", params=params)
+            assert r.status_code == 200 and len(r.json()["resultados"]) == 100, r.text
+        print(f"página {nombre:<9} (100 ofertas)   {(time.perf_counter() - inicio) / 20 * 1000:>9.1f} ms promedio")
+
+
+async def cargar_datos(cantidad, por_oferta):
+    async with async_engine.begin() as conn:
+        id_empresa = (await conn.execute(text("SELECT min(id_empresa) FROM empresa"))).scalar()
+        actividades = (await conn.execute(
+            text("SELECT id_actividad FROM actividad ORDER BY id_actividad LIMIT :n"), {"n": por_oferta}
+        )).scalars().all()
+        if id_empresa is None or not actividades:
+            raise SystemExit("❌ Hace falta al menos una empresa y una actividad en la base")
+
+        ids = (await conn.execute(text(f"""
+            INSERT INTO oferta_empleo (id_empresa, titulo, descripcion, activa)
+            SELECT :empresa, '{PREFIJO} ' || i, 'Oferta de prueba ' || i, true
+            FROM generate_series(1, :n) AS i
+            RETURNING id_oferta
+        """), {"empresa": id_empresa, "n": cantidad})).scalars().all()
+
+        await conn.execute(
+            text("INSERT INTO oferta_actividad (id_oferta, id_actividad, nivel_requerido) VALUES (:o, :a, :nivel)"),
+            [{"o": o, "a": a, "nivel": NIVELES[(o + a) % len(NIVELES)]} for o in ids for a in actividades]
+        )
+    return id_empresa, ids, len(actividades)
+
+
+async def borrar_datos():
+    async with async_engine.begin() as conn:
+        await conn.execute(text(f"""
+            DELETE FROM oferta_actividad WHERE id_oferta IN (
+                SELECT id_oferta FROM oferta_empleo WHERE titulo LIKE '{PREFIJO} %')
+        """))
+        await conn.execute(text(f"DELETE FROM oferta_empleo WHERE titulo LIKE '{PREFIJO} %'"))
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ofertas", type=int, default=10000)
+    parser.add_argument("--actividades", type=int, default=3, help="actividades por oferta")
+    parser.add_argument("--paginas", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--sin-antes", action="store_true", help="no medir la versión por oferta (lenta)")
+    args = parser.parse_args()
+
+    id_empresa, ids, por_oferta = await cargar_datos(args.ofertas, args.actividades)
+    print(f"📊 {len(ids)} ofertas de prueba con {por_oferta} actividades cada una")
+
+    consultas = [0]
+
+    def contar(*_):
+        consultas[0] += 1
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", contar)
+    transporte = httpx.ASGITransport(app=crear_app())
+    try:
+        async with httpx.AsyncClient(transport=transporte, base_url="http://bench", timeout=None) as cliente:
+            rutas = [("/ofertas/", "despues")] if args.sin_antes else [("/antes", "antes"), ("/ofertas/", "despues")]
+            for limite in args.paginas:
+                for ruta, nombre in rutas:
+                    consultas[0] = 0
+                    inicio = time.perf_counter()
+                    if nombre == "antes":
+                        r = await cliente.get(ruta, params={"limit": limite})
+                        assert r.status_code == 200, r.text
+                        datos = r.json()
+                    else:
+                        datos = await todas_las_paginas(cliente, ruta, limite)
+                        assert all(a["nombre_actividad"] for o in datos for a in o["actividades"])
+                    segundos = time.perf_counter() - inicio
+                    print(
+                        f"{nombre:<8} pedidas {limite:>5}   {len(datos):>6} ofertas   "
+                        f"{consultas[0]:>6} consultas   {segundos * 1000:>9.1f} ms"
+                    )
+
+            if len(ids) > 100:
+                await profundidad(cliente, ids)
+
+            consultas[0] = 0
+            inicio = time.perf_counter()
+            r = await cliente.get(f"/ofertas/empresa/{id_empresa}")
+            segundos = time.perf_counter() - inicio
+            assert r.status_code == 200, r.text
+            print(
+                f"{'empresa':<8} {id_empresa:>13}   {len(r.json()):>6} ofertas   "
+                f"{consultas[0]:>6} consultas   {segundos * 1000:>9.1f} ms"
+            )
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", contar)
+        await borrar_datos()
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -4,6 +4,9 @@ from sqlalchemy.orm import Session
 
 # Importar base de datos
 from app.database import engine, get_db
+import app.versiones  # registra el versionado de datos en las sesiones
+from app.matching.busqueda import preparar_busqueda
+from app.prolog.cambios_hechos import preparar_registro_cambios
 
 # Importar modelos
 from app.personas.models import Persona
@@ -40,6 +43,12 @@ EmpresaActividad.metadata.create_all(bind=engine)
 RelacionAprendida.metadata.create_all(bind=engine)
 Postulacion.metadata.create_all(bind=engine)
 
+# Búsqueda de texto completo (tsvector + GIN); idempotente para bases ya creadas
+preparar_busqueda(engine)
+
+# Registro de cambios para la generación incremental de hechos de Prolog
+preparar_registro_cambios(engine)
+
 # -------------------------------------------------------------------------
 # FASTAPI APP
 # -------------------------------------------------------------------------
@@ -79,6 +88,72 @@ app.include_router(relaciones_router, prefix="/api/relaciones-aprendidas")
 app.include_router(postulaciones_router, prefix="/api/postulaciones")
 
 
+# -------------------------------------------------------------------------
+# ARRANQUE: procesos de hashing listos antes del primer login, escritura
+# periódica de los datos de login, catálogo de actividades e índice de
+# búsqueda en memoria
+# -------------------------------------------------------------------------
+@app.on_event("startup")
+def iniciar_pool_hashing():
+    from app.autenticacion.security import iniciar_pool_hash
+    iniciar_pool_hash()
+
+
+@app.on_event("startup")
+async def iniciar_bitacora_login():
+    from app.autenticacion import bitacora_login
+    bitacora_login.iniciar()
+
+
+@app.on_event("startup")
+def cargar_catalogo_actividades():
+    from app.actividades.catalogo import catalogo_actividades
+    try:
+        catalogo_actividades.cargar()
+    except Exception as e:
+        # Se vuelve a intentar en el primer uso
+        print(f"⚠️ No se pudo cargar el catálogo de actividades: {e}")
+
+
+@app.on_event("startup")
+def precargar_indice_busqueda():
+    # Con MOTOR_BUSQUEDA=memoria el índice se arma al arrancar y no en la primera búsqueda
+    from app.matching.busqueda import MOTOR_BUSQUEDA
+    if MOTOR_BUSQUEDA == "memoria":
+        from app.matching.indice_busqueda import indice_busqueda
+        indice_busqueda.precargar()
+
+
+# -------------------------------------------------------------------------
+# APAGADO: liberar conexiones al motor Prolog y a la base
+# -------------------------------------------------------------------------
+@app.on_event("shutdown")
+async def cerrar_clientes_prolog():
+    from app.prolog.cliente import cerrar_async
+    await cerrar_async()
+
+
+@app.on_event("shutdown")
+def cerrar_pool_hashing():
+    from app.autenticacion.security import cerrar_pool_hash
+    cerrar_pool_hash()
+
+
+@app.on_event("shutdown")
+async def vaciar_bitacora_login():
+    # Antes de cerrar el motor async: escribe los datos de login pendientes
+    from app.autenticacion import bitacora_login
+    await bitacora_login.detener()
+
+
+@app.on_event("shutdown")
+async def cerrar_motor_async():
+    from app.database import async_engine, async_read_engine
+    await async_engine.dispose()
+    if async_read_engine is not None:
+        await async_read_engine.dispose()
+
+
 # -------------------------------------------------------------------------
 # RUTAS BÁSICAS
 # -------------------------------------------------------------------------
@@ -90,6 +165,11 @@ def root():
 def health():
     return {"status": "ok", "database": "connected"}
 
+@app.get("/health/db/pool")
+def health_db_pool():
+    from app.database import estadisticas_pool
+    return estadisticas_pool()
+
 @app.get("/test-cors")
 def test_cors():
     return {"message": "✅ CORS funcionando"}
@@ -0,0 +1,61 @@
+"""
+Flush por tamaño de la bitácora de login (app/autenticacion/bitacora_login.py):
+la tarea queda referenciada, no se disparan flushes superpuestos y detener()
+la espera antes de terminar.
+
+Uso (desde backend/):
+    python -m pytest tests/test_bitacora_login.py
+"""
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app.autenticacion import bitacora_login
+
+
+class ConexionFalsa:
+    def __init__(self, lotes):
+        self.lotes = lotes
+
+    async def execute(self, sentencia, parametros):
+        await asyncio.sleep(0)
+        self.lotes.append(len(parametros))
+
+
+class EngineFalso:
+    def __init__(self):
+        self.lotes = []
+
+    @asynccontextmanager
+    async def begin(self):
+        yield ConexionFalsa(self.lotes)
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    falso = EngineFalso()
+    monkeypatch.setattr(bitacora_login, "async_engine", falso)
+    monkeypatch.setattr(bitacora_login, "LOGIN_FLUSH_MAXIMO", 2)
+    bitacora_login._pendientes.clear()
+    yield falso
+    bitacora_login._pendientes.clear()
+
+
+def test_flush_por_tamanio_referenciado_y_esperado(engine):
+    async def escenario():
+        bitacora_login.registrar_login_exitoso(1)
+        bitacora_login.registrar_login_fallido(2)
+        assert len(bitacora_login._flushes_por_tamanio) == 1
+
+        # Otro usuario antes de que corra el flush: no dispara uno nuevo
+        bitacora_login.registrar_login_fallido(3)
+        assert len(bitacora_login._flushes_por_tamanio) == 1
+
+        await bitacora_login.detener()
+        assert not bitacora_login._flushes_por_tamanio
+        assert not bitacora_login._pendientes
+
+    asyncio.run(escenario())
+    # Un UPDATE para el login exitoso y otro para los dos usuarios con fallos
+    assert sorted(engine.lotes) == [1, 2]
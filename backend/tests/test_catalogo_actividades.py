@@ -0,0 +1,42 @@
+"""
+Orden de CatalogoActividades.listar: por id, sin depender del orden en que
+llegan las filas ni de las altas hechas con agregar().
+
+Uso (desde backend/):
+    python -m pytest tests/test_catalogo_actividades.py
+"""
+from types import SimpleNamespace
+
+from app.actividades.catalogo import CatalogoActividades
+from app.versiones import version_tabla
+
+
+def _actividad(id_actividad):
+    return {
+        "id_actividad": id_actividad, "nombre": f"Actividad {id_actividad}",
+        "area": None, "especialidad": None, "descripcion": None,
+    }
+
+
+def _catalogo(ids):
+    catalogo = CatalogoActividades()
+    catalogo._armar([_actividad(i) for i in ids], version_tabla("actividad"))
+    return catalogo
+
+
+def _ids(actividades):
+    return [a["id_actividad"] for a in actividades]
+
+
+def test_listar_ordena_por_id():
+    catalogo = _catalogo([7, 2, 9, 4])
+    assert _ids(catalogo.listar()) == [2, 4, 7, 9]
+    assert _ids(catalogo.listar(despues_de=4, limit=1)) == [7]
+    assert _ids(catalogo.listar(despues_de=9)) == []
+
+
+def test_listar_incluye_altas_en_orden():
+    catalogo = _catalogo([10, 30])
+    catalogo.agregar(SimpleNamespace(**_actividad(20)), version_tabla("actividad"))
+    assert _ids(catalogo.listar()) == [10, 20, 30]
+    assert _ids(catalogo.listar(despues_de=10)) == [20, 30]
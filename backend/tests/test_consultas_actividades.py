@@ -0,0 +1,135 @@
+"""
+Regresión de consultas SQL por pedido en las rutas de actividades.
+
+Cuenta las sentencias que llegan a la base (evento before_cursor_execute del
+motor async) y falla si una ruta hace más de las esperadas:
+  - GET  /actividades/persona/{dni}  -> CONSULTAS_PERSONA, tenga las actividades que tenga
+  - POST /actividades/personas/lote  -> CONSULTAS_LOTE, sea cual sea la cantidad de DNIs
+
+Carga sus propias personas y actividades de prueba y las borra al terminar.
+Necesita la base levantada (DB_HOST, DB_PORT, ...); si no hay conexión se
+saltea.
+
+Uso (desde backend/):
+    python -m pytest tests/test_consultas_actividades.py
+"""
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import event, text
+
+from app.database import async_engine
+from app.actividades.routes import router as actividades_router
+
+
+# Consultas esperadas por pedido
+CONSULTAS_PERSONA = 1
+CONSULTAS_LOTE = 1
+
+# DNIs de prueba (fuera del rango de los datos de ejemplo)
+DNI_INICIAL = 99000001
+PERSONAS = 25
+PREFIJO = "test-consultas"
+
+
+class ContadorConsultas:
+    def __init__(self):
+        self.total = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.total += 1
+
+
+async def _cargar_datos():
+    dnis = list(range(DNI_INICIAL, DNI_INICIAL + PERSONAS))
+    async with async_engine.begin() as conn:
+        await _borrar_datos(conn)
+        ids = (await conn.execute(text(f"""
+            INSERT INTO actividad (nombre, area, especialidad)
+            SELECT '{PREFIJO} ' || i, 'Pruebas', 'Consultas'
+            FROM generate_series(1, 3) AS i
+            RETURNING id_actividad
+        """))).scalars().all()
+        await conn.execute(text("""
+            INSERT INTO persona (dni, apellido, nombre, fecha_nacimiento, direccion,
+                                 ciudad, provincia, sexo, email)
+            VALUES (:dni, 'Prueba', 'Consultas', '1990-01-01', 'Calle 1',
+                    'Rosario', 'Santa Fe', 'X', :email)
+        """), [{"dni": dni, "email": f"{PREFIJO}-{dni}@ejemplo.com"} for dni in dnis])
+        # De 0 a 3 actividades por persona: la cantidad de consultas no cambia
+        await conn.execute(text("""
+            INSERT INTO persona_actividad (dni, id_actividad, nivel_experiencia, años_experiencia)
+            VALUES (:dni, :id_actividad, 'INTERMEDIO', 2)
+        """), [
+            {"dni": dni, "id_actividad": id_actividad}
+            for n, dni in enumerate(dnis) for id_actividad in ids[:n % 4]
+        ])
+    return dnis
+
+
+async def _borrar_datos(conn):
+    await conn.execute(
+        text("DELETE FROM persona WHERE dni BETWEEN :desde AND :hasta"),
+        {"desde": DNI_INICIAL, "hasta": DNI_INICIAL + PERSONAS - 1}
+    )
+    await conn.execute(text(f"DELETE FROM actividad WHERE nombre LIKE '{PREFIJO} %'"))
+
+
+async def _con_cliente(prueba):
+    """Corre `prueba(cliente, contador, dnis)` con datos cargados y contador activo"""
+    try:
+        dnis = await _cargar_datos()
+    except OSError as e:
+        await async_engine.dispose()
+        pytest.skip(f"Base de datos no disponible: {e}")
+
+    app = FastAPI()
+    app.include_router(actividades_router)
+    contador = ContadorConsultas()
+    event.listen(async_engine.sync_engine, "before_cursor_execute", contador)
+    try:
+        transporte = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transporte, base_url="http://test") as cliente:
+            await prueba(cliente, contador, dnis)
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", contador)
+        async with async_engine.begin() as conn:
+            await _borrar_datos(conn)
+        await async_engine.dispose()
+
+
+async def _pedir(cliente, contador, metodo, ruta, **kwargs):
+    """(respuesta, consultas) de un pedido"""
+    antes = contador.total
+    r = await cliente.request(metodo, ruta, **kwargs)
+    assert r.status_code == 200, f"{ruta}: {r.status_code} {r.text}"
+    return r.json(), contador.total - antes
+
+
+def test_actividades_persona_una_consulta():
+    async def prueba(cliente, contador, dnis):
+        for dni in dnis[:4]:
+            datos, consultas = await _pedir(cliente, contador, "GET", f"/actividades/persona/{dni}")
+            assert len(datos) == (dni - DNI_INICIAL) % 4
+            assert consultas <= CONSULTAS_PERSONA, (
+                f"GET /actividades/persona/{dni}: {consultas} consultas (esperadas {CONSULTAS_PERSONA})"
+            )
+
+    asyncio.run(_con_cliente(prueba))
+
+
+@pytest.mark.parametrize("cantidad", [1, 10, PERSONAS])
+def test_actividades_personas_lote_una_consulta(cantidad):
+    async def prueba(cliente, contador, dnis):
+        datos, consultas = await _pedir(
+            cliente, contador, "POST", "/actividades/personas/lote", json={"dnis": dnis[:cantidad]}
+        )
+        assert not datos["no_encontrados"]
+        assert len(datos["actividades"]) == cantidad
+        assert consultas <= CONSULTAS_LOTE, (
+            f"POST /actividades/personas/lote ({cantidad} DNIs): {consultas} consultas (esperadas {CONSULTAS_LOTE})"
+        )
+
+    asyncio.run(_con_cliente(prueba))
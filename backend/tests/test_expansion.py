@@ -0,0 +1,91 @@
+"""
+Expansión semántica (app/prolog/expansion.py): las palabras que no están en
+caché van a Prolog en un solo POST /expandir, las expansiones se devuelven
+tal como las manda Prolog y, si Prolog falla, se expande localmente.
+
+Uso (desde backend/):
+    python -m pytest tests/test_expansion.py
+"""
+import asyncio
+
+import pytest
+
+from app.prolog import expansion
+
+
+class RespuestaFalsa:
+    status_code = 200
+
+    def __init__(self, datos):
+        self._datos = datos
+
+    def json(self):
+        return self._datos
+
+
+# Lo que devolvería /expandir con por_palabra: true
+EXPANSIONES_PROLOG = {
+    "python": ["Python Avanzado", "Django"],
+    "diseño": ["Diseño Gráfico", "diseño"],
+    "java": [],
+}
+
+
+@pytest.fixture
+def pedidos(monkeypatch):
+    """Registra los pedidos a /expandir y responde con EXPANSIONES_PROLOG"""
+    registrados = []
+
+    def responder(ruta, json):
+        registrados.append(json)
+        return RespuestaFalsa({
+            "status": "ok",
+            "por_palabra": [{"palabra": p, "expandidas": EXPANSIONES_PROLOG[p]} for p in json["palabras"]],
+        })
+
+    async def responder_async(ruta, json):
+        return responder(ruta, json)
+
+    monkeypatch.setattr(expansion.cliente, "post", responder)
+    monkeypatch.setattr(expansion.cliente, "post_async", responder_async)
+    monkeypatch.setattr(expansion, "_interruptor", expansion._Interruptor())
+    expansion.limpiar_cache()
+    yield registrados
+    expansion.limpiar_cache()
+
+
+def test_un_pedido_para_todas_las_palabras_sin_cache(pedidos):
+    resultado = expansion.expandir(["python", "diseño", "python", "java"])
+
+    assert pedidos == [{"palabras": ["python", "diseño", "java"], "por_palabra": True}]
+    # Expansiones sin normalizar, como las devuelve Prolog
+    assert resultado == ["python", "diseño", "java", "Python Avanzado", "Django", "Diseño Gráfico"]
+
+
+def test_solo_se_piden_las_que_faltan(pedidos):
+    expansion.expandir(["python"])
+    resultado = expansion.expandir(["python", "java"])
+
+    assert pedidos[1] == {"palabras": ["java"], "por_palabra": True}
+    assert resultado == ["python", "java", "Python Avanzado", "Django"]
+
+    expansion.expandir(["java", "python"])
+    assert len(pedidos) == 2
+
+
+def test_async_igual_que_sync(pedidos):
+    resultado = asyncio.run(expansion.expandir_async(["diseño", "python"]))
+    assert len(pedidos) == 1
+    assert resultado == ["diseño", "python", "Diseño Gráfico", "Python Avanzado", "Django"]
+
+
+def test_sin_prolog_expande_localmente(pedidos, monkeypatch):
+    def falla(ruta, json):
+        raise ConnectionError("sin conexión")
+
+    monkeypatch.setattr(expansion.cliente, "post", falla)
+    monkeypatch.setattr(expansion._grafo, "expandir", lambda palabra: [f"{palabra} local"])
+
+    assert expansion.expandir(["Python", "Diseño"]) == ["Python", "Diseño", "python local", "diseno local"]
+    # Lo expandido localmente no queda en caché
+    assert expansion._cache_obtener("Python") is None
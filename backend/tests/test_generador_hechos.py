@@ -0,0 +1,378 @@
+"""
+Generación de hechos para Prolog (app/prolog/generador_hechos.py y sus
+módulos cambios_hechos, archivos_hechos y publicacion_hechos).
+
+Sin base de datos:
+  - diario de deltas: los archivos se enlazan y las operaciones se agregan
+    como segmentos; al superar DIARIO_MAXIMO se compactan en los archivos
+  - publicación en ruta plana cuando no se pueden crear enlaces simbólicos
+  - marca de agua: no vale si no corresponde al manifiesto vigente
+
+Con la base levantada (DB_HOST, DB_PORT, ...; si no hay conexión se saltean):
+  - la generación completa guarda la marca de agua junto al manifiesto
+  - el modo incremental envía solo el delta de lo anotado en cambios_hechos
+  - la compactación deja los mismos hechos que una generación completa
+  - TRUNCATE, una marca vieja o un delta fallido vuelven a la completa
+  - relaciones_aprendidas solo se relee (y se consulta a Prolog) si cambió
+  - una generación sin cambios igual informa a Prolog la versión de datos
+
+El motor Prolog se reemplaza por un cliente falso que registra los pedidos.
+Las filas de prueba se borran al terminar.
+
+Uso (desde backend/):
+    python -m pytest tests/test_generador_hechos.py
+"""
+import json
+import os
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.database import engine
+from app.prolog import archivos_hechos, cambios_hechos, cliente, generador_hechos, publicacion_hechos
+
+
+PREFIJO = "test-generador"
+
+
+@pytest.fixture
+def directorio(tmp_path, monkeypatch):
+    monkeypatch.setattr(archivos_hechos, "DIRECTORIO_DATOS", str(tmp_path / "datos"))
+    monkeypatch.setattr(publicacion_hechos, "DIRECTORIO_LOCAL", str(tmp_path / "local"))
+    os.makedirs(archivos_hechos.directorio_snapshots())
+    return tmp_path / "datos"
+
+
+class RespuestaFalsa:
+    def __init__(self, datos, status_code=200):
+        self._datos = datos
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+    def json(self):
+        return self._datos
+
+
+class PrologFalso:
+    """Registra los pedidos (ruta, params, cuerpo); fallar: rutas que responden 500"""
+
+    def __init__(self):
+        self.pedidos = []
+        self.fallar = set()
+
+    def post(self, ruta, params=None, data=None, headers=None):
+        self.pedidos.append((ruta, params, data.decode("utf-8") if data else None))
+        return RespuestaFalsa({"status": "ok"}, 500 if ruta in self.fallar else 200)
+
+    def get(self, ruta, **kwargs):
+        self.pedidos.append((ruta, None, None))
+        return RespuestaFalsa({"relaciones": []})
+
+    def rutas(self):
+        return [ruta for ruta, _, _ in self.pedidos]
+
+    def ultimo(self, ruta):
+        return [p for p in self.pedidos if p[0] == ruta][-1]
+
+
+@pytest.fixture
+def prolog(monkeypatch):
+    falso = PrologFalso()
+    monkeypatch.setattr(cliente, "post", falso.post)
+    monkeypatch.setattr(cliente, "get", falso.get)
+    return falso
+
+
+# -------------------------
+# SIN BASE DE DATOS
+# -------------------------
+HECHOS = [
+    'persona(1, "Ana", "Diaz", "Rosario", "Santa Fe").',
+    'persona(2, "Luis", "Paz", "Parana", "Entre Rios").',
+    'actividad(7, "Python", "Sistemas", "Backend", "").',
+]
+OFERTAS = ['oferta(10, 3, "Backend", true).', 'oferta_actividad(10, 7, "avanzado").']
+POSTULACIONES = ['postulacion(1, 10, "PENDIENTE").']
+RELACIONES = ["relacion_co_ocurrencia('Python', 'Django', 0.85, 1)."]
+
+
+def _publicar_inicial():
+    snapshot = archivos_hechos.nuevo_snapshot()
+    manifiesto = {"id": os.path.basename(snapshot)}
+    for nombre, lineas in (("hechos", HECHOS), ("ofertas", OFERTAS),
+                           ("postulaciones", POSTULACIONES), ("relaciones", RELACIONES)):
+        _, manifiesto[nombre] = archivos_hechos.escribir(snapshot, nombre, lineas)
+    publicacion_hechos.publicar(snapshot, manifiesto)
+    return manifiesto
+
+
+def _publicar_delta(operaciones, archivos_tocados):
+    anteriores = archivos_hechos.manifiesto_vigente()
+    snapshot = archivos_hechos.nuevo_snapshot()
+    manifiesto = archivos_hechos.escribir_hechos_delta(snapshot, anteriores, operaciones, archivos_tocados)
+    manifiesto["relaciones"] = archivos_hechos.reutilizar(snapshot, "relaciones", anteriores)
+    publicacion_hechos.publicar(snapshot, {**manifiesto, "id": os.path.basename(snapshot)})
+    return manifiesto
+
+
+def _vigente(archivo):
+    with open(archivos_hechos.ruta_vigente(archivo), encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+DELTA_PERSONA = [
+    "retractall(persona(2, _, _, _, _)).",
+    'assertz(persona(2, "Luis", "Paz", "Rosario", "Santa Fe")).',
+]
+DELTA_OFERTA = ["retractall(oferta(10, _, _, _))."]
+
+
+def test_delta_agrega_segmentos_al_diario(directorio):
+    inicial = _publicar_inicial()
+
+    manifiesto = _publicar_delta(DELTA_PERSONA, {"hechos"})
+    assert manifiesto["diario"] == ["diario-000001.pl"]
+    assert manifiesto["diario_archivos"] == ["hechos"]
+    assert manifiesto["hechos"] == inicial["hechos"]
+    assert _vigente("hechos.pl") == HECHOS
+    assert _vigente("diario-000001.pl") == DELTA_PERSONA
+
+    manifiesto = _publicar_delta(DELTA_OFERTA, {"ofertas"})
+    assert manifiesto["diario"] == ["diario-000001.pl", "diario-000002.pl"]
+    assert manifiesto["diario_archivos"] == ["hechos", "ofertas"]
+    assert manifiesto["operaciones_diario"] == 3
+    assert _vigente("diario-000001.pl") == DELTA_PERSONA
+
+
+def test_compactar_aplica_el_diario_en_los_archivos(directorio, monkeypatch):
+    _publicar_inicial()
+    _publicar_delta(DELTA_PERSONA, {"hechos"})
+
+    monkeypatch.setattr(archivos_hechos, "DIARIO_MAXIMO", 2)
+    manifiesto = _publicar_delta(DELTA_OFERTA, {"ofertas"})
+
+    assert manifiesto["diario"] == [] and manifiesto["operaciones_diario"] == 0
+    assert _vigente("hechos.pl") == [HECHOS[0], HECHOS[2], 'persona(2, "Luis", "Paz", "Rosario", "Santa Fe").']
+    assert _vigente("ofertas.pl") == [OFERTAS[1]]
+    assert _vigente("postulaciones.pl") == POSTULACIONES
+    assert not os.path.exists(archivos_hechos.ruta_vigente("diario-000001.pl"))
+
+
+def test_publicar_sin_enlace_simbolico_usa_ruta_plana(directorio, monkeypatch):
+    def sin_enlaces(*args, **kwargs):
+        raise OSError("sin enlaces simbólicos")
+
+    monkeypatch.setattr(os, "symlink", sin_enlaces)
+    _publicar_inicial()
+    _publicar_delta(DELTA_PERSONA, {"hechos"})
+    assert sorted(os.listdir(directorio)) == [
+        "diario-000001.pl", "hechos.pl", "manifiesto.json", "ofertas.pl",
+        "postulaciones.pl", "relaciones.pl", "snapshots",
+    ]
+
+    # Al compactar se borran los segmentos del diario de la ruta plana
+    monkeypatch.setattr(archivos_hechos, "DIARIO_MAXIMO", 0)
+    _publicar_delta(DELTA_OFERTA, {"ofertas"})
+    assert "diario-000001.pl" not in os.listdir(directorio)
+    assert _vigente("ofertas.pl") == [OFERTAS[1]]
+
+
+def test_marca_de_otro_manifiesto_no_vale(directorio):
+    assert publicacion_hechos.leer_marca()["hwm"] is None
+
+    _publicar_inicial()
+    publicacion_hechos.guardar_marca(1234)
+    marca = publicacion_hechos.leer_marca()
+    assert marca["hwm"] == 1234 and not marca["recarga_pendiente"]
+
+    # Otro proceso publicó sin actualizar la marca
+    _publicar_delta(DELTA_PERSONA, {"hechos"})
+    marca = publicacion_hechos.leer_marca()
+    assert marca["hwm"] is None and marca["recarga_pendiente"]
+
+
+# -------------------------
+# CON BASE DE DATOS
+# -------------------------
+def _borrar_datos(conexion):
+    conexion.execute(text(f"DELETE FROM actividad WHERE nombre LIKE '{PREFIJO} %'"))
+    conexion.execute(text(f"DELETE FROM relaciones_aprendidas WHERE habilidad_base LIKE '{PREFIJO} %'"))
+
+
+@pytest.fixture
+def base(directorio, prolog):
+    try:
+        with engine.begin() as conexion:
+            _borrar_datos(conexion)
+    except OperationalError as e:
+        pytest.skip(f"Base de datos no disponible: {e}")
+    if not cambios_hechos.preparar_registro_cambios(engine):
+        pytest.skip("No se pudo preparar el registro de cambios")
+    yield
+    with engine.begin() as conexion:
+        _borrar_datos(conexion)
+
+
+def _ejecutar(sql, params=None):
+    with engine.begin() as conexion:
+        return conexion.execute(text(sql), params or {})
+
+
+def _crear_actividad(nombre):
+    return _ejecutar(
+        "INSERT INTO actividad (nombre, area, especialidad) VALUES (:nombre, 'Pruebas', 'Generador') "
+        "RETURNING id_actividad", {"nombre": f"{PREFIJO} {nombre}"}
+    ).scalar()
+
+
+def _ruta_marca():
+    return os.path.join(archivos_hechos.DIRECTORIO_DATOS, "marca_agua.json")
+
+
+def _marca():
+    with open(_ruta_marca()) as f:
+        return json.load(f)
+
+
+def _escribir_marca(**cambios):
+    marca = {**_marca(), **cambios}
+    with open(_ruta_marca(), "w") as f:
+        json.dump(marca, f)
+
+
+def test_completo_guarda_la_marca(base, prolog):
+    resultado = generador_hechos.generar_hechos(incremental=True, version=5)
+
+    assert resultado["modo"] == "completo" and resultado["prolog"] == "ok"
+    # Sin marca previa se recargan todos los archivos
+    assert prolog.ultimo("reload_hechos")[1] == {"version": 5}
+    marca = _marca()
+    assert marca["hwm"] is not None and not marca["recarga_pendiente"]
+    assert marca["snapshot"] == archivos_hechos.manifiesto_vigente()["id"]
+
+
+def test_delta_solo_lo_anotado(base, prolog):
+    generador_hechos.generar_hechos(incremental=True)
+    prolog.pedidos.clear()
+
+    id_actividad = _crear_actividad("Delta")
+    resultado = generador_hechos.generar_hechos(incremental=True, version=6)
+
+    assert resultado["modo"] == "incremental" and resultado["operaciones"] == 2
+    _, params, cuerpo = prolog.ultimo("aplicar_delta")
+    assert params == {"version": 6}
+    assert cuerpo.splitlines() == [
+        f"retractall(actividad({id_actividad}, _, _, _, _)).",
+        f'assertz(actividad({id_actividad}, "Test-generador Delta", "Pruebas", "Generador", "")).',
+    ]
+    # relaciones_aprendidas no cambió: no se consulta a Prolog
+    assert prolog.rutas() == ["aplicar_delta"]
+    manifiesto = archivos_hechos.manifiesto_vigente()
+    assert manifiesto["diario"] == ["diario-000001.pl"]
+    assert _marca()["snapshot"] == manifiesto["id"]
+
+    _ejecutar("DELETE FROM actividad WHERE id_actividad = :id", {"id": id_actividad})
+    generador_hechos.generar_hechos(incremental=True)
+    assert prolog.ultimo("aplicar_delta")[2] == f"retractall(actividad({id_actividad}, _, _, _, _))."
+
+
+def test_compactacion_igual_a_completo(base, prolog, monkeypatch):
+    generador_hechos.generar_hechos(incremental=True)
+    monkeypatch.setattr(archivos_hechos, "DIARIO_MAXIMO", 0)
+
+    _crear_actividad("Compactada")
+    resultado = generador_hechos.generar_hechos(incremental=True)
+    assert resultado["modo"] == "incremental"
+    assert archivos_hechos.manifiesto_vigente()["diario"] == []
+    compactado = sorted(_vigente("hechos.pl"))
+
+    resultado = generador_hechos.generar_hechos(incremental=False)
+    assert resultado["modo"] == "completo"
+    assert sorted(_vigente("hechos.pl")) == compactado
+
+
+def test_truncate_o_marca_vieja_vuelven_a_completo(base, prolog):
+    generador_hechos.generar_hechos(incremental=True)
+
+    # TRUNCATE anota clave null
+    id_vaciado = _ejecutar(
+        "INSERT INTO cambios_hechos (tabla, clave) VALUES ('postulaciones', 'null') RETURNING id"
+    ).scalar()
+    try:
+        assert generador_hechos.generar_hechos(incremental=True)["modo"] == "completo"
+    finally:
+        _ejecutar("DELETE FROM cambios_hechos WHERE id = :id", {"id": id_vaciado})
+    assert generador_hechos.generar_hechos(incremental=True)["modo"] == "incremental"
+
+    # Marca más vieja que la mitad de la retención: pueden faltar anotaciones
+    _escribir_marca(generado=_marca()["generado"] - cambios_hechos.CAMBIOS_HECHOS_RETENCION)
+    assert generador_hechos.generar_hechos(incremental=True)["modo"] == "completo"
+
+    # Marca de otro snapshot
+    _escribir_marca(snapshot="otro")
+    assert generador_hechos.generar_hechos(incremental=True)["modo"] == "completo"
+
+
+def test_delta_fallido_recarga_todo(base, prolog):
+    generador_hechos.generar_hechos(incremental=True)
+
+    _crear_actividad("Fallida")
+    prolog.fallar.add("aplicar_delta")
+    assert generador_hechos.generar_hechos(incremental=True)["prolog"] == "error"
+    assert _marca()["hwm"] is None and _marca()["recarga_pendiente"]
+
+    # Los archivos ya tienen el cambio pero Prolog no: completa y recarga todo
+    prolog.fallar.clear()
+    prolog.pedidos.clear()
+    resultado = generador_hechos.generar_hechos(incremental=True)
+    assert resultado["modo"] == "completo" and resultado["prolog"] == "ok"
+    assert prolog.ultimo("reload_hechos")[1] == {}
+    assert resultado["recargados"] == list(archivos_hechos.ARCHIVOS)
+    assert not _marca()["recarga_pendiente"]
+
+
+def test_relaciones_solo_si_cambiaron(base, prolog):
+    generador_hechos.generar_hechos(incremental=True)
+    prolog.pedidos.clear()
+
+    _ejecutar(
+        "INSERT INTO relaciones_aprendidas (habilidad_base, habilidad_objetivo, confianza, frecuencia) "
+        f"VALUES ('{PREFIJO} A', '{PREFIJO} B', 0.7, 3)"
+    )
+    resultado = generador_hechos.generar_hechos(incremental=True)
+
+    assert resultado["modo"] == "incremental"
+    assert prolog.rutas() == ["relaciones_aprendidas", "aplicar_delta"]
+    operaciones = prolog.ultimo("aplicar_delta")[2].splitlines()
+    assert operaciones[0] == "retractall(relacion_co_ocurrencia(_, _, _, _))."
+    assert "assertz(relacion_co_ocurrencia('Test-generador A', 'Test-generador B', 0.7, 3))." in operaciones
+
+    # Un UPDATE que no cambia el archivo: se relee pero no se envía nada
+    prolog.pedidos.clear()
+    _ejecutar(f"UPDATE relaciones_aprendidas SET fuente = 'manual' WHERE habilidad_base = '{PREFIJO} A'")
+    resultado = generador_hechos.generar_hechos(incremental=True)
+    assert resultado["operaciones"] == 0
+    assert prolog.rutas() == ["relaciones_aprendidas"]
+
+
+def test_sin_cambios_registra_la_version(base, prolog):
+    generador_hechos.generar_hechos(incremental=True, version=7)
+
+    # Completa con el mismo contenido: no se recarga, pero se informa la versión
+    prolog.pedidos.clear()
+    resultado = generador_hechos.generar_hechos(incremental=False, version=8)
+    assert resultado["modo"] == "completo" and resultado["recargados"] == []
+    assert prolog.pedidos == [("relaciones_aprendidas", None, None), ("version_hechos", {"version": 8}, None)]
+
+    # Incremental sin anotaciones: ni delta ni snapshot nuevo, solo la versión
+    snapshot = archivos_hechos.manifiesto_vigente()["id"]
+    prolog.pedidos.clear()
+    resultado = generador_hechos.generar_hechos(incremental=True, version=9)
+    assert resultado["modo"] == "incremental" and resultado["operaciones"] == 0
+    assert prolog.pedidos == [("version_hechos", {"version": 9}, None)]
+    assert archivos_hechos.manifiesto_vigente()["id"] == snapshot
+    assert resultado["prolog"] == "ok"
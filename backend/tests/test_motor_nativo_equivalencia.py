@@ -0,0 +1,278 @@
+"""
+Equivalencia entre el motor de matching nativo (app/matching/motor_nativo.py)
+y recomendacion/3 de reglas.pl.
+
+Las mismas tablas de prueba se cargan en una base SQLite en memoria (de ahí
+lee el motor nativo, con sus propias consultas) y se exportan a hechos con
+los formateadores de formato_hechos (de ahí lee Prolog). Los casos cubren:
+  - nivel de la persona menor al requerido (VP < VR: el requisito no suma)
+  - nivel mayor o igual (VP >= VR: VP*20 + años*5)
+  - actividades requeridas que la persona no tiene
+  - ofertas activas sin actividades requeridas (puntaje 0: no se recomiendan)
+  - ofertas inactivas (no se recomiendan aunque se cumplan los requisitos)
+  - niveles desconocidos, en la persona o en la oferta (el requisito no suma)
+  - niveles con mayúsculas o acentos (se normalizan igual en ambos motores)
+  - años_experiencia NULL: si el requisito se cumple, Prolog falla con un
+    error de instanciación para esa persona (el nativo responde "error");
+    si no se cumple, no afecta
+
+La comparación con Prolog necesita SWI-Prolog (swipl en el PATH); sin él
+esas pruebas se saltean. Los puntajes esperados calculados a mano se
+verifican siempre contra el motor nativo y contra una transcripción directa
+de las reglas de reglas.pl en Python (_recomendaciones_reglas).
+
+Uso (desde backend/):
+    python -m pytest tests/test_motor_nativo_equivalencia.py
+"""
+import os
+import shutil
+import subprocess
+from collections import namedtuple
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from app.matching.motor_nativo import MotorNativo, _Datos
+from app.prolog.formato_hechos import (
+    limpiar_y_formatear, _hecho_oferta, _hecho_oferta_actividad, _hecho_persona_actividad
+)
+
+
+REGLAS = os.path.join(os.path.dirname(__file__), os.pardir, "app", "prolog", "reglas.pl")
+SWIPL = shutil.which("swipl")
+
+Oferta = namedtuple("Oferta", "id_oferta id_empresa titulo activa")
+Requisito = namedtuple("Requisito", "id_oferta id_actividad nivel_requerido")
+Habilidad = namedtuple("Habilidad", "dni id_actividad nivel_experiencia años_experiencia")
+
+OFERTAS = [
+    Oferta(10, 1, "Backend", True),
+    Oferta(11, 1, "Datos", True),
+    Oferta(12, 1, "Sin requisitos", True),
+    Oferta(13, 1, "Cerrada", False),
+    Oferta(14, 1, "Nivel desconocido", True),
+    Oferta(15, 1, "Acentos", True),
+]
+
+REQUISITOS = [
+    Requisito(10, 1, "INTERMEDIO"),
+    Requisito(10, 2, "AVANZADO"),
+    Requisito(11, 3, "EXPERTO"),
+    Requisito(13, 1, "PRINCIPIANTE"),
+    Requisito(14, 1, "SENIOR"),
+    Requisito(14, 4, "INTERMEDIO"),
+    Requisito(15, 5, "Intermédio"),
+]
+
+HABILIDADES = [
+    # VP >= VR con años (oferta 10) y VP < VR (oferta 10); cumpliría la oferta 13, inactiva
+    Habilidad(30000001, 1, "AVANZADO", 3),
+    Habilidad(30000001, 2, "INTERMEDIO", 10),
+    # Experto con años (oferta 11); nivel desconocido en la persona (ofertas 10 y 14)
+    Habilidad(30000002, 3, "EXPERTO", 5),
+    Habilidad(30000002, 1, "MAESTRO", 2),
+    Habilidad(30000002, 4, "PRINCIPIANTE", 0),
+    # Requisito con nivel desconocido y otro cumplido (oferta 14); acentos (oferta 15)
+    Habilidad(30000003, 4, "EXPERTO", 0),
+    Habilidad(30000003, 5, "INTERMEDIO", 1),
+    # Le falta una de las dos actividades de la oferta 10
+    Habilidad(30000005, 2, "EXPERTO", 1),
+    # Años NULL en un requisito que cumple (oferta 10): error para la persona
+    Habilidad(30000007, 1, "EXPERTO", None),
+    # Años NULL en requisitos que no cumple (oferta 11) o de nivel desconocido (oferta 14)
+    Habilidad(30000008, 3, "PRINCIPIANTE", None),
+    Habilidad(30000008, 1, "MAESTRO", None),
+]
+
+# 30000004 no tiene actividades; 30000006 no existe
+DNIS = [30000001, 30000002, 30000003, 30000004, 30000005, 30000006, 30000007, 30000008]
+
+# Puntajes según reglas.pl: suma de (VP*20 + años*5) de los requisitos
+# cumplidos / (100 * requisitos) * 100; solo los mayores que 0
+ESPERADOS = {
+    (30000001, 10): 37.5,    # (3*20 + 3*5) / 200
+    (30000002, 11): 105.0,   # (4*20 + 5*5) / 100
+    (30000003, 14): 40.0,    # (4*20 + 0) / 200, SENIOR no suma
+    (30000003, 15): 45.0,    # (2*20 + 1*5) / 100
+    (30000005, 10): 42.5,    # (4*20 + 1*5) / 200
+}
+
+# Personas para las que recomendacion/3 lanza un error (años NULL)
+ERRORES = {30000007}
+
+# nivel_valor/2 de reglas.pl
+NIVEL_VALOR_REGLAS = {"principiante": 1, "intermedio": 2, "avanzado": 3, "experto": 4}
+
+
+class ErrorInstanciacion(Exception):
+    """Lo que hace Prolog al evaluar `Anios * 5` con Anios libre"""
+
+
+@pytest.fixture(scope="module")
+def datos_nativos():
+    """_Datos del motor nativo leídos de una base SQLite con las tablas de prueba"""
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE oferta_empleo (id_oferta INTEGER, id_empresa INTEGER, titulo TEXT, activa BOOLEAN)"
+        ))
+        conn.execute(text(
+            "CREATE TABLE oferta_actividad (id_oferta INTEGER, id_actividad INTEGER, nivel_requerido TEXT)"
+        ))
+        conn.execute(text(
+            "CREATE TABLE persona_actividad (dni INTEGER, id_actividad INTEGER, "
+            "nivel_experiencia TEXT, años_experiencia INTEGER)"
+        ))
+        conn.execute(text("INSERT INTO oferta_empleo VALUES (:id_oferta, :id_empresa, :titulo, :activa)"),
+                     [o._asdict() for o in OFERTAS])
+        conn.execute(text("INSERT INTO oferta_actividad VALUES (:id_oferta, :id_actividad, :nivel_requerido)"),
+                     [r._asdict() for r in REQUISITOS])
+        conn.execute(text("INSERT INTO persona_actividad VALUES (:dni, :id_actividad, :nivel_experiencia, :años_experiencia)"),
+                     [h._asdict() for h in HABILIDADES])
+    with Session(engine) as db:
+        yield _Datos(db)
+    engine.dispose()
+
+
+def _motor(datos):
+    motor = MotorNativo()
+    motor._datos_actuales = lambda: datos
+    return motor
+
+
+def _puntajes_nativos(datos):
+    """Puntajes por (dni, oferta) y DNIs con status "error" """
+    puntajes, errores = {}, set()
+    for r in _motor(datos).buscar_recomendaciones_lote(DNIS):
+        if r["status"] == "error":
+            errores.add(r["dni"])
+        for rec in r["recomendaciones"]:
+            puntajes[(r["dni"], rec["oferta"])] = rec["puntaje"]
+    return puntajes, errores
+
+
+def _recomendaciones_reglas(dni):
+    """
+    recomendacion/3 de reglas.pl transcrita cláusula por cláusula, sobre los
+    mismos hechos que exporta formato_hechos (niveles en minúsculas y sin
+    acentos; años NULL como variable libre).
+    """
+    def puntaje_actividad(nivel_persona, anios, nivel_req):
+        # Sin cláusula que aplique (nivel desconocido): falla → findall lo omite
+        if nivel_persona not in NIVEL_VALOR_REGLAS or nivel_req not in NIVEL_VALOR_REGLAS:
+            return None
+        vp, vr = NIVEL_VALOR_REGLAS[nivel_persona], NIVEL_VALOR_REGLAS[nivel_req]
+        if vp >= vr:
+            if anios is None:
+                raise ErrorInstanciacion()
+            return vp * 20 + anios * 5
+        return 0
+
+    nivel = lambda texto: limpiar_y_formatear(texto).lower()
+    resultado = {}
+    for oferta in OFERTAS:
+        if not oferta.activa:
+            continue
+        requisitos = [r for r in REQUISITOS if r.id_oferta == oferta.id_oferta]
+        parciales = []
+        for r in requisitos:
+            habilidad = next((h for h in HABILIDADES if h.dni == dni and h.id_actividad == r.id_actividad), None)
+            if habilidad is None:
+                parciales.append(0)
+                continue
+            p = puntaje_actividad(nivel(habilidad.nivel_experiencia), habilidad.años_experiencia, nivel(r.nivel_requerido))
+            if p is not None:
+                parciales.append(p)
+        score = 0 if not requisitos else sum(parciales) / (100 * len(requisitos)) * 100
+        if score > 0:
+            resultado[(dni, oferta.id_oferta)] = score
+    return resultado
+
+
+def _puntajes_reglas():
+    puntajes, errores = {}, set()
+    for dni in DNIS:
+        try:
+            puntajes.update(_recomendaciones_reglas(dni))
+        except ErrorInstanciacion:
+            errores.add(dni)
+    return puntajes, errores
+
+
+def _puntajes_prolog(tmp_path):
+    """recomendacion/3 de reglas.pl sobre los hechos exportados por formato_hechos"""
+    hechos = tmp_path / "hechos.pl"
+    hechos.write_text("\n".join(
+        [":- dynamic oferta/4.", ":- dynamic oferta_actividad/3.", ":- dynamic persona_actividad/4."]
+        + [_hecho_oferta(o) for o in OFERTAS]
+        + [_hecho_oferta_actividad(r) for r in REQUISITOS]
+        + [_hecho_persona_actividad(h) for h in HABILIDADES]
+    ) + "\n", encoding="utf-8")
+
+    # Como /matching: todas las recomendaciones de la persona o un error
+    objetivo = (
+        f"consult('{os.path.abspath(REGLAS)}'), consult('{hechos}'), "
+        f"forall(member(D, {DNIS}), "
+        f"( catch(findall(O-S, recomendacion(D, O, S), L), _, L = error), "
+        f"  ( L == error -> format('~w error~n', [D]) "
+        f"  ; forall(member(O-S, L), format('~w ~w ~w~n', [D, O, S])) ) )), halt"
+    )
+    salida = subprocess.run(
+        [SWIPL, "-q", "-g", objetivo, "-t", "halt(1)"],
+        capture_output=True, text=True, timeout=60, check=True
+    ).stdout
+    puntajes, errores = {}, set()
+    for linea in salida.splitlines():
+        campos = linea.split()
+        if campos[1] == "error":
+            errores.add(int(campos[0]))
+            continue
+        dni, oferta, puntaje = campos
+        puntajes[(int(dni), int(oferta))] = float(puntaje)
+    return puntajes, errores
+
+
+def test_reglas_puntajes_esperados():
+    puntajes, errores = _puntajes_reglas()
+    assert puntajes == pytest.approx(ESPERADOS)
+    assert errores == ERRORES
+
+
+def test_nativo_puntajes_esperados(datos_nativos):
+    puntajes, errores = _puntajes_nativos(datos_nativos)
+    assert puntajes == pytest.approx(ESPERADOS)
+    assert errores == ERRORES
+
+
+def test_nativo_formato_respuesta(datos_nativos):
+    motor = _motor(datos_nativos)
+    r = motor.buscar_recomendaciones(30000003)
+    assert r["status"] == "ok"
+    assert r["recomendaciones"] == [
+        {"oferta": 14, "titulo": "Nivel Desconocido", "puntaje": 40.0},
+        {"oferta": 15, "titulo": "Acentos", "puntaje": 45.0},
+    ]
+    assert motor.buscar_recomendaciones(30000004)["recomendaciones"] == []
+
+    sin_anios = motor.buscar_recomendaciones(30000007)
+    assert sin_anios["status"] == "error"
+    assert sin_anios["recomendaciones"] == []
+    assert motor.buscar_recomendaciones(30000008) == {"status": "ok", "dni": 30000008, "recomendaciones": []}
+
+
+@pytest.mark.skipif(SWIPL is None, reason="SWI-Prolog (swipl) no está instalado")
+def test_prolog_puntajes_esperados(tmp_path):
+    puntajes, errores = _puntajes_prolog(tmp_path)
+    assert puntajes == pytest.approx(ESPERADOS)
+    assert errores == ERRORES
+
+
+@pytest.mark.skipif(SWIPL is None, reason="SWI-Prolog (swipl) no está instalado")
+def test_nativo_equivalente_a_prolog(datos_nativos, tmp_path):
+    nativos, errores_nativos = _puntajes_nativos(datos_nativos)
+    prolog, errores_prolog = _puntajes_prolog(tmp_path)
+    assert errores_nativos == errores_prolog
+    assert nativos.keys() == prolog.keys()
+    for clave, puntaje in prolog.items():
+        assert nativos[clave] == pytest.approx(puntaje), clave
@@ -0,0 +1,54 @@
+"""
+Caché de ofertas por habilidad (app/actividades/ofertas_habilidad.py): lo
+leído no se guarda si otra escritura se confirmó mientras corría la consulta
+(quedaría en caché bajo la versión nueva con datos viejos).
+
+Uso (desde backend/):
+    python -m pytest tests/test_ofertas_habilidad.py
+"""
+import pytest
+
+from app.actividades import ofertas_habilidad
+from app.versiones import registrar_escritura
+
+
+@pytest.fixture
+def consultas(monkeypatch):
+    """Reemplaza la consulta a la base; cada llamada queda registrada"""
+    registradas = []
+
+    def consultar(db, habilidades):
+        registradas.append(list(habilidades))
+        return {h: [{"id_oferta": len(registradas), "titulo": h, "descripcion": None}] for h in habilidades}
+
+    monkeypatch.setattr(ofertas_habilidad, "_consultar", consultar)
+    ofertas_habilidad._cache.clear()
+    yield registradas
+    ofertas_habilidad._cache.clear()
+
+
+def test_sin_escrituras_queda_en_cache(consultas):
+    ofertas_habilidad.ofertas_por_habilidad(None, ["Python"])
+    ofertas_habilidad.ofertas_por_habilidad(None, ["Python"])
+    assert consultas == [["Python"]]
+
+
+def test_escritura_durante_la_consulta_no_se_cachea(consultas, monkeypatch):
+    consultar = ofertas_habilidad._consultar
+
+    def consultar_con_escritura(db, habilidades):
+        # Otro pedido confirma una oferta mientras esta consulta lee
+        resultado = consultar(db, habilidades)
+        registrar_escritura("oferta_empleo")
+        return resultado
+
+    monkeypatch.setattr(ofertas_habilidad, "_consultar", consultar_con_escritura)
+    viejo = ofertas_habilidad.ofertas_por_habilidad(None, ["Python"])
+    assert "Python" not in ofertas_habilidad._cache
+
+    # El pedido siguiente (ya con la versión nueva) vuelve a la base
+    monkeypatch.setattr(ofertas_habilidad, "_consultar", consultar)
+    nuevo = ofertas_habilidad.ofertas_por_habilidad(None, ["Python"])
+    assert consultas == [["Python"], ["Python"]]
+    assert nuevo != viejo
+    assert ofertas_habilidad._cache["Python"] == nuevo["Python"]
@@ -0,0 +1,54 @@
+"""
+Caché de perfiles (app/autenticacion/perfiles.py): límite LRU e índices
+inversos por dni / id_empresa.
+
+Uso (desde backend/):
+    python -m pytest tests/test_perfiles_cache.py
+"""
+import pytest
+
+from app.autenticacion import perfiles
+
+
+@pytest.fixture(autouse=True)
+def cache_vacia(monkeypatch):
+    monkeypatch.setattr(perfiles, "PERFIL_CACHE_TAMANIO", 2)
+    for indice in (perfiles._perfiles, perfiles._por_dni, perfiles._por_empresa):
+        indice.clear()
+    yield
+    for indice in (perfiles._perfiles, perfiles._por_dni, perfiles._por_empresa):
+        indice.clear()
+
+
+def test_descarta_el_menos_usado():
+    perfiles.guardar_perfil(1, {"email": "a"}, dni=101)
+    perfiles.guardar_perfil(2, {"email": "b"}, dni=102)
+    assert perfiles.perfil_en_cache(1) == {"email": "a"}
+    perfiles.guardar_perfil(3, {"email": "c"}, dni=103)
+
+    assert perfiles.perfil_en_cache(2) is None
+    assert set(perfiles._perfiles) == {1, 3}
+    assert set(perfiles._por_dni) == {101, 103}
+
+
+def test_perfil_vacio_limpia_indices():
+    # PERSONA o EMPRESA sin su fila asociada: el perfil es {}
+    perfiles.guardar_perfil(1, {}, dni=101)
+    perfiles.guardar_perfil(2, {}, id_empresa=7)
+    perfiles.guardar_perfil(3, {}, dni=103)
+
+    assert 1 not in perfiles._perfiles
+    assert 101 not in perfiles._por_dni
+
+    perfiles.invalidar_perfil_empresa(7)
+    perfiles.invalidar_perfil_persona(103)
+    assert not perfiles._perfiles
+    assert not perfiles._por_dni
+    assert not perfiles._por_empresa
+
+
+def test_vencido_limpia_indices(monkeypatch):
+    monkeypatch.setattr(perfiles, "PERFIL_CACHE_TTL", -1)
+    perfiles.guardar_perfil(1, {}, dni=101)
+    assert perfiles.perfil_en_cache(1) is None
+    assert not perfiles._por_dni
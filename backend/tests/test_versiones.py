@@ -0,0 +1,138 @@
+"""
+Qué escrituras incrementan las versiones de app/versiones.py: ORM, Core y
+text(), dentro y fuera de una Session, y cuándo (después del commit; nunca
+con rollback).
+
+Se usa una base SQLite en memoria: los eventos escuchan a todo Engine.
+
+Uso (desde backend/):
+    python -m pytest tests/test_versiones.py
+"""
+import pytest
+from sqlalchemy import Column, Integer, String, create_engine, delete, insert, text
+from sqlalchemy.orm import Session, declarative_base
+from sqlalchemy.pool import StaticPool
+
+from app.versiones import tablas_escritas, version_datos, version_tabla
+
+
+Base = declarative_base()
+
+
+class Actividad(Base):
+    __tablename__ = "actividad"
+    id_actividad = Column(Integer, primary_key=True)
+    nombre = Column(String)
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE usuario (id_usuario INTEGER PRIMARY KEY, intentos_login INTEGER)"))
+    yield engine
+    engine.dispose()
+
+
+class Versiones:
+    """Versión de la tabla y de datos antes de un bloque, para comparar después"""
+
+    def __init__(self, tabla):
+        self.tabla = tabla
+        self.tabla_antes = version_tabla(tabla)
+        self.datos_antes = version_datos()
+
+    @property
+    def tabla_subio(self):
+        return version_tabla(self.tabla) > self.tabla_antes
+
+    @property
+    def datos_subio(self):
+        return version_datos() > self.datos_antes
+
+
+@pytest.mark.parametrize("sentencia, tablas", [
+    ("SELECT * FROM actividad", set()),
+    ("SELECT * FROM actividad FOR UPDATE", set()),
+    ("INSERT INTO actividad (nombre) VALUES ('x')", {"actividad"}),
+    ('  update "persona" SET nombre = 1', {"persona"}),
+    ("DELETE FROM public.oferta_empleo WHERE id_oferta = 1", {"oferta_empleo"}),
+    ("TRUNCATE TABLE ONLY postulaciones", {"postulaciones"}),
+    ("INSERT INTO persona (dni) VALUES (1) ON CONFLICT (dni) DO UPDATE SET dni = 1", {"persona"}),
+    ("WITH borradas AS (DELETE FROM postulaciones RETURNING dni) "
+     "UPDATE persona SET nombre = 'x' FROM borradas", {"postulaciones", "persona"}),
+])
+def test_tablas_escritas(sentencia, tablas):
+    assert tablas_escritas(sentencia) == tablas
+
+
+def test_orm_en_session(engine):
+    v = Versiones("actividad")
+    with Session(engine) as db:
+        db.add(Actividad(nombre="Python"))
+        db.flush()
+        assert not v.tabla_subio   # recién al confirmar
+        db.commit()
+    assert v.tabla_subio and v.datos_subio
+
+
+def test_text_en_session(engine):
+    v = Versiones("actividad")
+    with Session(engine) as db:
+        db.execute(text("INSERT INTO actividad (nombre) VALUES ('Django')"))
+        assert not v.tabla_subio
+        db.commit()
+    assert v.tabla_subio and v.datos_subio
+
+
+def test_core_sin_session(engine):
+    v = Versiones("actividad")
+    with engine.begin() as conn:
+        conn.execute(insert(Actividad.__table__).values(nombre="SQL"))
+    assert v.tabla_subio and v.datos_subio
+
+    # Después de devolver la conexión la versión es posterior al commit
+    v = Versiones("actividad")
+    with engine.connect() as conn:
+        conn.execute(delete(Actividad.__table__).where(Actividad.id_actividad == -1))
+        conn.commit()
+        despues_del_commit = version_tabla("actividad")
+    assert version_tabla("actividad") > despues_del_commit > v.tabla_antes
+
+
+def test_rollback_no_versiona(engine):
+    v = Versiones("actividad")
+    with Session(engine) as db:
+        db.execute(text("DELETE FROM actividad"))
+        db.rollback()
+    with engine.connect() as conn:
+        conn.execute(text("DELETE FROM actividad"))
+        conn.rollback()
+    with engine.connect() as conn:
+        conn.execute(text("DELETE FROM actividad"))   # se cierra sin commit
+    assert not v.tabla_subio
+
+
+def test_lectura_no_versiona(engine):
+    v = Versiones("actividad")
+    with Session(engine) as db:
+        db.execute(text("SELECT * FROM actividad")).all()
+        db.commit()
+    assert not v.tabla_subio
+
+
+def test_tabla_fuera_del_conocimiento(engine):
+    v = Versiones("usuario")
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE usuario SET intentos_login = 0"))
+    assert v.tabla_subio and not v.datos_subio
+
+
+def test_sin_versionar_conocimiento(engine):
+    v = Versiones("actividad")
+    with Session(engine) as db:
+        db.info["sin_versionar_conocimiento"] = True
+        db.execute(text("INSERT INTO actividad (nombre) VALUES ('Go')"))
+        db.commit()
+    assert v.tabla_subio and not v.datos_subio
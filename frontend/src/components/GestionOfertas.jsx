@@ -1,4 +1,5 @@
 import React, { useState, useEffect } from 'react';
+import { obtenerTodos } from '../servicios/Api';
 import OfertaForm from './OfertaForm';
 import '../styles/OfertaForm.css';
 
@@ -38,13 +39,19 @@ const GestionOfertas = ({ empresaId, usuario }) => {
         console.log("🔄 Cargando TODAS las ofertas (sin filtro)");
       }
       
-      const response = await fetch(url);
-      
-      if (!response.ok) {
-        throw new Error('Error al cargar las ofertas');
+      let ofertasCargadas;
+      if (esEmpresa || esPersona) {
+        const response = await fetch(url);
+        
+        if (!response.ok) {
+          throw new Error('Error al cargar las ofertas');
+        }
+        
+        ofertasCargadas = await response.json();
+      } else {
+        // El listado general viene paginado: se recorren todas las páginas
+        ofertasCargadas = await obtenerTodos('/api/ofertas/');
       }
-      
-      const ofertasCargadas = await response.json();
       console.log("📦 Ofertas cargadas:", ofertasCargadas);
       
       setOfertas(ofertasCargadas);
@@ -208,14 +215,8 @@ const GestionOfertas = ({ empresaId, usuario }) => {
         setCargandoActividades(true);
         const API_BASE_URL = 'http://localhost:3000';
         
-        // Cargar actividades disponibles
-        const response = await fetch(`${API_BASE_URL}/api/actividades/?skip=0&limit=100`);
-        
-        if (!response.ok) {
-          throw new Error('Error al cargar actividades');
-        }
-        
-        const actividades = await response.json();
+        // Cargar actividades disponibles (todas las páginas)
+        const actividades = await obtenerTodos('/api/actividades/');
         setActividadesDisponibles(actividades);
         
         // Cargar actividades actuales de la oferta
@@ -1,4 +1,5 @@
 import React, { useState, useEffect } from 'react';
+import { obtenerTodos } from '../servicios/Api';
 
 const MisActividades = ({ usuario, tipo }) => {
   const [misActividades, setMisActividades] = useState([]);
@@ -36,12 +37,7 @@ const MisActividades = ({ usuario, tipo }) => {
   const cargarActividadesDisponibles = async () => {
     try {
       setCargandoActividades(true);
-      const API_BASE_URL = 'http://localhost:3000';
-      const response = await fetch(`${API_BASE_URL}/api/actividades/?skip=0&limit=100`);
-      
-      if (!response.ok) throw new Error('Error cargando actividades');
-      
-      const data = await response.json();
+      const data = await obtenerTodos('/api/actividades/');
       setActividadesDisponibles(data);
     } catch (error) {
       console.error('Error cargando actividades:', error);
@@ -1,4 +1,5 @@
 import React, { useState, useEffect } from 'react';
+import { obtenerTodos } from '../servicios/Api';
 
 const OfertaForm = ({ usuario, onOfertaCreada, onCancelar }) => {
   const [formData, setFormData] = useState({
@@ -31,25 +32,10 @@ const OfertaForm = ({ usuario, onOfertaCreada, onCancelar }) => {
     try {
       setCargandoActividades(true);
       
-      const API_BASE_URL = 'http://localhost:3000';
-      const url = `${API_BASE_URL}/api/actividades/?skip=0&limit=100`;
-      
-      console.log('🔄 Cargando actividades desde:', url);
-      
-      const response = await fetch(url, {
-        method: 'GET',
-        headers: {
-          'Accept': 'application/json',
-          'Content-Type': 'application/json',
-        },
-        mode: 'cors'
-      });
-      
-      if (!response.ok) {
-        throw new Error(`HTTP error! status: ${response.status}`);
-      }
+      console.log('🔄 Cargando actividades');
       
-      const data = await response.json();
+      // El listado viene paginado: se recorren todas las páginas
+      const data = await obtenerTodos('/api/actividades/');
       console.log('✅ Actividades cargadas correctamente:', data);
       setActividadesDisponibles(data);
       
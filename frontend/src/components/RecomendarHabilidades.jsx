@@ -15,10 +15,19 @@ export default function RecomendarHabilidades({ dni }) {
           `/api/actividades/recomendaciones/habilidades/${dni}`
         );
 
-        const postResp = await axios.get(`/api/postulaciones/`);
+        // El listado de postulaciones viene paginado: se recorren las páginas
+        const todas = [];
+        let cursor = null;
+        do {
+          const postResp = await axios.get(`/api/postulaciones/`, {
+            params: cursor ? { cursor, limit: 1000 } : { limit: 1000 },
+          });
+          todas.push(...(postResp.data.resultados || []));
+          cursor = postResp.data.siguiente;
+        } while (cursor);
 
         setRecomendaciones(response.data.recomendaciones || []);
-        setPostulaciones(postResp.data || []);
+        setPostulaciones(todas);
       } catch (err) {
         console.error(err);
         setError("Error al cargar recomendaciones");
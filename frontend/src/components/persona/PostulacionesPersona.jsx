@@ -13,9 +13,18 @@ export default function PostulacionesPersona({ dni }) {
       try {
         console.log("📌 Cargando postulaciones para persona:", dni);
 
-        // 1️⃣ Obtener todas las postulaciones
-        const resp = await axios.get("/api/postulaciones/");
-        const filtradas = resp.data.filter((p) => p.dni === dni);
+        // 1️⃣ Obtener todas las postulaciones (el listado viene paginado:
+        //    se sigue el cursor "siguiente" hasta la última página)
+        const todas = [];
+        let cursor = null;
+        do {
+          const resp = await axios.get("/api/postulaciones/", {
+            params: cursor ? { cursor, limit: 1000 } : { limit: 1000 },
+          });
+          todas.push(...(resp.data.resultados || []));
+          cursor = resp.data.siguiente;
+        } while (cursor);
+        const filtradas = todas.filter((p) => p.dni === dni);
         setPostulaciones(filtradas);
 
         // 2️⃣ Cargar detalles de cada oferta involucrada
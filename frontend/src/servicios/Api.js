@@ -138,6 +138,41 @@ export const getPerfilUsuario = async (token) => {
   return await response.json();
 };
 
+/* ==================== PAGINACIÓN ==================== */
+
+// Los listados del backend responden { resultados, siguiente, limit }:
+// "siguiente" es el cursor de la próxima página (null en la última)
+export const obtenerPagina = async (ruta, { cursor = null, limit = 100, token = null, params = {} } = {}) => {
+  const query = new URLSearchParams({ ...params, limit });
+  if (cursor) query.set('cursor', cursor);
+
+  const headers = { 'Content-Type': 'application/json' };
+  if (token) headers['Authorization'] = `Bearer ${token}`;
+
+  const response = await fetch(`${API_BASE_URL}${ruta}?${query}`, { headers });
+  const data = await response.json();
+
+  if (!response.ok) {
+    throw new Error(data.detail || `Error al obtener ${ruta}`);
+  }
+
+  return data;
+};
+
+// Recorre todas las páginas de un listado y devuelve los resultados juntos
+export const obtenerTodos = async (ruta, opciones = {}) => {
+  const resultados = [];
+  let cursor = null;
+
+  do {
+    const pagina = await obtenerPagina(ruta, { ...opciones, cursor, limit: opciones.limit || 1000 });
+    resultados.push(...pagina.resultados);
+    cursor = pagina.siguiente;
+  } while (cursor);
+
+  return resultados;
+};
+
 /* ==================== PERSONAS ==================== */
 
 export const obtenerPersona = async (dni, token) => {
@@ -153,15 +188,11 @@ export const obtenerPersona = async (dni, token) => {
 };
 
 export const listarPersonas = async (token) => {
-  const response = await fetch(`${API_BASE_URL}/api/personas/`, {
-    headers: {
-      'Authorization': `Bearer ${token}`,
-      'Content-Type': 'application/json'
-    },
-  });
-  
-  if (!response.ok) throw new Error('Error al obtener personas');
-  return await response.json();
+  try {
+    return await obtenerTodos('/api/personas/', { token });
+  } catch (error) {
+    throw new Error('Error al obtener personas');
+  }
 };
 
 
@@ -206,15 +237,11 @@ export const obtenerEmpresa = async (id_empresa, token) => {
 };
 
 export const listarEmpresas = async (token) => {
-  const response = await fetch(`${API_BASE_URL}/api/empresas/`, {
-    headers: {
-      'Authorization': `Bearer ${token}`,
-      'Content-Type': 'application/json'
-    },
-  });
-  
-  if (!response.ok) throw new Error('Error al obtener empresas');
-  return await response.json();
+  try {
+    return await obtenerTodos('/api/empresas/empresas/', { token });
+  } catch (error) {
+    throw new Error('Error al obtener empresas');
+  }
 };
 
 
@@ -287,15 +314,11 @@ export const crearOferta = async (ofertaData, token) => {
 /* ==================== ACTIVIDADES ==================== */
 
 export const listarActividades = async (token) => {
-  const response = await fetch(`${API_BASE_URL}/api/actividades/`, {
-    headers: {
-      'Authorization': `Bearer ${token}`,
-      'Content-Type': 'application/json'
-    },
-  });
-  
-  if (!response.ok) throw new Error('Error al obtener actividades');
-  return await response.json();
+  try {
+    return await obtenerTodos('/api/actividades/', { token });
+  } catch (error) {
+    throw new Error('Error al obtener actividades');
+  }
 };
 
 